@@ -0,0 +1,277 @@
+"""
+Registry of the actions the agent can take.
+
+Each action declares its name, a one-line summary, its parameters and
+whether it only runs after the user confirms it. Everything else is derived
+from these declarations: the Brain's prompt (one compact line per action),
+the check of every command the LLM returns before it is dispatched, and the
+executor's dispatch table. Implementations are named, not imported - an
+ActionExecutor method, or 'module:function' for an action that lives in its
+own module - and are looked up on first use, so registering an action
+costs neither startup time nor, beyond its line in the prompt, tokens.
+
+To add an action, register it before the Brain and executor are created:
+
+    REGISTRY.register(Action('lock_screen', 'lock the screen', handler='screen_lock:lock'))
+
+where screen_lock.lock(executor, params) returns the result message.
+"""
+
+import importlib
+from functools import partial
+
+# How a parameter type is shown in the prompt when it isn't a plain string
+TYPE_HINTS = {int: 'int', float: 'number', bool: 'true/false', list: 'list', dict: 'object'}
+TRUE_WORDS = {'true', 'yes', '1'}
+FALSE_WORDS = {'false', 'no', '0', ''}
+# Keys a plan step may carry besides its action and params
+STEP_KEYS = ('id', 'after', 'depends_on')
+
+
+class Param:
+    """One declared parameter of an action."""
+
+    def __init__(self, name, kind=str, required=True, hint=None):
+        """
+        Args:
+            name (str): Key in the command's params
+            kind (type): str, int, float, bool, list or dict
+            required (bool): Whether the action can't run without it
+            hint (str): Shown after the name in the prompt (default: the
+                type, for anything but strings)
+        """
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.hint = hint if hint is not None else TYPE_HINTS.get(kind)
+
+    def signature(self):
+        text = self.name + ('' if self.required else '?')
+        return f"{text}: {self.hint}" if self.hint else text
+
+    def coerce(self, value):
+        """
+        The value as this parameter's type.
+
+        Raises:
+            ValueError: The value can't be read as that type
+        """
+        kind = self.kind
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in TRUE_WORDS:
+                return True
+            if str(value).strip().lower() in FALSE_WORDS:
+                return False
+            raise ValueError(f"{self.name} must be true or false")
+        if kind is str:
+            if isinstance(value, (str, int, float)):
+                return str(value)  # e.g. a job number sent as 2
+            raise ValueError(f"{self.name} must be text")
+        if kind in (int, float):
+            if isinstance(value, str):
+                value = value.strip()
+            return kind(float(value)) if kind is int else kind(value)
+        if kind is list:
+            if isinstance(value, (list, tuple)):
+                return list(value)
+            if isinstance(value, str):
+                return [value]  # One path where a list was asked for
+            raise ValueError(f"{self.name} must be a list")
+        if not isinstance(value, kind):
+            raise ValueError(f"{self.name} must be {TYPE_HINTS.get(kind, kind.__name__)}")
+        return value
+
+
+class Action:
+    """Declaration of one action: what the Brain may ask for and where it is implemented."""
+
+    def __init__(self, name, summary, params=(), confirm=False, handler=True, job=False, resource=None):
+        """
+        Args:
+            name (str): Action name in commands
+            summary (str): What it does, for the prompt
+            params (tuple): Its Params
+            confirm (bool): Only runs when its params carry confirmed=True;
+                the Brain asks for confirmed=false and the user confirms
+            handler (str|bool): ActionExecutor method name, or
+                'module:function' called as function(executor, params);
+                True means the method named like the action, None an answer
+                the agent gives itself (respond, clarify)
+            job (bool): Runs as a background job; plan steps wait for it
+            resource (str): Shared state it uses (see ResourceLocks)
+        """
+        self.name = name
+        self.summary = summary
+        self.params = {param.name: param for param in params}
+        if confirm:
+            self.params.setdefault('confirmed', Param('confirmed', bool, required=False))
+        self.confirm = confirm
+        self.handler = name if handler is True else handler
+        self.job = job
+        self.resource = resource
+
+    def signature(self):
+        """The action's line in the prompt, e.g. 'delete_file*(path) delete a file'."""
+        shown = [param.signature() for name, param in self.params.items() if name != 'confirmed']
+        return f"{self.name}{'*' if self.confirm else ''}({', '.join(shown)}) {self.summary}"
+
+    def bind(self, executor):
+        """
+        The implementation as a callable taking params, importing its module
+        on first use.
+
+        Returns:
+            callable: None for actions the agent answers itself
+        """
+        if self.handler is None:
+            return None
+        module, _, function = self.handler.rpartition(':')
+        if not module:
+            return getattr(executor, function)
+        return partial(getattr(importlib.import_module(module), function), executor)
+
+
+class InvalidCommand(ValueError):
+    """A command doesn't match the registry; the message is fit to show the user."""
+
+
+class ActionRegistry:
+    """The declared actions, in prompt order."""
+
+    def __init__(self, actions=()):
+        self.actions = {}
+        self._prompt = None
+        for action in actions:
+            self.register(action)
+
+    def register(self, action):
+        self.actions[action.name] = action
+        self._prompt = None
+        return action
+
+    def __contains__(self, name):
+        return name in self.actions
+
+    def __getitem__(self, name):
+        return self.actions[name]
+
+    def __iter__(self):
+        return iter(self.actions.values())
+
+    def prompt(self):
+        """The system prompt generated from the declarations (built once)."""
+        if self._prompt is None:
+            lines = [PROMPT_HEADER]
+            lines += [action.signature() for action in self]
+            lines.append(PROMPT_FOOTER)
+            self._prompt = '\n'.join(lines)
+        return self._prompt
+
+    def validate(self, command, nested=False):
+        """
+        Check an LLM command against the declarations.
+
+        Parameters are converted to their declared types where that is
+        unambiguous ("10" for an int); undeclared ones are dropped, and
+        optional ones that can't be converted are left to their defaults.
+
+        Args:
+            command (dict): {"action": ..., "params": {...}}
+            nested (bool): A plan step (plans can't nest)
+
+        Returns:
+            dict: The cleaned command
+
+        Raises:
+            InvalidCommand: Unknown action, a missing required parameter,
+                or a plan step that is invalid
+        """
+        if not isinstance(command, dict) or not isinstance(command.get('action'), str):
+            raise InvalidCommand("I'm having trouble understanding that command. Could you rephrase?")
+        name = command['action']
+        action = self.actions.get(name)
+        if action is None:
+            raise InvalidCommand(f"I don't know how to {name.replace('_', ' ')}. Could you rephrase?")
+        if nested and name == 'plan':
+            raise InvalidCommand("That needs a plan inside a plan, which I can't run. Could you split it up?")
+        raw = command.get('params')
+        raw = raw if isinstance(raw, dict) else {}
+
+        params = {}
+        for param in action.params.values():
+            if param.name not in raw or raw[param.name] is None:
+                continue
+            try:
+                params[param.name] = param.coerce(raw[param.name])
+            except (TypeError, ValueError, OverflowError):  # e.g. "inf" for an int
+                continue
+        missing = [p.name for p in action.params.values() if p.required and p.name not in params]
+        if missing:
+            raise InvalidCommand(f"I need the {missing[0].replace('_', ' ')} to {action.summary}. "
+                                 f"Could you say that again with it?")
+
+        if name == 'plan':
+            steps = []
+            for step in params['steps']:
+                checked = self.validate(step, nested=True)
+                checked.update({key: step[key] for key in STEP_KEYS if key in step})
+                steps.append(checked)
+            params['steps'] = steps
+        return {'action': name, 'params': params}
+
+
+PROMPT_HEADER = """You turn a user's command into one JSON object, {"action": "<name>", "params": {...}}, and reply with nothing else.
+Actions, as name(params) - ? marks optional params; * means send "confirmed": false, the user confirms later:"""
+
+PROMPT_FOOTER = """Use create_files/create_folders rather than a plan for several files or folders of one kind.
+Example: "Create a folder reports with notes.txt in it and open notepad" ->
+{"action": "plan", "params": {"steps": [{"id": "1", "action": "create_folder", "params": {"path": "reports"}, "after": []}, {"id": "2", "action": "create_file", "params": {"path": "reports/notes.txt", "content": ""}, "after": ["1"]}, {"id": "3", "action": "open_app", "params": {"app_name": "notepad"}, "after": []}]}}
+"""
+
+
+REGISTRY = ActionRegistry([
+    Action('open_app', 'open an application', [Param('app_name')]),
+    Action('close_app', 'close an application', [Param('app_name')]),
+    Action('create_file', 'create a file', [Param('path'), Param('content', required=False)]),
+    Action('create_folder', 'create a folder', [Param('path')]),
+    Action('create_files', 'create many files from a list and/or a brace pattern like notes/day{1..30}.txt',
+           [Param('paths', list, required=False), Param('pattern', required=False),
+            Param('folder', required=False), Param('content', required=False),
+            Param('template', required=False, hint='file to copy'), Param('durable', bool, required=False)],
+           job=True),
+    Action('create_folders', 'create many folders, e.g. pattern projects/{alpha,beta}',
+           [Param('paths', list, required=False), Param('pattern', required=False)]),
+    Action('delete_file', 'delete a file', [Param('path')], confirm=True),
+    Action('delete_folder', 'delete a folder in the background', [Param('path')], confirm=True, job=True),
+    Action('copy_path', 'copy a file or folder in the background',
+           [Param('source'), Param('destination')], job=True),
+    Action('find_file', 'find files or folders by (part of) their name',
+           [Param('name'), Param('kind', required=False, hint='file or folder')]),
+    Action('search_web', 'search Google', [Param('query')]),
+    Action('open_url', 'open a web address', [Param('url')]),
+    Action('run_command', 'run a shell command', [Param('command')], confirm=True, resource='shell'),
+    Action('show_more', "show the next page of the last command's output", resource='shell'),
+    Action('get_system_info', 'report OS, CPU, memory, disk and network use',
+           handler='system_monitor:system_info'),
+    Action('take_screenshot', 'take a screenshot, optionally of one window or region',
+           [Param('filename', required=False), Param('window', required=False, hint='title'),
+            Param('region', list, required=False, hint='[left, top, width, height]'),
+            Param('format', required=False, hint='png/jpeg/webp'), Param('quality', int, required=False),
+            Param('compression', int, required=False)], job=True, resource='screen'),
+    Action('start_burst', 'keep capturing the screen, remembering the last distinct frames',
+           [Param('frames', int, required=False), Param('interval', float, required=False, hint='seconds')],
+           resource='screen'),
+    Action('save_burst', 'stop burst capture and save the frames',
+           [Param('folder', required=False), Param('format', required=False, hint='png/jpeg/webp')],
+           job=True, resource='screen'),
+    Action('job_status', 'report progress of background jobs (all when job_id is omitted)',
+           [Param('job_id', required=False)]),
+    Action('cancel_job', 'cancel a background job', [Param('job_id', hint='number or all')]),
+    Action('plan', 'several actions from one command; steps with empty "after" run at the same time',
+           [Param('steps', list, hint='[{"id", "action", "params", "after": [ids it needs first]}]')],
+           handler='run_plan'),
+    Action('clarify', 'ask when the command is unclear', [Param('message', required=False)], handler=None),
+    Action('respond', 'answer greetings and chat', [Param('message', required=False)], handler=None),
+])
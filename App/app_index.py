@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import time
+import shlex
+import threading
+import subprocess
+from pathlib import Path
+
+from fuzzy import NameMatcher, normalize_name
+
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / '.agent_cache' / 'app_index.json'
+INDEX_VERSION = 1
+# Seconds between the rescans a name that isn't in the index triggers
+MISS_REFRESH_INTERVAL = 30.0
+
+# Spoken names -> program names to look for, in order of preference
+ALIASES = {
+    'notepad': ['notepad', 'gedit', 'gnome-text-editor', 'kate', 'textedit'],
+    'calculator': ['calc', 'gnome-calculator', 'kcalc', 'calculator'],
+    'paint': ['mspaint', 'kolourpaint', 'pinta'],
+    'explorer': ['explorer', 'nautilus', 'dolphin', 'thunar', 'finder'],
+    'file explorer': ['explorer', 'nautilus', 'dolphin', 'thunar', 'finder'],
+    'files': ['explorer', 'nautilus', 'dolphin', 'thunar', 'finder'],
+    'chrome': ['chrome', 'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'],
+    'google chrome': ['chrome', 'google-chrome', 'google-chrome-stable', 'chromium'],
+    'edge': ['msedge', 'microsoft-edge', 'microsoft-edge-stable'],
+    'browser': ['chrome', 'google-chrome', 'firefox', 'msedge', 'chromium', 'safari'],
+    'cmd': ['cmd'],
+    'command prompt': ['cmd'],
+    'terminal': ['wt', 'cmd', 'gnome-terminal', 'konsole', 'xterm', 'terminal'],
+    'powershell': ['powershell', 'pwsh'],
+    'vs code': ['code'],
+    'vscode': ['code'],
+    'visual studio code': ['code'],
+}
+
+
+def _source_dirs():
+    """Directories that hold launchable programs on this platform, with their kind."""
+    dirs = []
+    for entry in os.environ.get('PATH', '').split(os.pathsep):
+        if entry:
+            dirs.append((entry, 'exe', False))
+
+    home = Path.home()
+    if sys.platform == 'win32':
+        for base in (os.environ.get('PROGRAMDATA'), os.environ.get('APPDATA')):
+            if base:
+                dirs.append((str(Path(base) / 'Microsoft' / 'Windows' / 'Start Menu' / 'Programs'),
+                             'shortcut', True))
+    elif sys.platform == 'darwin':
+        dirs.append(('/Applications', 'bundle', False))
+        dirs.append((str(home / 'Applications'), 'bundle', False))
+    else:
+        data_dirs = os.environ.get('XDG_DATA_DIRS', '/usr/local/share:/usr/share').split(':')
+        data_dirs = [os.environ.get('XDG_DATA_HOME', str(home / '.local' / 'share'))] + data_dirs
+        data_dirs += ['/var/lib/flatpak/exports/share', '/var/lib/snapd/desktop']
+        for base in data_dirs:
+            dirs.append((str(Path(base) / 'applications'), 'desktop', True))
+    return dirs
+
+
+class AppIndex:
+    """Index of launchable applications with fuzzy name resolution.
+
+    Scans PATH executables plus .desktop entries (Linux), Start-menu
+    shortcuts (Windows) or app bundles (macOS) once and persists the result.
+    Each scanned directory is stored with its mtime, so later refreshes only
+    rescan directories that changed.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, aliases=None, miss_refresh_interval=MISS_REFRESH_INTERVAL):
+        """
+        Args:
+            path (str|Path): JSON file for the persisted index, or None
+            aliases (dict): Spoken name -> candidate program names
+            miss_refresh_interval (float): Minimum seconds between rescans
+                for names that aren't found (apps installed since)
+        """
+        self.path = Path(path) if path is not None else None
+        self.aliases = {normalize_name(k): v for k, v in (aliases or ALIASES).items()}
+        self.dirs = {}  # dir -> {'mtime': float, 'kind': str, 'entries': [...]}
+        self.matcher = NameMatcher()
+        self.resolved = {}  # normalized spoken name -> entry (per-build memo; hits only)
+        self.miss_refresh_interval = miss_refresh_interval
+        self.refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._load()
+        self.refresh()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            if data.get('version') == INDEX_VERSION:
+                self.dirs = data['dirs']
+        except (ValueError, KeyError, OSError) as e:
+            print(f"Ignoring unreadable app index: {e}")
+
+    def save(self):
+        """Persist the index."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'version': INDEX_VERSION, 'dirs': self.dirs}), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """
+        Rescan directories whose mtime changed since the last scan.
+
+        Returns:
+            int: Number of directories rescanned
+        """
+        self.refreshed_at = time.monotonic()
+        seen = set()
+        rescanned = 0
+        pending = [(d, kind, recursive) for d, kind, recursive in _source_dirs()]
+        while pending:
+            directory, kind, recursive = pending.pop()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+
+            known = self.dirs.get(directory)
+            if known is None or known['mtime'] != mtime:
+                entries, subdirs = self._scan(directory, kind)
+                self.dirs[directory] = {'mtime': mtime, 'kind': kind, 'entries': entries,
+                                        'subdirs': subdirs if recursive else []}
+                rescanned += 1
+            if recursive:
+                pending.extend((sub, kind, True) for sub in self.dirs[directory]['subdirs'])
+
+        # Forget directories that no longer exist or left PATH
+        for directory in list(self.dirs):
+            if directory not in seen:
+                del self.dirs[directory]
+                rescanned += 1
+
+        if rescanned or not len(self.matcher):
+            self._build()
+        if rescanned:
+            self.save()
+        return rescanned
+
+    def _scan(self, directory, kind):
+        """List the launchable entries (and subdirectories) of one directory."""
+        entries, subdirs = [], []
+        try:
+            children = list(os.scandir(directory))
+        except OSError:
+            return entries, subdirs
+
+        for child in children:
+            try:
+                if child.is_dir():
+                    if kind == 'bundle' and child.name.endswith('.app'):
+                        entries.append({'name': child.name[:-4], 'path': child.path, 'kind': kind})
+                    else:
+                        subdirs.append(child.path)
+                    continue
+
+                if kind == 'exe':
+                    name = child.name
+                    if sys.platform == 'win32':
+                        stem, ext = os.path.splitext(name)
+                        if ext.lower() not in ('.exe', '.bat', '.cmd', '.com'):
+                            continue
+                        name = stem
+                    elif not os.access(child.path, os.X_OK):
+                        continue
+                    entries.append({'name': name, 'path': child.path, 'kind': kind})
+                elif kind == 'shortcut' and child.name.lower().endswith(('.lnk', '.url')):
+                    entries.append({'name': child.name.rsplit('.', 1)[0], 'path': child.path, 'kind': kind})
+                elif kind == 'desktop' and child.name.endswith('.desktop'):
+                    entry = self._parse_desktop(child.path)
+                    if entry:
+                        entries.append(entry)
+            except OSError:
+                continue
+        return entries, subdirs
+
+    def _parse_desktop(self, path):
+        """Read Name/Exec from a .desktop file, skipping hidden entries."""
+        fields = {}
+        in_entry = False
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith('['):
+                        in_entry = line == '[Desktop Entry]'
+                    elif in_entry and '=' in line:
+                        key, value = line.split('=', 1)
+                        fields.setdefault(key.strip(), value.strip())
+        except OSError:
+            return None
+
+        if fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true':
+            return None
+        if 'Exec' not in fields or 'Name' not in fields:
+            return None
+        # Drop field codes like %f %U that only make sense with arguments
+        command = ' '.join(part for part in fields['Exec'].split() if not part.startswith('%'))
+        return {
+            'name': fields['Name'],
+            'path': path,
+            'kind': 'desktop',
+            'exec': command,
+            'id': Path(path).stem,
+        }
+
+    def _build(self):
+        """Rebuild the in-memory name lookup from the scanned directories."""
+        self.matcher = NameMatcher()
+        self.resolved = {}
+        # Desktop entries, shortcuts and bundles are preferred over bare executables
+        order = {'desktop': 0, 'shortcut': 0, 'bundle': 0, 'exe': 1}
+        entries = [e for d in self.dirs.values() for e in d['entries']]
+        for entry in sorted(entries, key=lambda e: order[e['kind']]):
+            self.matcher.add(entry['name'], entry)
+            if entry['kind'] == 'desktop':
+                self.matcher.add(entry['id'], entry)
+                program = entry['exec'].split()[0] if entry['exec'] else ''
+                self.matcher.add(Path(program.strip('"')).name, entry)
+
+    def resolve(self, app_name):
+        """
+        Find the application the user most likely meant.
+
+        Args:
+            app_name (str): Spoken application name
+
+        Returns:
+            dict: Index entry ('name', 'path', 'kind', ...), or None
+        """
+        key = normalize_name(app_name)
+        if key in self.resolved:
+            return self.resolved[key]
+
+        entry = self._lookup(key, app_name)
+        if entry is None and time.monotonic() - self.refreshed_at >= self.miss_refresh_interval:
+            # Maybe installed since the last scan; only changed directories are rescanned
+            with self._refresh_lock:
+                if time.monotonic() - self.refreshed_at >= self.miss_refresh_interval and self.refresh():
+                    entry = self._lookup(key, app_name)
+
+        # Misses aren't remembered, so a later install can still be found
+        if entry is not None:
+            self.resolved[key] = entry
+        return entry
+
+    def _lookup(self, key, app_name):
+        for candidate in self.aliases.get(key, []):
+            matches = self.matcher.exact(candidate)
+            if matches:
+                return matches[0]
+        results = self.matcher.search(app_name, limit=1, min_score=0.6)
+        return results[0][2][0] if results else None
+
+    def launch(self, entry):
+        """Start an indexed application."""
+        if entry['kind'] == 'shortcut':
+            os.startfile(entry['path'])
+        elif entry['kind'] == 'bundle':
+            subprocess.Popen(['open', entry['path']])
+        elif entry['kind'] == 'desktop':
+            subprocess.Popen(shlex.split(entry['exec']), start_new_session=True)
+        else:
+            subprocess.Popen([entry['path']])
+
+    def __len__(self):
+        return len(self.matcher)
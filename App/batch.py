@@ -0,0 +1,199 @@
+"""
+Batch mode: run a script of commands with the LLM calls overlapped.
+
+Commands are read one per line from a file or stdin (blank lines and lines
+starting with '#' are skipped). A line may also be a JSON object:
+
+    {"text": "take a screenshot", "independent": true}
+
+Up to `concurrency` Brain.think calls run at once, reading ahead of the
+command being executed. Actions still run in input order: each command
+waits for everything before it, except that consecutive commands marked
+independent run in parallel with each other (shared resources such as the
+screen are still locked one at a time). One JSON line per command is
+written in input order, with the parsed command, the result and timings.
+"""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import tracing
+from executor import FAILURE_PREFIXES, JOB_ACTIONS, ResourceLocks
+
+
+class BatchItem:
+    """One command of the batch and its timings."""
+
+    def __init__(self, index, line, text, independent):
+        self.index = index
+        self.line = line
+        self.text = text
+        self.independent = independent
+        self.command = None
+        self.result = None
+        self.marks = {}  # Timestamps relative to the batch start
+
+
+def read_items(lines, independent=False):
+    """
+    Parse batch input lines into BatchItems, lazily.
+
+    Args:
+        lines (iterable): Input lines
+        independent (bool): Mark every command independent
+
+    Yields:
+        BatchItem: Each command in input order
+    """
+    index = 0
+    for number, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        marked = independent
+        if line.startswith('{'):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict) and entry.get('text'):
+                line, marked = entry['text'], bool(entry.get('independent', independent))
+        index += 1
+        yield BatchItem(index, number, line, marked)
+
+
+class BatchRunner:
+    """Thinks ahead concurrently and executes in order."""
+
+    def __init__(self, brain, executor, concurrency=8):
+        """
+        Args:
+            brain (Brain): Parses commands
+            executor (ActionExecutor): Runs actions
+            concurrency (int): Brain.think calls (and independent actions)
+                in flight at once
+        """
+        self.brain = brain
+        self.executor = executor
+        self.concurrency = max(1, concurrency)
+        self.locks = ResourceLocks()
+        self.stats = {'commands': 0, 'failed': 0, 'think_time': 0.0, 'execute_time': 0.0, 'wall': 0.0}
+
+    def run(self, items, out):
+        """
+        Process every item and write one JSON result line each to `out`.
+
+        Args:
+            items (iterable): BatchItems, e.g. from read_items()
+            out (file): Text stream for the JSONL results
+
+        Returns:
+            dict: Totals (commands, failed, think/execute/wall seconds)
+        """
+        self.start = time.perf_counter()
+        items = iter(items)
+        thinking = deque()  # (item, future) read ahead, not yet executing
+        written = deque()  # (item, future) in input order, waiting to be written
+        group = []  # Execute futures of the current run of independent commands
+
+        think_pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='batch-think')
+        execute_pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='batch-execute')
+        try:
+            while True:
+                # Keep the think pool busy, plus a little read-ahead
+                while len(thinking) < self.concurrency * 2:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    item.marks['read'] = self._now()
+                    thinking.append((item, think_pool.submit(self._think, item)))
+                if not thinking:
+                    break
+
+                item, future = thinking.popleft()
+                future.result()
+                if item.independent:
+                    execution = execute_pool.submit(self._execute, item)
+                    group.append(execution)
+                else:
+                    # Everything before it finishes first, and it finishes before anything after
+                    wait(group)
+                    group = []
+                    execution = execute_pool.submit(self._execute, item)
+                    wait([execution])
+                written.append((item, execution))
+                self._write_ready(written, out)
+
+            wait(group)
+            self._write_ready(written, out, block=True)
+        finally:
+            think_pool.shutdown(wait=True)
+            execute_pool.shutdown(wait=True)
+        self.stats['wall'] = time.perf_counter() - self.start
+        return dict(self.stats)
+
+    def _now(self):
+        return time.perf_counter() - self.start
+
+    def _think(self, item):
+        item.marks['think_start'] = self._now()
+        with tracing.span('stage', stage='think', command=item.index):
+            try:
+                item.command = self.brain.think(item.text)
+            except Exception as e:
+                item.command = {'action': 'respond', 'params': {'message': f"An error occurred: {str(e)}"}}
+        item.marks['think_end'] = self._now()
+
+    def _execute(self, item):
+        item.marks['execute_start'] = self._now()
+        action = item.command.get('action', '')
+        params = item.command.get('params') or {}
+        with tracing.span('stage', stage='execute', command=item.index):
+            if action in ('respond', 'clarify'):
+                item.result = params.get('message', '')
+            else:
+                if action in JOB_ACTIONS:
+                    # The result is what gets logged, and later lines may need it
+                    params = dict(params, wait=True)
+                with self.locks.hold(action, params):
+                    item.result = self.executor.execute(action, params)
+        item.marks['execute_end'] = self._now()
+
+    def _write_ready(self, written, out, block=False):
+        """Write finished results from the front of the queue, keeping input order."""
+        while written and (block or written[0][1].done()):
+            item, execution = written.popleft()
+            try:
+                execution.result()
+            except Exception as e:
+                item.result = f"Error executing {item.command.get('action', '')}: {str(e)}"
+                item.marks.setdefault('execute_end', self._now())
+            out.write(json.dumps(self._record(item), default=str) + '\n')
+            out.flush()
+
+    def _record(self, item):
+        marks = item.marks
+
+        def ms(start, end):
+            return round((marks[end] - marks[start]) * 1000, 3)
+
+        ok = not str(item.result).startswith(FAILURE_PREFIXES)
+        think = marks['think_end'] - marks['think_start']
+        execute = marks['execute_end'] - marks['execute_start']
+        self.stats['commands'] += 1
+        self.stats['failed'] += 0 if ok else 1
+        self.stats['think_time'] += think
+        self.stats['execute_time'] += execute
+        return {
+            'index': item.index, 'line': item.line, 'text': item.text, 'independent': item.independent,
+            'command': item.command, 'result': item.result, 'ok': ok,
+            'timings': {
+                'think_queue_ms': ms('read', 'think_start'),
+                'think_ms': round(think * 1000, 3),
+                'execute_wait_ms': ms('think_end', 'execute_start'),
+                'execute_ms': round(execute * 1000, 3),
+                'done_at_ms': round(marks['execute_end'] * 1000, 3),
+            },
+        }
@@ -0,0 +1,104 @@
+"""
+Batch mode benchmark: wall time for a scripted run at several think
+concurrency limits, against a stub LLM with fixed latency.
+
+Every command goes to the (stub) LLM - the fast path and the response cache
+are off - so concurrency 1 is the old one-command-at-a-time text mode.
+Results are checked to come back in input order.
+
+Usage:
+    python benchmarks/batch.py
+    python benchmarks/batch.py --commands 300 --concurrency 1,8,32 --llm-latency 0.5
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch import BatchRunner, read_items
+from brain import Brain
+from executor import ActionExecutor
+from stubs import StubModel
+
+
+def script(count):
+    """A mix of chat, folder/file creation and independent screenshots."""
+    lines = []
+    for n in range(count):
+        kind = n % 5
+        if kind == 0:
+            lines.append(f"create a folder called batch{n}")
+        elif kind == 1:
+            lines.append(f"create a file called batch{n - 1}/notes.txt")
+        elif kind == 4:
+            lines.append(json.dumps({'text': f"take a screenshot called shot{n}.png", 'independent': True}))
+        else:
+            lines.append(f"tell me something about the number {n}")
+    return lines
+
+
+def responses(count):
+    replies = {}
+    for n in range(count):
+        if n % 5 == 0:
+            replies[f"create a folder called batch{n}"] = {'action': 'create_folder', 'params': {'path': f"batch{n}"}}
+        elif n % 5 == 1:
+            replies[f"create a file called batch{n - 1}/notes.txt"] = {
+                'action': 'create_file', 'params': {'path': f"batch{n - 1}/notes.txt", 'content': 'x'}}
+        elif n % 5 == 4:
+            replies[f"take a screenshot called shot{n}.png"] = {
+                'action': 'take_screenshot', 'params': {'filename': f"shot{n}.png"}}
+    return replies
+
+
+def run(args, concurrency):
+    workdir = tempfile.mkdtemp(prefix='batch-bench-')
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    out = io.StringIO()
+    try:
+        brain = Brain(model=StubModel(responses(args.commands), latency=args.llm_latency),
+                      fast_path=False, cache=False)
+        executor = ActionExecutor(screen_backend='fake')
+        runner = BatchRunner(brain, executor, concurrency=concurrency)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = runner.run(read_items(script(args.commands)), out)
+            executor.close()
+        failed_files = sum(1 for n in range(1, args.commands, 5) if not Path(f"batch{n - 1}/notes.txt").exists())
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    in_order = [r['index'] for r in records] == list(range(1, len(records) + 1))
+    return stats, in_order, failed_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch mode think concurrency')
+    parser.add_argument('--commands', type=int, default=100, help='Commands in the script')
+    parser.add_argument('--concurrency', default='1,4,8,16', help='Comma-separated limits to test')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Stub LLM seconds per call')
+    args = parser.parse_args()
+
+    print(f"{args.commands} commands, LLM {args.llm_latency * 1000:.0f} ms per call\n")
+    print(f"  {'concurrency':>11} {'wall s':>8} {'cmd/s':>7} {'speedup':>8} {'failed':>7} {'order':>6} {'files':>6}")
+    baseline = None
+    for concurrency in (int(n) for n in args.concurrency.split(',')):
+        stats, in_order, missing = run(args, concurrency)
+        baseline = baseline or stats['wall']
+        print(f"  {concurrency:>11} {stats['wall']:>8.2f} {stats['commands'] / stats['wall']:>7.1f} "
+              f"{baseline / stats['wall']:>7.1f}x {stats['failed']:>7} {'ok' if in_order else 'WRONG':>6} "
+              f"{'ok' if not missing else missing:>6}")
+
+
+if __name__ == "__main__":
+    main()
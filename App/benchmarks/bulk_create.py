@@ -0,0 +1,87 @@
+"""
+Bulk file creation benchmark: one create_file per path vs create_files.
+
+Strategies, each creating the same files in a fresh temporary folder:
+
+  create_file loop     one create_file action per path (mkdir + open/write/close
+                       each time), the way a plan of single creates works
+  create_files         one bulk action: directories made once, raw batched writes
+  create_files durable the bulk action plus a single flush to disk at the end
+  fsync per file       the create_file loop with an fsync after every file, the
+                       naive way to get the same durability
+
+Usage:
+    python benchmarks/bulk_create.py
+    python benchmarks/bulk_create.py --files 5000 --size 256 --folders 50
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import executor
+from executor import ActionExecutor
+
+
+def paths_for(root, files, folders):
+    return [str(root / f"folder{n % folders}" / f"file{n}.txt") for n in range(files)]
+
+
+def create_loop(agent, paths, content, fsync=False):
+    for path in paths:
+        agent.create_file({'path': path, 'content': content})
+        if fsync:
+            fd = os.open(path, os.O_RDWR)
+            os.fsync(fd)
+            os.close(fd)
+
+
+def timed(label, run, root, files):
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed * 1000:8.1f} ms   {files / elapsed:9.0f} files/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk file creation')
+    parser.add_argument('--files', type=int, default=2000, help='Files to create')
+    parser.add_argument('--size', type=int, default=64, help='Bytes of content per file')
+    parser.add_argument('--folders', type=int, default=20, help='Folders the files are spread over')
+    parser.add_argument('--fsync', action='store_true', help='Also time an fsync after every file (slow)')
+    args = parser.parse_args()
+
+    # Time the writes themselves, not the background-job handoff
+    executor.BULK_JOB_THRESHOLD = args.files + 1
+    agent = ActionExecutor()
+    content = 'x' * args.size
+    base = Path(tempfile.mkdtemp(prefix='bulk-bench-'))
+    root = base / 'out'
+    paths = paths_for(root, args.files, args.folders)
+    bulk = {'paths': paths, 'content': content}
+
+    print(f"Creating {args.files} files of {args.size} bytes in {args.folders} folders")
+    try:
+        loop = timed('create_file loop', lambda: create_loop(agent, paths, content), root, args.files)
+        fast = timed('create_files', lambda: agent.create_files(bulk), root, args.files)
+        timed('create_files durable', lambda: agent.create_files(dict(bulk, durable=True)), root, args.files)
+        if args.fsync:
+            timed('fsync per file', lambda: create_loop(agent, paths, content, fsync=True), root, args.files)
+        print(f"\n  create_files is {loop / fast:.1f}x faster than the create_file loop")
+    finally:
+        agent.close()
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
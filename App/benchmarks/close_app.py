@@ -0,0 +1,118 @@
+"""
+close_app benchmark: process-table snapshot vs spawning a tool per call.
+
+Starts a batch of throwaway sleeper processes and closes them two ways:
+
+  spawn-per-call   one kill/taskkill process per target, the way close_app
+                   used to work
+  process table    one snapshot + fuzzy match, then a single batched
+                   terminate with graceful-then-forced escalation (this
+                   also waits until every process has actually exited)
+
+It also times lookups alone (cold snapshot vs cached snapshot).
+
+Usage:
+    python benchmarks/close_app.py
+    python benchmarks/close_app.py --processes 20 --lookups 200
+"""
+
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from process_table import ProcessTable
+
+
+SLEEPER = [sys.executable, '-c', 'import time; time.sleep(300)', 'closeappbench']
+
+
+def start_sleepers(count):
+    procs = [subprocess.Popen(SLEEPER) for _ in range(count)]
+    time.sleep(0.5)  # Let them show up in the process table
+    return procs
+
+
+def reap(procs):
+    for proc in procs:
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def close_spawn_per_call(procs):
+    start = time.perf_counter()
+    for proc in procs:
+        if sys.platform == 'win32':
+            subprocess.run(['taskkill', '/F', '/PID', str(proc.pid)], capture_output=True)
+        else:
+            subprocess.run(['kill', str(proc.pid)], capture_output=True)
+    elapsed = time.perf_counter() - start
+    reap(procs)
+    return elapsed
+
+
+def close_process_table(procs, table):
+    targets = {proc.pid for proc in procs}
+    start = time.perf_counter()
+    matches = [p for p in table.snapshot(force=True) if p['pid'] in targets]
+    closed, survived = table.terminate(matches)
+    elapsed = time.perf_counter() - start
+    reap(procs)
+    return elapsed, len(closed), len(survived)
+
+
+def time_lookups(table, lookups):
+    names = ['python', 'notepad', 'chrome', 'calculator', 'terminal']
+
+    start = time.perf_counter()
+    table.snapshot(force=True)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(lookups):
+        table.find(names[i % len(names)])
+    cached = (time.perf_counter() - start) / lookups
+
+    if sys.platform == 'win32':
+        command = ['tasklist', '/FO', 'CSV', '/NH']
+    else:
+        command = ['ps', '-axo', 'pid=,comm=']
+    runs = max(1, lookups // 20)
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(command, capture_output=True)
+    spawn = (time.perf_counter() - start) / runs
+    return cold, cached, spawn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark close_app strategies')
+    parser.add_argument('--processes', type=int, default=10, help='Sleeper processes per run')
+    parser.add_argument('--lookups', type=int, default=100, help='Name lookups to time')
+    args = parser.parse_args()
+
+    table = ProcessTable()
+
+    cold, cached, spawn = time_lookups(table, args.lookups)
+    print("Lookup")
+    label = f"spawn {'tasklist' if sys.platform == 'win32' else 'ps'} per call"
+    print(f"  {label:<23} {spawn * 1000:8.2f} ms")
+    print(f"  cold snapshot           {cold * 1000:8.2f} ms")
+    print(f"  cached snapshot + match {cached * 1000:8.3f} ms")
+
+    print(f"\nClosing {args.processes} processes")
+    spawn_time = close_spawn_per_call(start_sleepers(args.processes))
+    print(f"  spawn-per-call          {spawn_time * 1000:8.1f} ms")
+    batch_time, closed, survived = close_process_table(start_sleepers(args.processes), table)
+    print(f"  process table (batch)   {batch_time * 1000:8.1f} ms  "
+          f"({closed} closed, {survived} survived)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+find_file benchmark: trigram file index vs walking the tree per lookup.
+
+Builds a synthetic tree in a temporary folder, then times:
+
+  full scan          first index build
+  restart refresh    reopening the persisted index with nothing changed
+  lookup             substring/fuzzy queries against the index
+  os.walk search     the same queries answered by walking the tree
+  change latency     create a file and poll until find() returns it
+                     (inotify on Linux, mtime refresh elsewhere)
+
+Usage:
+    python benchmarks/file_index.py
+    python benchmarks/file_index.py --files 100000 --dirs 2000
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from file_index import FileIndex
+
+WORDS = ['report', 'notes', 'budget', 'invoice', 'draft', 'photo', 'backup', 'summary',
+         'meeting', 'project', 'design', 'final', 'todo', 'letter', 'plan', 'data']
+EXTS = ['.txt', '.pdf', '.docx', '.xlsx', '.png', '.md', '.csv']
+
+
+def build_tree(root, files, dirs):
+    rng = random.Random(7)
+    folders = [root]
+    for n in range(dirs):
+        parent = rng.choice(folders)
+        folder = parent / f"{rng.choice(WORDS)}_{n}"
+        folder.mkdir()
+        folders.append(folder)
+    for n in range(files):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{n}{rng.choice(EXTS)}"
+        (rng.choice(folders) / name).touch()
+
+
+def walk_search(root, query):
+    query = query.lower()
+    return [os.path.join(d, name) for d, dirnames, filenames in os.walk(root)
+            for name in filenames + dirnames if query in name.lower()]
+
+
+def timed_queries(run, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, max(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the find_file index')
+    parser.add_argument('--files', type=int, default=20000, help='Files in the synthetic tree')
+    parser.add_argument('--dirs', type=int, default=500, help='Folders in the synthetic tree')
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix='file-index-bench-'))
+    root = base / 'tree'
+    root.mkdir()
+    db = base / 'index.sqlite3'
+    queries = ['budget_final', 'meeting notes', 'invoce', 'todo_plan_1', 'summary.pdf',
+               'photo_backup', 'design', 'letter_draft_42']
+    try:
+        print(f"Building a tree of {args.files} files in {args.dirs} folders...")
+        build_tree(root, args.files, args.dirs)
+
+        index = FileIndex(roots=[str(root)], path=db, watch=False)
+        start = time.perf_counter()
+        index.refresh()
+        print(f"  full scan            {(time.perf_counter() - start) * 1000:9.1f} ms  "
+              f"({len(index)} entries, {db.stat().st_size / 1024 / 1024:.1f} MB on disk)")
+        index.close()
+
+        index = FileIndex(roots=[str(root)], path=db)
+        start = time.perf_counter()
+        index.start().wait_ready()
+        print(f"  restart refresh      {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        median, worst = timed_queries(lambda q: index.find(q), queries)
+        print(f"  index lookup         {median:9.2f} ms median, {worst:.2f} ms worst")
+        median, worst = timed_queries(lambda q: walk_search(root, q), queries[:3])
+        print(f"  os.walk search       {median:9.2f} ms median, {worst:.2f} ms worst")
+
+        target = root / 'quarterly_forecast_unique.xlsx'
+        start = time.perf_counter()
+        target.touch()
+        while not index.find('quarterly forecast unique'):
+            if time.perf_counter() - start > 5:
+                break
+            time.sleep(0.001)
+        how = 'inotify' if index._inotify is not None else 'refresh'
+        print(f"  change latency       {(time.perf_counter() - start) * 1000:9.1f} ms ({how})")
+        index.close()
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+End-to-end latency benchmark: drives OSAgent in voice mode with a replayed
+command corpus and stub components for the model, recognizer and TTS engine.
+
+Every external call is replaced by a local stand-in with injected latency
+(stubs.StubModel, StubListener, StubEngine inside a real Speaker), so runs
+are repeatable and only the agent's own hot path varies. Reported stages:
+
+  recognize   listener.recognize()
+  think       Brain.think / think_stream, including parse
+  parse       local parsing inside think: fast path, cache lookup, JSON extraction
+  execute     OSAgent.process_command (the action itself)
+  speak       TTS engine time for the reply
+  e2e         end of the utterance -> end of the spoken reply
+
+Commands run in a temporary folder, so file actions leave nothing behind.
+With --speculate, think covers only the commands speculation didn't answer.
+
+Usage:
+    python benchmarks/latency.py
+    python benchmarks/latency.py --repeat 5 --serial
+    python benchmarks/latency.py --save-baseline benchmarks/baselines/latency.json
+    python benchmarks/latency.py --baseline benchmarks/baselines/latency.json
+    python benchmarks/latency.py --profile /tmp/agent-profile   # also write tracing spans
+    python benchmarks/latency.py --stt-per-word 0.05 --speculate
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from brain import Brain
+from executor import ActionExecutor
+from main import OSAgent
+from speech_engine import Speaker
+from stubs import StubModel, StubListener, StubEngine
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_CORPUS = HERE / 'corpus' / 'commands.json'
+STAGES = ['recognize', 'think', 'parse', 'execute', 'speak', 'e2e']
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class StageRecorder:
+    """Wraps agent components so every command's stage timings are recorded.
+
+    Each stage handles commands one at a time in input order (in serial and
+    pipelined mode alike), so the n-th call to a stage belongs to the n-th
+    command.
+    """
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.local = threading.local()
+
+    def wrap(self, owner, name, stage, skip=None):
+        original = getattr(owner, name)
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            if skip is not None and skip(*args, **kwargs):
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        setattr(owner, name, timed)
+
+    def wrap_think(self, brain, name):
+        original = getattr(brain, name)
+
+        def timed(*args, **kwargs):
+            self.local.parse = 0.0
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples['think'].append(time.perf_counter() - start)
+                self.samples['parse'].append(self.local.parse)
+        setattr(brain, name, timed)
+
+    def wrap_parse(self, owner, name):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.local.parse = getattr(self.local, 'parse', 0.0) + time.perf_counter() - start
+        setattr(owner, name, timed)
+
+
+def build_agent(args, corpus, commands):
+    responses = {entry['say']: entry['reply'] for entry in corpus if 'reply' in entry}
+    model = StubModel(responses, latency=args.llm_latency, chunk_size=16,
+                      chunk_delay=args.llm_chunk_delay)
+    brain = Brain(model=model, fast_path=not args.no_fast_path, cache=args.cache)
+    listener = StubListener(commands, utterance_time=args.utterance, recognize_latency=args.stt_latency,
+                            per_word=args.stt_per_word, pause=args.gap)
+    engine = StubEngine(per_word=args.tts_per_word, startup=args.tts_startup)
+    speaker = Speaker(engine_factory=lambda: engine)
+    agent = OSAgent(mode='voice', pipelined=not args.serial, stream=args.stream,
+                    speculate=args.speculate, profile=args.profile, brain=brain, executor=ActionExecutor(screen_backend='fake'),
+                    listener=listener, speaker=speaker)
+    if agent.speculator is not None:
+        agent.speculator.settle = args.settle
+    # Replayed commands arrive on a schedule, not in reaction to the reply;
+    # without this, every capture would barge in on the previous answer
+    if not args.barge_in:
+        listener.on_speech = None
+    engine.spoken.clear()  # Drop the startup greeting
+    return agent, listener, engine
+
+
+def run(args):
+    corpus = json.loads(Path(args.corpus).read_text(encoding='utf-8'))
+    commands = [entry['say'] for entry in corpus] * args.repeat
+
+    workdir = tempfile.mkdtemp(prefix='latency-bench-')
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    recorder = StageRecorder()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            agent, listener, engine = build_agent(args, corpus, commands)
+            recorder.wrap(listener, 'recognize', 'recognize',
+                          skip=lambda audio, *a, **k: getattr(audio, 'text', '') == 'exit')
+            recorder.wrap_think(agent.brain, 'think_stream' if args.stream else 'think')
+            recorder.wrap_parse(agent.brain, '_lookup')
+            recorder.wrap_parse(agent.brain, '_extract_json')
+            recorder.wrap(agent, 'process_command', 'execute')
+            if args.serial:
+                # The serial loop recognizes through listen(); route it via the wrapped methods
+                listener.listen = lambda *a, **k: listener.recognize(listener.capture())
+            started = time.perf_counter()
+            agent.run()
+            wall = time.perf_counter() - started
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    spoken = engine.spoken[:len(commands)]
+    recorder.samples['speak'] = [end - start for _, start, end in spoken]
+    recorder.samples['e2e'] = [end - captured for (_, _, end), captured in zip(spoken, listener.captured)]
+    missing = len(commands) - len(spoken)
+    if missing > 0:
+        print(f"Warning: {missing} replies were never spoken; e2e covers the first {len(spoken)} commands")
+    if agent.tracer is not None:
+        print(f"Trace written to {agent.tracer.trace_path}")
+    if agent.speculator is not None:
+        agent.brain.stats['speculation'] = agent.speculator.report()
+    return recorder.samples, wall, agent.brain.stats
+
+
+def summarize(samples):
+    summary = {}
+    for stage in STAGES:
+        values = samples.get(stage) or []
+        if values:
+            summary[stage] = {f"p{pct}": round(percentile(values, pct) * 1000, 3) for pct in PERCENTILES}
+            summary[stage]['n'] = len(values)
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n  {'stage':<10} {'n':>5} " + ' '.join(f"{'p' + str(p) + ' ms':>10}" for p in PERCENTILES))
+    for stage in STAGES:
+        if stage in summary:
+            row = summary[stage]
+            print(f"  {stage:<10} {row['n']:>5} " + ' '.join(f"{row[f'p{p}']:>10.1f}" for p in PERCENTILES))
+
+
+def compare(summary, baseline, tolerance, slack_ms):
+    """
+    Print current vs baseline and return the regressions found.
+
+    A percentile regresses when it is more than `tolerance` (relative) and
+    `slack_ms` (absolute) above the baseline, so tiny stages don't flap.
+    """
+    regressions = []
+    print(f"\n  {'stage':<10} " + ' '.join(f"{'p' + str(p):>18}" for p in PERCENTILES))
+    for stage in STAGES:
+        if stage not in summary or stage not in baseline:
+            continue
+        cells = []
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            now, before = summary[stage][key], baseline[stage][key]
+            change = (now - before) / before * 100 if before else 0.0
+            regressed = now > before * (1 + tolerance) and now - before > slack_ms
+            if regressed:
+                regressions.append(f"{stage} {key}: {before:.1f} -> {now:.1f} ms")
+            cells.append(f"{now:8.1f} ({change:+5.0f}%){'!' if regressed else ' '}")
+        print(f"  {stage:<10} " + ' '.join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end latency benchmark with stub services')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='JSON list of {"say", "reply"} entries')
+    parser.add_argument('--repeat', type=int, default=3, help='Times to replay the corpus')
+    parser.add_argument('--serial', action='store_true', help='Use the serial loop instead of the pipeline')
+    parser.add_argument('--stream', action='store_true', help='Stream LLM responses')
+    parser.add_argument('--cache', action='store_true', help='Enable the response cache (repeats then hit it)')
+    parser.add_argument('--no-fast-path', action='store_true', help='Send every command to the LLM')
+    parser.add_argument('--speculate', action='store_true',
+                        help='Parse partial transcripts early (use with --stt-per-word)')
+    parser.add_argument('--settle', type=float, default=0.25,
+                        help='Speculation: seconds a partial must stay newest before the LLM sees it')
+    parser.add_argument('--barge-in', action='store_true', help='Let each new utterance interrupt the reply')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='Seconds before the model answers')
+    parser.add_argument('--llm-chunk-delay', type=float, default=0.01, help='Seconds between streamed chunks')
+    parser.add_argument('--stt-latency', type=float, default=0.15, help='Seconds to recognize an utterance')
+    parser.add_argument('--stt-per-word', type=float, default=0.0, help='Extra recognition seconds per word')
+    parser.add_argument('--tts-per-word', type=float, default=0.02, help='Seconds per spoken word')
+    parser.add_argument('--tts-startup', type=float, default=0.02, help='Seconds before speech starts')
+    parser.add_argument('--utterance', type=float, default=0.0, help='Seconds the user speaks per command')
+    parser.add_argument('--gap', type=float, default=0.3, help='Seconds of silence between commands')
+    parser.add_argument('--profile', metavar='DIR', help='Enable tracing and write spans/metrics to DIR')
+    parser.add_argument('--baseline', help='Compare against this baseline JSON')
+    parser.add_argument('--save-baseline', help='Write this run as a baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed relative slowdown')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='Allowed absolute slowdown in ms')
+    args = parser.parse_args()
+
+    mode = 'serial' if args.serial else 'pipelined'
+    print(f"Replaying {args.corpus} x{args.repeat} ({mode}{', streaming' if args.stream else ''})")
+    samples, wall, stats = run(args)
+    summary = summarize(samples)
+    print_summary(summary)
+    print(f"\n  {wall:.2f} s wall, {stats['llm_calls']} LLM calls, "
+          f"{stats['fast_path_hits']} fast-path hits, {stats['cache_hits']} cache hits")
+    if 'speculation' in stats:
+        report = stats['speculation']
+        print(f"  speculation: {report['hits']}/{report['utterances']} hits ({report['hit_rate']:.0%}), "
+              f"{report['saved_ms_avg']:.0f} ms saved per hit, {report['speculations']} speculative thinks")
+
+    config = {key: value for key, value in vars(args).items()
+              if key not in ('baseline', 'save_baseline', 'tolerance', 'slack_ms', 'profile')}
+    config['corpus'] = Path(os.path.relpath(args.corpus, HERE.parent)).as_posix()
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps({'config': config, 'stages': summary}, indent=2) + '\n')
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        differing = {k: v for k, v in baseline.get('config', {}).items()
+                     if config.get(k) != v}
+        if differing:
+            print(f"\nNote: baseline was recorded with different settings: {differing}")
+        regressions = compare(summary, baseline['stages'], args.tolerance, args.slack_ms)
+        if regressions:
+            print("\nRegressions:\n  " + '\n  '.join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
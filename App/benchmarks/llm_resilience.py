@@ -0,0 +1,125 @@
+"""
+LLM resilience benchmark: Brain.think latency and outcomes against a local
+stub LLM server that injects latency spikes, errors, hangs and an outage.
+
+Policies compared:
+
+  raw        Brain(resilience=False): generate_content waits as long as it takes
+  retry      per-attempt deadline + jittered retries + circuit breaker
+  hedge      retry, plus a duplicate request once an attempt passes the p95
+
+Scenarios:
+
+  faults     every request may be slow, fail or hang (see --slow-rate etc.)
+  outage     the server is healthy, then down for the middle third of the
+             run, then healthy again
+
+For each pair it reports p50/p95/p99/max think latency, how commands were
+answered (LLM, degraded local fallback, error message) and how many requests
+reached the server (hedging's extra cost).
+
+Usage:
+    python benchmarks/llm_resilience.py
+    python benchmarks/llm_resilience.py --commands 400 --hang-rate 0.02 --scenario faults
+"""
+
+import io
+import sys
+import time
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from brain import Brain
+from llm_client import CircuitBreaker
+from stubs import StubLLMServer, RemoteStubModel
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def policy_options(name, args):
+    if name == 'raw':
+        return False
+    options = {'deadline': args.deadline, 'retries': args.retries, 'backoff': 0.05, 'max_backoff': 0.5,
+               'breaker': CircuitBreaker(failure_threshold=3, reset_timeout=args.reset_timeout), 'seed': 1}
+    if name == 'hedge':
+        options.update(hedge=True, hedge_samples=20)
+    return options
+
+
+def run(args, scenario, policy):
+    faults = scenario == 'faults'
+    server = StubLLMServer(latency=args.latency, jitter=args.latency / 4,
+                           slow_rate=args.slow_rate if faults else 0.0, slow_latency=args.slow_latency,
+                           error_rate=args.error_rate if faults else 0.0,
+                           hang_rate=args.hang_rate if faults else 0.0, hang_time=args.hang_time, seed=7).start()
+    brain = Brain(model=RemoteStubModel(server.url), cache=False, resilience=policy_options(policy, args))
+
+    commands = [f"tell me something interesting about the number {n}" for n in range(args.commands)]
+    latencies = []
+    outcomes = {'llm': 0, 'degraded': 0, 'error': 0}
+    lock = threading.Lock()
+    position = iter(range(len(commands)))
+
+    def client():
+        for n in position:
+            if scenario == 'outage':
+                server.down = len(commands) // 3 <= n < 2 * len(commands) // 3
+            start = time.perf_counter()
+            command = brain.think(commands[n])
+            elapsed = time.perf_counter() - start
+            message = command.get('params', {}).get('message', '')
+            kind = 'degraded' if command.get('degraded') else 'error' if message.startswith('An error') else 'llm'
+            with lock:
+                latencies.append(elapsed)
+                outcomes[kind] += 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+    server.stop()
+    return latencies, outcomes, server.requests, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LLM deadlines, retries, hedging and the breaker')
+    parser.add_argument('--scenario', choices=['faults', 'outage', 'both'], default='both')
+    parser.add_argument('--commands', type=int, default=200, help='Commands per run')
+    parser.add_argument('--clients', type=int, default=4, help='Concurrent callers')
+    parser.add_argument('--latency', type=float, default=0.05, help='Normal server seconds per request')
+    parser.add_argument('--slow-rate', type=float, default=0.05, help='Fraction of slow requests')
+    parser.add_argument('--slow-latency', type=float, default=1.0, help='Seconds for a slow request')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Fraction answered with HTTP 500')
+    parser.add_argument('--hang-rate', type=float, default=0.01, help='Fraction that hang')
+    parser.add_argument('--hang-time', type=float, default=5.0, help='Seconds a hung request takes')
+    parser.add_argument('--deadline', type=float, default=0.5, help='Per-attempt deadline')
+    parser.add_argument('--retries', type=int, default=2, help='Retries per call')
+    parser.add_argument('--reset-timeout', type=float, default=1.0, help='Seconds the breaker stays open')
+    args = parser.parse_args()
+
+    scenarios = ['faults', 'outage'] if args.scenario == 'both' else [args.scenario]
+    for scenario in scenarios:
+        print(f"\nScenario: {scenario} ({args.commands} commands, {args.clients} clients)")
+        print(f"  {'policy':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'llm':>5} {'degr.':>5} {'error':>5} {'requests':>8} {'wall s':>7}")
+        for policy in ('raw', 'retry', 'hedge'):
+            latencies, outcomes, requests, wall = run(args, scenario, policy)
+            print(f"  {policy:<7} {percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                  f"{percentile(latencies, 99) * 1000:>8.0f} {max(latencies) * 1000:>8.0f} "
+                  f"{outcomes['llm']:>5} {outcomes['degraded']:>5} {outcomes['error']:>5} {requests:>8} {wall:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+LLM router replay: cost and latency against accuracy on a labelled corpus.
+
+Replays benchmarks/corpus/router.json (commands labelled simple, multi or
+reasoning, each with the expected command) through Brain with simulated
+backends:
+
+  small   fast and cheap; right on simple commands, often wrong on the rest
+  large   slow and expensive; almost always right
+  local   free, served over HTTP by stubs.StubLLMServer; a bit slower than
+          small and weaker on anything but simple commands
+
+and compares always using one backend with the router over all three, and
+over the two hosted ones only (router-cloud). The fast path and the
+response cache are off so every command reaches a backend. Cost is the
+estimated prompt tokens times each backend's price per 1M tokens.
+
+Usage:
+    python benchmarks/llm_router.py
+    python benchmarks/llm_router.py --repeat 5 --large-latency 1.5
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tracing
+from brain import Brain
+from llm_router import LLMBackend, HTTPBackend
+from stubs import StubModel, StubLLMServer
+
+CORPUS = Path(__file__).resolve().parent / 'corpus' / 'router.json'
+WRONG = {'action': 'clarify', 'params': {'message': 'Could you rephrase that?'}}
+
+# Chance of a right answer per difficulty, and of an answer that isn't JSON
+SKILL = {
+    'small': ({'simple': 0.97, 'multi': 0.4, 'reasoning': 0.3}, 0.03),
+    'large': ({'simple': 0.99, 'multi': 0.97, 'reasoning': 0.95}, 0.0),
+    'local': ({'simple': 0.93, 'multi': 0.25, 'reasoning': 0.2}, 0.05),
+}
+
+
+class SimulatedModel(StubModel):
+    """A StubModel that gets each corpus command right with its skill's odds."""
+
+    def __init__(self, corpus, skill, malformed, latency, seed):
+        super().__init__(latency=latency)
+        self.cases = {case['say']: case for case in corpus}
+        self.skill = skill
+        self.malformed = malformed
+        self._random = random.Random(seed)
+
+    def render(self, user_input):
+        case = self.cases.get(user_input)
+        if case is None:
+            return super().render(user_input)
+        if self._random.random() < self.malformed:
+            return "Sure! I'll take care of that for you."
+        command = case['expect'] if self._random.random() < self.skill[case['difficulty']] else WRONG
+        return f"```json\n{json.dumps(command)}\n```"
+
+
+def correct(command, expected):
+    if command.get('action') != expected['action']:
+        return False
+    if expected['action'] == 'respond':
+        return True
+    return all(command.get('params', {}).get(key) == value for key, value in expected['params'].items())
+
+
+def backends(args, corpus, server):
+    """Fresh simulated backends (with empty statistics) for one run."""
+    small = LLMBackend(SimulatedModel(corpus, *SKILL['small'], args.small_latency, seed=1),
+                       name='small', cost=0.0375, capability=0.3, resilience=False)
+    large = LLMBackend(SimulatedModel(corpus, *SKILL['large'], args.large_latency, seed=2),
+                       name='large', cost=1.25, capability=1.0, resilience=False)
+    local = HTTPBackend(server.url, name='local', resilience=False)
+    return {'small': small, 'large': large, 'local': local}
+
+
+def run(args, corpus, policy):
+    server = StubLLMServer(latency=args.local_latency, jitter=args.local_latency / 5, seed=3)
+    server.model = SimulatedModel(corpus, *SKILL['local'], 0.0, seed=3)
+    server.start()
+    available = backends(args, corpus, server)
+    if policy == 'router':
+        chosen = list(available.values())
+    elif policy == 'router-cloud':
+        chosen = [available['small'], available['large']]
+    else:
+        chosen = [available[policy]]
+    brain = Brain(backends=chosen, fast_path=False, cache=False, router={'seed': 4})
+
+    latencies, right, cost, used = [], {}, 0.0, {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repeat):
+            for case in corpus:
+                start = time.perf_counter()
+                command = brain.think(case['say'])
+                latencies.append(time.perf_counter() - start)
+                ok = correct(command, case['expect'])
+                total, hits = right.get(case['difficulty'], (0, 0))
+                right[case['difficulty']] = (total + 1, hits + ok)
+    tokens = tracing.estimate_tokens(brain._build_prompt(corpus[0]['say']))
+    for backend in chosen:
+        requests = backend.totals['requests']
+        cost += requests * tokens * backend.cost / 1e6
+        used[backend.name] = requests
+    server.stop()
+    return latencies, right, cost, used
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a labelled corpus through single backends and the router')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the corpus')
+    parser.add_argument('--small-latency', type=float, default=0.08, help='Small model seconds per call')
+    parser.add_argument('--large-latency', type=float, default=0.6, help='Large model seconds per call')
+    parser.add_argument('--local-latency', type=float, default=0.15, help='Local model seconds per call')
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS.read_text())
+    print(f"{len(corpus)} commands x {args.repeat}, fast path and cache off\n")
+    print(f"  {'policy':<12} {'accuracy':>8} {'simple':>7} {'multi':>6} {'reason':>7} "
+          f"{'mean ms':>7} {'p50 ms':>7} {'p95 ms':>7} {'$ / 1k cmds':>11}  backends used")
+    for policy in ('small', 'large', 'local', 'router', 'router-cloud'):
+        latencies, right, cost, used = run(args, corpus, policy)
+        hits = sum(h for _, h in right.values())
+        total = sum(t for t, _ in right.values())
+        share = {kind: f"{right[kind][1] / right[kind][0]:.0%}" for kind in right}
+        print(f"  {policy:<12} {hits / total:>8.0%} {share['simple']:>7} {share['multi']:>6} "
+              f"{share['reasoning']:>7} {sum(latencies) / len(latencies) * 1000:>7.0f} "
+              f"{percentile(latencies, 50) * 1000:>7.0f} "
+              f"{percentile(latencies, 95) * 1000:>7.0f} {cost / total * 1000:>11.4f}  "
+              + ', '.join(f"{name} {count}" for name, count in used.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+take_screenshot benchmark: capture, encoding cost per format/level, and how
+long the agent thread is blocked with synchronous vs background encoding.
+
+Uses the real screen when a backend is available (mss or pyautogui) and the
+synthetic fake backend otherwise, e.g. on a headless machine; pass
+--backend fake --width 2560 --height 1440 to simulate a large display.
+
+Usage:
+    python benchmarks/screenshot.py
+    python benchmarks/screenshot.py --backend fake --width 3840 --height 2160 --shots 10
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from screen_capture import (BurstRecorder, CaptureUnavailable, FakeBackend, FrameEncoder,
+                            create_backend, encode)
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the screenshot pipeline')
+    parser.add_argument('--backend', default='auto', help='auto, mss, pyautogui or fake')
+    parser.add_argument('--width', type=int, default=1920, help='Fake backend width')
+    parser.add_argument('--height', type=int, default=1080, help='Fake backend height')
+    parser.add_argument('--shots', type=int, default=5, help='Screenshots per measurement')
+    args = parser.parse_args()
+
+    try:
+        if args.backend == 'fake':
+            raise CaptureUnavailable('fake requested')
+        backend = create_backend(args.backend)
+    except CaptureUnavailable:
+        backend = FakeBackend(args.width, args.height)
+    frame = backend.grab()
+    print(f"Backend {backend.name}, {frame.width}x{frame.height}")
+
+    grabs = []
+    for _ in range(args.shots):
+        start = time.perf_counter()
+        frame = backend.grab()
+        grabs.append(time.perf_counter() - start)
+    print(f"  capture               {median_ms(grabs):8.1f} ms")
+
+    print("\nEncoding")
+    for fmt, level in (('png', 1), ('png', 6), ('png', 9), ('jpeg', None)):
+        samples = []
+        size = 0
+        try:
+            for _ in range(args.shots):
+                start = time.perf_counter()
+                size = len(encode(frame, fmt, compress_level=level or 1))
+                samples.append(time.perf_counter() - start)
+        except ImportError:
+            print(f"  {fmt:<5}                 skipped (needs Pillow)")
+            continue
+        label = f"{fmt} level {level}" if level is not None else f"{fmt} quality 85"
+        print(f"  {label:<21} {median_ms(samples):8.1f} ms   {size / 1024:8.0f} KB")
+
+    folder = Path(tempfile.mkdtemp(prefix='screenshot-bench-'))
+    encoder = FrameEncoder()
+    try:
+        print("\nAgent thread blocked per screenshot")
+        blocked = []
+        for n in range(args.shots):
+            start = time.perf_counter()
+            shot = backend.grab()
+            (folder / f"sync{n}.png").write_bytes(encode(shot, 'png', compress_level=6))
+            blocked.append(time.perf_counter() - start)
+        print(f"  synchronous (level 6) {median_ms(blocked):8.1f} ms")
+
+        blocked = []
+        futures = []
+        for n in range(args.shots):
+            start = time.perf_counter()
+            shot = backend.grab()
+            futures.append(encoder.save(shot, folder / f"async{n}.png"))
+            blocked.append(time.perf_counter() - start)
+        for future in futures:
+            future.result()
+        print(f"  background encoder    {median_ms(blocked):8.1f} ms")
+    finally:
+        encoder.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print("\nBurst deduplication (fake screen that changes every 4th grab)")
+    burst = BurstRecorder(FakeBackend(320, 240, motion=4), capacity=10, interval=0.0)
+    hash_times = []
+    for _ in range(40):
+        shot = burst.backend.grab()
+        start = time.perf_counter()
+        burst.add(shot)
+        hash_times.append(time.perf_counter() - start)
+    stats = burst.stats
+    print(f"  {stats['captured']} captured, {stats['kept']} kept, {stats['duplicates']} dropped; "
+          f"hash + compare {median_ms(hash_times):.3f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Server mode load test: sustained commands/sec and latency against a local
+stub LLM, for increasing numbers of concurrent clients.
+
+Starts an in-process AgentServer with Brain(model=StubModel) and the fake
+screen backend in a temporary folder, then has every client send the
+command corpus (plus screenshots, which share the screen lock) over
+keep-alive HTTP connections. Each client uses several connections at once
+under one client id, so the run also checks that a client's commands finish
+in the order they were sent. A 503 (queue full) is counted and retried.
+
+Usage:
+    python benchmarks/server_load.py
+    python benchmarks/server_load.py --clients 1,8,32 --repeat 4 --workers 16
+    python benchmarks/server_load.py --unix
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from brain import Brain
+from executor import ActionExecutor
+from server import AgentServer
+from stubs import StubModel
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_CORPUS = HERE / 'corpus' / 'commands.json'
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix socket."""
+
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_level(args, commands, clients, workdir):
+    model = StubModel({entry['say']: entry['reply'] for entry in commands if 'reply' in entry},
+                      latency=args.llm_latency)
+    brain = Brain(model=model, cache=False)
+    executor = ActionExecutor(screen_backend='fake')
+    socket_path = os.path.join(workdir, 'agent.sock') if args.unix else None
+    server = AgentServer(brain, executor, port=0, socket_path=socket_path,
+                         workers=args.workers, queue_size=args.queue_size)
+    serving = threading.Thread(target=server.serve_forever, daemon=True)
+    serving.start()
+    host = '127.0.0.1'
+    port = None if args.unix else server.httpd.server_address[1]
+
+    latencies = []
+    responses = {}  # client -> [(id, completed)]
+    counts = {'ok': 0, 'rejected': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def connection_worker(client, texts):
+        conn = UnixHTTPConnection(socket_path) if args.unix else http.client.HTTPConnection(host, port)
+        for text in texts:
+            body = json.dumps({'text': text, 'client': client})
+            while True:
+                start = time.perf_counter()
+                conn.request('POST', '/command', body, {'Content-Type': 'application/json'})
+                reply = conn.getresponse()
+                data = json.loads(reply.read())
+                if reply.status != 503:
+                    break
+                with lock:
+                    counts['rejected'] += 1
+                time.sleep(0.05)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if reply.status == 200 and 'error' not in data:
+                    counts['ok'] += 1
+                    responses.setdefault(client, []).append((data['id'], data['completed']))
+                else:
+                    counts['errors'] += 1
+        conn.close()
+
+    texts = [entry['say'] for entry in commands] * args.repeat
+    threads = []
+    for c in range(clients):
+        for k in range(args.connections):
+            # Connections of one client interleave its commands
+            mine = texts[k::args.connections]
+            threads.append(threading.Thread(target=connection_worker, args=(f'client-{c}', mine)))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    stats = server.snapshot()
+    server.shutdown()
+    executor.close()
+
+    out_of_order = 0
+    for pairs in responses.values():
+        finished = [completed for _, completed in sorted(pairs)]
+        out_of_order += sum(1 for a, b in zip(finished, finished[1:]) if b < a)
+    return {
+        'clients': clients, 'commands': len(latencies), 'wall': wall,
+        'rate': counts['ok'] / wall, 'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99), 'rejected': counts['rejected'], 'errors': counts['errors'],
+        'out_of_order': out_of_order, 'queue_ms': stats['queue_ms_avg'], 'llm_calls': stats['brain']['llm_calls'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test server mode against a stub LLM')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='JSON list of {"say", "reply"} entries')
+    parser.add_argument('--clients', default='1,4,16,32', help='Comma-separated client counts to test')
+    parser.add_argument('--connections', type=int, default=2, help='Concurrent connections per client')
+    parser.add_argument('--repeat', type=int, default=2, help='Times each client sends the corpus')
+    parser.add_argument('--workers', type=int, default=8, help='Server worker threads')
+    parser.add_argument('--queue-size', type=int, default=64, help='Server queue bound')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='Stub LLM seconds per call')
+    parser.add_argument('--unix', action='store_true', help='Use a Unix socket instead of TCP')
+    args = parser.parse_args()
+
+    commands = json.loads(Path(args.corpus).read_text(encoding='utf-8'))
+    commands.append({'say': 'take a screenshot'})
+
+    workdir = tempfile.mkdtemp(prefix='server-load-')
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    print(f"{len(commands)} commands x{args.repeat} per client, {args.connections} connections each, "
+          f"{args.workers} workers, queue {args.queue_size}, LLM {args.llm_latency * 1000:.0f} ms\n")
+    print(f"  {'clients':>7} {'cmds':>6} {'cmd/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'queue ms':>9} {'503s':>5} {'errors':>6} {'order':>6}")
+    try:
+        for clients in (int(n) for n in args.clients.split(',')):
+            # Actions print progress; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                row = run_level(args, commands, clients, workdir)
+            order = 'ok' if not row['out_of_order'] else str(row['out_of_order'])
+            print(f"  {row['clients']:>7} {row['commands']:>6} {row['rate']:>7.1f} {row['p50'] * 1000:>8.0f} "
+                  f"{row['p95'] * 1000:>8.0f} {row['p99'] * 1000:>8.0f} {row['queue_ms']:>9.0f} "
+                  f"{row['rejected']:>5} {row['errors']:>6} {order:>6}")
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"\nLLM-bound ceiling: {args.workers} workers / {args.llm_latency:.2f} s = "
+          f"{args.workers / args.llm_latency:.1f} cmd/s; fast-path commands don't count against it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+run_command benchmark: a fresh shell per command vs one persistent session.
+
+Usage:
+    python benchmarks/shell_session.py
+    python benchmarks/shell_session.py --commands 200 --command "echo hello"
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shell_session import ShellSession, run_once
+
+
+def measure(run, command, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        run(command)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+    print(f"  {label:<20} median {statistics.median(samples) * 1000:7.2f} ms   "
+          f"p95 {p95 * 1000:7.2f} ms   total {sum(samples):6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-command shells with a persistent session')
+    parser.add_argument('--commands', type=int, default=100, help='Commands per strategy')
+    parser.add_argument('--command', default='echo hello', help='Command to run')
+    args = parser.parse_args()
+
+    print(f"Running '{args.command}' {args.commands} times")
+    report('spawn per command', measure(run_once, args.command, args.commands))
+
+    session = ShellSession()
+    session.run('true' if sys.platform != 'win32' else 'rem')  # Startup is paid once
+    try:
+        report('persistent session', measure(session.run, args.command, args.commands))
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
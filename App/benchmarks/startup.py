@@ -0,0 +1,113 @@
+"""
+Startup benchmark.
+
+Reports how long each agent module (and each heavy dependency) takes to
+import, and how long main.py takes to reach its first input prompt in each
+mode. Every measurement runs in a fresh interpreter so nothing is cached.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+AGENT_MODULES = ['brain', 'executor', 'speech_engine', 'main']
+HEAVY_MODULES = ['google.generativeai', 'pyautogui', 'speech_recognition', 'pyttsx3']
+
+# What main.py prints once it is waiting for input, per mode
+READY_MARKERS = {'text': 'You:', 'voice': 'Listening...'}
+
+
+def import_time(module):
+    """
+    Cumulative import time of a module in a fresh interpreter.
+
+    Returns:
+        float: Seconds, or None if the import failed
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return None
+
+    # Lines look like: "import time:   self [us] |  cumulative | module"
+    for line in reversed(proc.stderr.splitlines()):
+        match = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)$', line.rstrip())
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1e6
+    return None
+
+
+def time_to_first_prompt(mode, timeout=30.0):
+    """
+    Launch main.py and time how long until it asks for input.
+
+    Returns:
+        float: Seconds, or None if the prompt never appeared
+    """
+    env = dict(os.environ)
+    env.setdefault('GEMINI_API_KEY', 'benchmark-placeholder')  # Never used: no command is sent
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-u', 'main.py', '--mode', mode],
+        cwd=APP_DIR, env=env, stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    marker = READY_MARKERS[mode]
+    elapsed = None
+    output = ''
+    try:
+        while time.perf_counter() - start < timeout:
+            char = proc.stdout.read(1)
+            if not char:
+                break
+            output += char
+            if output.endswith(marker):
+                elapsed = time.perf_counter() - start
+                break
+    finally:
+        proc.kill()
+        proc.wait()
+    return elapsed
+
+
+def summarize(samples):
+    samples = [s for s in samples if s is not None]
+    if not samples:
+        return 'unavailable'
+    return f"{statistics.median(samples) * 1000:8.1f} ms (min {min(samples) * 1000:.1f})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure agent startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Repetitions per measurement')
+    parser.add_argument('--modes', nargs='+', default=['text', 'voice'], choices=list(READY_MARKERS))
+    args = parser.parse_args()
+
+    print("Import time (cumulative, median of runs)")
+    for module in AGENT_MODULES + HEAVY_MODULES:
+        samples = [import_time(module) for _ in range(args.runs)]
+        print(f"  {module:<22} {summarize(samples)}")
+
+    print("\nTime to first prompt")
+    for mode in args.modes:
+        samples = [time_to_first_prompt(mode) for _ in range(args.runs)]
+        print(f"  {mode:<22} {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    main()
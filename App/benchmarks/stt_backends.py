@@ -0,0 +1,112 @@
+"""
+Speech recognizer benchmark.
+
+Runs every WAV file in a corpus directory through each backend and reports
+per-utterance latency, time to first partial transcript, real-time factor
+(processing time / audio duration) and word accuracy against the .txt
+transcript next to each WAV.
+
+Usage:
+    python benchmarks/stt_backends.py --corpus path/to/wavs
+    python benchmarks/stt_backends.py --corpus path/to/wavs --backends file vosk google
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from speech_engine import (create_backend, load_wav, RecognitionUnclear,
+                           RecognitionUnavailable)
+
+
+def word_accuracy(expected, actual):
+    """Fraction of expected words recognized in position (a rough WER stand-in)."""
+    expected_words = expected.lower().split()
+    actual_words = actual.lower().split()
+    if not expected_words:
+        return 1.0 if not actual_words else 0.0
+    matches = sum(1 for a, b in zip(expected_words, actual_words) if a == b)
+    return matches / max(len(expected_words), len(actual_words))
+
+
+def run_backend(backend, corpus):
+    """
+    Recognize every utterance in the corpus.
+
+    Returns:
+        list: One dict of measurements per utterance
+    """
+    rows = []
+    for wav_path, audio, expected in corpus:
+        start = time.perf_counter()
+        first_partial = None
+        text = ''
+        error = None
+        try:
+            for text in backend.stream(audio):
+                if first_partial is None:
+                    first_partial = time.perf_counter() - start
+        except RecognitionUnclear:
+            error = 'unclear'
+        except RecognitionUnavailable as e:
+            error = f'unavailable: {e}'
+        latency = time.perf_counter() - start
+        rows.append({
+            'file': wav_path.name,
+            'latency': latency,
+            'first_partial': first_partial if first_partial is not None else latency,
+            'rtf': latency / audio.duration() if audio.duration() else 0.0,
+            'accuracy': word_accuracy(expected, text) if error is None else 0.0,
+            'error': error,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare speech recognizer backends')
+    parser.add_argument('--corpus', required=True, help='Directory of name.wav + name.txt pairs')
+    parser.add_argument('--backends', nargs='+', default=['file', 'vosk', 'google'])
+    parser.add_argument('--verbose', action='store_true', help='Print every utterance')
+    args = parser.parse_args()
+
+    corpus = []
+    for wav_path in sorted(Path(args.corpus).glob('*.wav')):
+        txt_path = wav_path.with_suffix('.txt')
+        expected = txt_path.read_text().strip() if txt_path.exists() else ''
+        corpus.append((wav_path, load_wav(wav_path), expected))
+    if not corpus:
+        print(f"No WAV files found in {args.corpus}")
+        sys.exit(1)
+    total_audio = sum(audio.duration() for _, audio, _ in corpus)
+    print(f"Corpus: {len(corpus)} utterances, {total_audio:.1f} s of audio\n")
+
+    print(f"{'backend':<10} {'median':>9} {'p95':>9} {'1st part':>9} {'RTF':>6} {'accuracy':>9} {'errors':>7}")
+    for name in args.backends:
+        options = {'corpus_dir': args.corpus} if name == 'file' else {}
+        try:
+            backend = create_backend(name, **options)
+        except Exception as e:
+            print(f"{name:<10} unavailable ({e})")
+            continue
+
+        rows = run_backend(backend, corpus)
+        latencies = sorted(row['latency'] for row in rows)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(f"{name:<10} "
+              f"{statistics.median(latencies) * 1000:7.1f}ms "
+              f"{p95 * 1000:7.1f}ms "
+              f"{statistics.median(row['first_partial'] for row in rows) * 1000:7.1f}ms "
+              f"{sum(row['latency'] for row in rows) / total_audio:6.3f} "
+              f"{statistics.mean(row['accuracy'] for row in rows):9.0%} "
+              f"{sum(1 for row in rows if row['error']):7d}")
+        if args.verbose:
+            for row in rows:
+                print(f"    {row['file']:<30} {row['latency'] * 1000:7.1f}ms  {row['error'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
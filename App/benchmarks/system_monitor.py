@@ -0,0 +1,94 @@
+"""
+System sampler overhead and get_system_info latency.
+
+Runs the background SystemSampler alone for a while at several intervals
+and measures the CPU time the whole process used meanwhile (the main
+thread only sleeps, so that is the sampler's cost), split into the cheap
+counter reads and the periodic per-process scans. Then times
+get_system_info answered from the ring against measuring on demand, which
+has to read the counters twice with a gap to get a CPU percentage.
+
+Usage:
+    python benchmarks/system_monitor.py
+    python benchmarks/system_monitor.py --seconds 20 --intervals 1 0.25
+"""
+
+import io
+import sys
+import time
+import argparse
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from executor import ActionExecutor
+from system_monitor import SystemSampler
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+def overhead(interval, seconds, top_every):
+    sampler = SystemSampler(interval=interval, top_every=top_every)
+    cpu, wall = time.process_time(), time.perf_counter()
+    sampler.start()
+    time.sleep(seconds)
+    sampler.stop()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return sampler, cpu, wall
+
+
+def on_demand(gap):
+    """What answering without a sampler costs: two readings `gap` seconds apart."""
+    sampler = SystemSampler()
+    sampler.sample(scan=True)
+    time.sleep(gap)
+    sampler.sample(scan=True)
+    return sampler.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the system sampler CPU cost and get_system_info latency')
+    parser.add_argument('--seconds', type=float, default=10.0, help='Seconds to run each interval')
+    parser.add_argument('--intervals', type=float, nargs='+', default=[1.0, 0.5, 0.1], help='Sampling intervals')
+    parser.add_argument('--top-every', type=int, default=5, help='Process scan every this many samples')
+    parser.add_argument('--queries', type=int, default=200, help='get_system_info calls to time')
+    parser.add_argument('--gap', type=float, default=0.5, help='Seconds between on-demand readings')
+    args = parser.parse_args()
+
+    sampler = SystemSampler()
+    print(f"source: {sampler.source}, ring: {sampler.ring.size} samples x {sampler.ring.width} fields "
+          f"= {sampler.ring.nbytes() / 1024:.1f} KB\n")
+    print(f"  {'interval':>8} {'samples':>7} {'scans':>5} {'cpu %':>7} {'us/sample':>9} {'us/scan':>8}")
+    for interval in args.intervals:
+        sampler, cpu, wall = overhead(interval, args.seconds, args.top_every)
+        stats = sampler.stats
+        print(f"  {interval:>7.2f}s {stats['samples']:>7} {stats['scans']:>5} {cpu / wall * 100:>7.3f} "
+              f"{stats['sample_time'] / max(stats['samples'], 1) * 1e6:>9.0f} "
+              f"{stats['scan_time'] / max(stats['scans'], 1) * 1e6:>8.0f}")
+
+    executor = ActionExecutor()
+    executor.prewarm()
+    executor.system_sampler.wait_ready(2)
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            executor.execute('get_system_info', {})
+            latencies.append(time.perf_counter() - start)
+    demand = []
+    for _ in range(3):
+        start = time.perf_counter()
+        on_demand(args.gap)
+        demand.append(time.perf_counter() - start)
+    executor.close()
+    print(f"\n  get_system_info from the ring: p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"  measured on demand ({args.gap}s gap): p50 {percentile(demand, 50) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,372 @@
 import os
+import re
 import json
-import google.generativeai as genai
+import time
+import threading
 from pathlib import Path
+import tracing
+from actions import REGISTRY, InvalidCommand
+from llm_client import CircuitOpen, LLMUnavailable
+from llm_router import LLMBackend, LLMRouter, create_backend
+from response_cache import ResponseCache, fingerprint
+
+
+class IntentParser:
+    """Deterministic local matcher for common commands.
+
+    Handles the everyday phrasings ("open notepad", "take a screenshot")
+    without an LLM round-trip. Each pattern carries a base confidence; the
+    Brain only trusts a match at or above its threshold.
+    """
+
+    # Words that carry no intent and are stripped before matching
+    FILLER = r'(?:(?:please|hey|ok|okay|can you|could you|would you|will you|kindly|just|now)\s+)*'
+    # Politeness after the command ("close chrome please"); lazy captures leave it to this group
+    TAIL = r'(?P<tail>(?:\s+(?:please|now|for me|thanks|thank you))+)?'
+    NAMED = r'(?:(?:called|named|titled)\s+)?'
+    # "day1 through day30 in notes" -> stem, start, end, extension, folder
+    RANGE = (r'(?P<stem>[\w-]*?)(?P<start>\d+)(?P<ext>\.\w+)?\s+(?:through|thru|to|until)\s+(?P=stem)?(?P<end>\d+)(?P=ext)?'
+             r'(?:\s+(?:in|inside|under)\s+(?:the\s+)?(?:folder\s+|directory\s+)?(?P<folder>\S+))?')
+    # Bare domains need a common TLD, so "open main.py" or "open notepad.exe" isn't a website;
+    # TLDs that double as file extensions (.py, .md, .sh, .rs, .pl) need www. or a scheme
+    TLDS = (r'com|org|net|edu|gov|io|dev|ai|app|co|uk|us|ca|de|fr|es|it|nl|eu|in|jp|au|ch|se|no|'
+            r'me|tv|info|biz|xyz|tech|online|site|news|blog|cloud|gg|ly')
+    URL = (r'(?P<url>(?:https?://|www\.)[\w-]+(?:\.[\w-]+)+(?:/\S*)?'
+           r'|[\w-]+(?:\.[\w-]+)*\.(?:' + TLDS + r')(?:/\S*)?)')
+    # Words that say which app only in context ("kill all", "close it")
+    VAGUE_APPS = {'all', 'everything', 'it', 'this', 'that', 'them', 'everyone'}
+    # App names with an extension that isn't a program are files
+    PROGRAM_EXTENSIONS = ('.exe', '.app', '.lnk', '.appimage')
+
+    def __init__(self):
+        # (action, compiled pattern, params builder, base confidence)
+        # Order matters: more specific patterns come first.
+        self.patterns = [
+            ('open_url',
+             r'(?:open|go to|visit|browse to|navigate to)\s+(?:the\s+)?(?:website\s+|site\s+|url\s+)?' + self.URL,
+             lambda m: {'url': self._normalize_url(m.group('url'))}, 0.95),
+            ('take_screenshot',
+             r'(?:take|capture|grab|save|make)\s+(?:a\s+|an\s+)?(?:screenshot|screen shot|screen capture)'
+             r'(?:\s+(?:and save it\s+)?(?:as\s+|to\s+)?' + self.NAMED + r'(?P<filename>\S+\.(?:png|jpg|jpeg|bmp)))?',
+             lambda m: {'filename': m.group('filename') or 'screenshot.png'}, 0.95),
+            ('take_screenshot',
+             r'(?:take|capture|grab)\s+(?:a\s+)?(?:screenshot|screen shot)\s+of\s+(?:the\s+)?(?P<window>[\w .-]+?)\s+window',
+             lambda m: {'filename': 'screenshot.png', 'window': m.group('window')}, 0.9),
+            ('take_screenshot',
+             r'screenshot(?:\s+please)?',
+             lambda m: {'filename': 'screenshot.png'}, 0.9),
+            ('start_burst',
+             r'(?:start|begin)\s+(?:a\s+)?(?:burst|screen recording|recording the screen)(?:\s+(?:mode|capture|screenshots))?',
+             lambda m: {}, 0.95),
+            ('save_burst',
+             r'(?:save|stop)\s+(?:the\s+)?burst(?:\s+(?:capture|screenshots|frames))?(?:\s+(?:to|in|into)\s+' + self.NAMED + r'(?P<folder>\S+))?',
+             lambda m: {'folder': m.group('folder')} if m.group('folder') else {}, 0.95),
+            ('get_system_info',
+             r'(?:(?:show|get|give|tell)\s+(?:me\s+)?(?:the\s+|my\s+)?|what(?:\'s| is)\s+(?:my\s+|the\s+)?)?'
+             r'(?:system|computer|machine|os)\s+(?:info|information|details|specs)',
+             lambda m: {}, 0.95),
+            ('run_command',
+             r'(?:run|execute)\s+(?:the\s+)?(?:shell\s+|terminal\s+)?command\s+(?P<command>.+)',
+             lambda m: {'command': m.group('command').strip('"\''), 'confirmed': False}, 0.95),
+            ('cancel_job',
+             r'(?:cancel|stop|abort)\s+(?:the\s+)?(?:background\s+)?job\s+(?:number\s+)?#?(?P<job_id>\d+)',
+             lambda m: {'job_id': m.group('job_id')}, 0.95),
+            ('cancel_job',
+             r'(?:cancel|stop|abort)\s+(?:all\s+)?(?:my\s+|the\s+)?(?:background\s+)?jobs',
+             lambda m: {'job_id': 'all'}, 0.95),
+            ('job_status',
+             r'(?:(?:what(?:\'s| is)\s+)?(?:the\s+)?status\s+of\s+(?:my\s+|the\s+)?(?:background\s+)?jobs?'
+             r'|(?:show|list|check)\s+(?:my\s+|the\s+)?(?:background\s+)?jobs'
+             r'|(?:background\s+)?jobs?\s+status|how are my jobs(?:\s+doing)?)'
+             r'(?:\s+(?:for\s+|of\s+)?job\s+(?:number\s+)?#?(?P<job_id>\d+))?',
+             lambda m: {'job_id': m.group('job_id')} if m.group('job_id') else {}, 0.95),
+            ('copy_path',
+             r'copy\s+(?:the\s+)?(?:file\s+|folder\s+|directory\s+)?(?P<source>\S+)\s+(?:to|into)\s+(?P<destination>\S+)',
+             lambda m: {'source': m.group('source').strip('"\''),
+                        'destination': m.group('destination').strip('"\'')}, 0.9),
+            ('create_files',
+             r'(?:create|make|add)\s+(?:the\s+)?files\s+' + self.RANGE,
+             self._range_params, 0.95),
+            ('create_folders',
+             r'(?:create|make|add)\s+(?:the\s+)?(?:folders|directories)\s+' + self.RANGE,
+             self._range_params, 0.95),
+            ('find_file',
+             r'(?:find|locate|where(?:\'s| is))\s+(?:the\s+|my\s+)?(?P<kind>file|folder|directory|document)\s+' + self.NAMED + r'(?P<name>.+)',
+             lambda m: {'name': m.group('name').strip('"\''),
+                        'kind': 'file' if m.group('kind') in ('file', 'document') else 'folder'}, 0.95),
+            ('find_file',
+             r'(?:find|locate|where(?:\'s| is))\s+(?:the\s+|my\s+)?(?P<name>[^\s/]+\.\w{1,5})',
+             lambda m: {'name': m.group('name').strip('"\''), 'kind': 'file'}, 0.95),
+            ('delete_folder',
+             r'(?:delete|remove|erase)\s+(?:the\s+)?(?:folder|directory|dir)\s+' + self.NAMED + r'(?P<path>.+)',
+             lambda m: {'path': m.group('path').strip('"\''), 'confirmed': False}, 0.95),
+            ('delete_file',
+             r'(?:delete|remove|erase)\s+(?:the\s+)?file\s+' + self.NAMED + r'(?P<path>.+)',
+             lambda m: {'path': m.group('path').strip('"\''), 'confirmed': False}, 0.95),
+            ('create_folder',
+             r'(?:create|make|add)\s+(?:a\s+|an\s+)?(?:new\s+)?(?:folder|directory|dir)\s+' + self.NAMED + r'(?P<path>\S+)',
+             lambda m: {'path': m.group('path').strip('"\'')}, 0.95),
+            ('create_file',
+             r'(?:create|make|add)\s+(?:a\s+|an\s+)?(?:new\s+)?(?:\w+\s+)?file\s+' + self.NAMED + r'(?P<path>\S+)'
+             r'(?:\s+(?:with|containing)\s+(?:the\s+)?(?:content|text)?\s*(?P<content>.+))?',
+             lambda m: {'path': m.group('path').strip('"\''),
+                        'content': (m.group('content') or '').strip('"\'')}, 0.9),
+            ('search_web',
+             r'(?:search|google|look up|lookup)\s+(?:the web\s+|google\s+|online\s+)?(?:for\s+)?(?P<query>.+)',
+             lambda m: {'query': m.group('query')}, 0.9),
+            ('close_app',
+             r'(?:close|quit|kill|terminate|shut down|exit)\s+(?:the\s+)?(?:app\s+|application\s+|program\s+)?(?P<app>[\w .+-]+?)(?:\s+(?:app|application|window))?',
+             lambda m: {'app_name': m.group('app')}, 0.9),
+            ('open_app',
+             r'(?:open|launch|start|fire up)\s+(?:the\s+|up\s+)?(?:app\s+|application\s+|program\s+)?(?P<app>[\w .+-]+?)(?:\s+(?:app|application))?',
+             lambda m: {'app_name': m.group('app')}, 0.9),
+            ('show_more',
+             r'(?:(?:show|give me|read|display)\s+(?:me\s+)?(?:the\s+)?(?:more|next page|rest)|(?:the\s+)?next page)'
+             r'(?:\s+(?:of the\s+)?output)?|(?:more|the rest of the)\s+output',
+             lambda m: {}, 0.95),
+            ('show_more',
+             r'(?:more|rest|the rest|continue)',  # Could as well be chat; only trusted when the LLM is down
+             lambda m: {}, 0.7),
+            ('respond',
+             r'(?:hi|hello|hey|hey there|hello there|good (?:morning|afternoon|evening))',
+             lambda m: {'message': 'Hello! How can I help you control your system today?'}, 0.95),
+            ('respond',
+             r'(?:thanks|thank you|thanks a lot|thank you very much)',
+             lambda m: {'message': "You're welcome!"}, 0.95),
+        ]
+        self.patterns = [
+            (action, re.compile(r'^' + self.FILLER + r'(?:' + pattern + r')' + self.TAIL + r'$', re.IGNORECASE),
+             build, confidence)
+            for action, pattern, build, confidence in self.patterns
+        ]
+
+    def parse(self, user_input):
+        """
+        Match user input against the local patterns.
+
+        Args:
+            user_input (str): User's command
+
+        Returns:
+            dict: Command with 'action', 'params' and 'confidence' keys,
+                  or None if nothing matched
+        """
+        text = re.sub(r'\s+', ' ', user_input).strip().rstrip('.!?')
+        if not text:
+            return None
+
+        for action, pattern, build, confidence in self.patterns:
+            match = pattern.match(text)
+            if match:
+                params = build(match)
+                penalty = self._param_penalty(action, params, polite=bool(match.group('tail')))
+                return {
+                    "action": action,
+                    "params": params,
+                    "confidence": round(confidence * penalty, 3),
+                }
+        return None
+
+    def _param_penalty(self, action, params, polite=False):
+        """Scale confidence down when the captured parameters look off."""
+        if action in ('open_app', 'close_app'):
+            # App names are short; long captures are probably sentences
+            name = params['app_name'].lower()
+            words = name.split()
+            if len(words) > 3 or set(words) & {'file', 'folder', 'directory', 'website', 'my'}:
+                return 0.5
+            if set(words) & self.VAGUE_APPS:
+                return 0.5
+            if re.search(r'\.\w{1,4}$', name) and not name.endswith(self.PROGRAM_EXTENSIONS):
+                return 0.5  # "open report.txt" - a file, not an app
+            # "close the door please" reads like conversation; let the LLM decide
+            penalty = 0.9 if polite else 1.0
+            return penalty * (0.95 if len(words) > 1 else 1.0)
+        elif action == 'create_file' and '.' not in params['path']:
+            # "create a file for my notes" - the LLM does better here
+            return 0.8
+        return 1.0
+
+    def _range_params(self, match):
+        """Params for "create files day1 through day30 in notes"."""
+        pattern = f"{match.group('stem')}{{{match.group('start')}..{match.group('end')}}}{match.group('ext') or ''}"
+        params = {'pattern': pattern}
+        if match.group('folder'):
+            params['folder'] = match.group('folder').strip('"\'')
+        return params
+
+    def _normalize_url(self, url):
+        """Add a scheme to bare domains."""
+        if not url.lower().startswith(('http://', 'https://')):
+            return 'https://' + url
+        return url
+
+
+class StreamingJSONParser:
+    """Incrementally finds the first complete JSON object in a text stream.
+
+    Anything before the opening brace (prose, a ```json fence) is skipped,
+    and braces inside string literals are ignored, so the object can be
+    parsed the moment its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.text = ''      # Everything received so far
+        self.start = -1     # Index of the opening brace
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.pos = 0        # Next character to scan
+        self.done = False
+
+    def feed(self, chunk):
+        """
+        Add a chunk of model output.
+        
+        Args:
+            chunk (str): Next piece of the response
+            
+        Returns:
+            dict: The parsed object the first time it completes, else None
+        """
+        self.text += chunk
+        if self.done:
+            return None
+        
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.start < 0:
+                if ch == '{':
+                    self.start = i
+                    self.depth = 1
+                continue
+            
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.pos = i + 1
+                    self.done = True
+                    try:
+                        return json.loads(text[self.start:i + 1])
+                    except json.JSONDecodeError:
+                        # Not JSON after all (e.g. braces in prose); look further
+                        self.done = False
+                        self.start = -1
+                        continue
+        self.pos = len(text)
+        return None
 
 
 class Brain:
     """Handles LLM-based intent parsing and command generation."""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, fast_path=True, fast_path_threshold=0.85, cache=True,
+                 model=None, resilience=True, degraded_threshold=0.5, backends=None, router=None,
+                 failover=1):
         """
         Initialize the Brain with LLM configuration.
         
         Args:
             api_key (str): Gemini API key. If None, reads from .env file
+            fast_path (bool): Try the local IntentParser before the LLM
+            fast_path_threshold (float): Minimum confidence to accept a local match
+            cache (bool|ResponseCache): Cache LLM responses; pass an instance
+                to control its location and size
+            model (object): Use this instead of Gemini (e.g. stubs.StubModel).
+                No API key is needed in that case.
+            resilience (bool|dict): Wrap the model in a ResilientModel
+                (deadlines, retries, circuit breaker); a dict is passed to it
+                as options. False calls the model directly.
+            degraded_threshold (float): While the LLM is unavailable, accept
+                local matches down to this confidence instead of failing
+            backends (list): Models to route between instead of the single
+                Gemini model: LLMBackends or specs like
+                'gemini:gemini-1.5-flash-8b' or 'http:<url>' (see llm_router)
+            router (dict): LLMRouter options (latency budget, health limits)
+            failover (int): Other backends to try when the chosen one is
+                unavailable, before falling back to local answers
         """
-        # Get API key
-        if api_key is None:
-            api_key = self._load_api_key()
-        
-        if not api_key or api_key == "your_api_key_here":
-            raise ValueError(
-                "Gemini API key not found! Please:\n"
-                "1. Copy .env.example to .env\n"
-                "2. Add your Gemini API key to .env\n"
-                "Get your key at: https://makersuite.google.com/app/apikey"
-            )
-        
-        # Configure Gemini
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        
-        # System prompt defines the agent's capabilities
-        self.system_prompt = """You are an OS control agent. Your job is to convert user commands into structured actions.
-
-Available Actions:
-1. open_app - Open an application
-   Params: {"app_name": "application name"}
-   
-2. close_app - Close an application
-   Params: {"app_name": "application name"}
-   
-3. create_file - Create a new file
-   Params: {"path": "file path", "content": "file content (optional)"}
-   
-4. create_folder - Create a new folder
-   Params: {"path": "folder path"}
-   
-5. delete_file - Delete a file (requires confirmation)
-   Params: {"path": "file path", "confirmed": false}
-   
-6. delete_folder - Delete a folder (requires confirmation)
-   Params: {"path": "folder path", "confirmed": false}
-   
-7. search_web - Search on Google
-   Params: {"query": "search query"}
-   
-8. open_url - Open a URL
-   Params: {"url": "web address"}
-   
-9. run_command - Run a shell command (requires confirmation)
-   Params: {"command": "shell command", "confirmed": false}
-   
-10. get_system_info - Get system information
-    Params: {}
-    
-11. take_screenshot - Take a screenshot
-    Params: {"filename": "screenshot.png"}
-
-IMPORTANT RULES:
-- Respond ONLY with valid JSON
-- JSON format: {"action": "action_name", "params": {...}}
-- For unclear commands, use: {"action": "clarify", "params": {"message": "clarification question"}}
-- For greetings/chat, use: {"action": "respond", "params": {"message": "your response"}}
-
-Examples:
-User: "Open notepad"
-Response: {"action": "open_app", "params": {"app_name": "notepad"}}
-
-User: "Search for Python tutorials"
-Response: {"action": "search_web", "params": {"query": "Python tutorials"}}
+        # The models (and google.generativeai itself) are only loaded on the
+        # first command that actually needs them - see LLMBackend.model
+        self.resilience = resilience
+        self.degraded_threshold = degraded_threshold
+        self.failover = failover
+        
+        if backends:
+            backends = [self._backend(spec, api_key) if isinstance(spec, str) else spec for spec in backends]
+        elif model is not None:
+            backends = [LLMBackend(model, name=type(model).__name__, resilience=resilience)]
+        else:
+            backends = [self._backend('gemini:gemini-pro', api_key)]
+        self.router = LLMRouter(backends, **(router or {}))
+        self.model_name = '+'.join(backend.name for backend in backends)
+        
+        # Local fast path for common commands
+        self.intent_parser = IntentParser() if fast_path else None
+        self.fast_path_threshold = fast_path_threshold
+        self.stats = {
+            'requests': 0, 'fast_path_hits': 0, 'cache_hits': 0, 'llm_calls': 0, 'degraded': 0,
+            'streams': 0, 'stream_first_action_time': 0.0, 'stream_total_time': 0.0,
+        }
+        # Latency of the most recent think_stream() call, in seconds
+        self.last_timing = {'first_action': 0.0, 'total': 0.0}
+        
+        # System prompt defines the agent's capabilities: one line per registered action
+        self.system_prompt = REGISTRY.prompt()
+        
+        # Response cache, keyed on the prompt and model so edits invalidate it
+        if cache is True:
+            cache = ResponseCache(namespace=fingerprint(self.system_prompt, self.model_name))
+        self.cache = cache if cache is not False else None
 
-User: "Create a file called test.txt"
-Response: {"action": "create_file", "params": {"path": "test.txt", "content": ""}}
+    @property
+    def model(self):
+        """The first backend's model, configured on first use."""
+        return self.router.backends[0].model
 
-User: "Hello"
-Response: {"action": "respond", "params": {"message": "Hello! How can I help you control your system today?"}}
+    def _backend(self, spec, api_key):
+        """Build a backend from a spec, with this Brain's resilience settings."""
+        if spec.startswith('gemini'):
+            api_key = api_key or self._load_api_key()
+            if not api_key or api_key == "your_api_key_here":
+                raise ValueError(
+                    "Gemini API key not found! Please:\n"
+                    "1. Copy .env.example to .env\n"
+                    "2. Add your Gemini API key to .env\n"
+                    "Get your key at: https://makersuite.google.com/app/apikey"
+                )
+        return create_backend(spec, api_key=api_key, resilience=self.resilience)
 
-Now convert the user's command:
-"""
+    def prewarm(self):
+        """
+        Load the models on a background thread so the first LLM-bound
+        command doesn't pay for the import and setup.
+        
+        Returns:
+            threading.Thread: The started pre-warm thread
+        """
+        def warm():
+            try:
+                for backend in self.router.backends:
+                    backend.model
+            except Exception as e:
+                print(f"Brain pre-warm failed: {e}")
+        
+        thread = threading.Thread(target=warm, name='brain-prewarm', daemon=True)
+        thread.start()
+        return thread
 
     def _load_api_key(self):
         """Load API key from .env file."""
@@ -113,39 +392,298 @@ Now convert the user's command:
         Returns:
             dict: Structured command with 'action' and 'params' keys
         """
+        with tracing.span('think'):
+            return self._think(user_input)
+
+    def _think(self, user_input):
+        command = self._lookup(user_input)
+        if command is not None:
+            return command
+        
+        self.stats['llm_calls'] += 1
+        response_text = ''
+        request = None
         try:
-            # Create full prompt
-            full_prompt = self.system_prompt + f'\nUser: "{user_input}"'
-            
             # Generate response
-            response = self.model.generate_content(full_prompt)
-            response_text = response.text.strip()
+            with tracing.span('llm', stream=False) as span:
+                request = self._generate(user_input)
+                response_text = request[1].text.strip()
+                self._trace_response(span, response_text)
             
-            # Extract JSON (handle markdown code blocks)
-            if '```json' in response_text:
-                json_str = response_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in response_text:
-                json_str = response_text.split('```')[1].split('```')[0].strip()
-            else:
-                json_str = response_text
+            # Parse JSON and check it against the declared actions
+            command, valid = self._check(json.loads(self._extract_json(response_text)))
+            self._record(request, 'ok' if valid else 'parse_failure')
             
-            # Parse JSON
-            command = json.loads(json_str)
+            # Error fallbacks and rejected commands never reach the cache
+            if valid and self.cache is not None:
+                self.cache.put(user_input, command)
             
             return command
             
         except json.JSONDecodeError as e:
             print(f"Failed to parse LLM response: {response_text}")
-            return {
-                "action": "respond",
-                "params": {"message": "I'm having trouble understanding that command. Could you rephrase?"}
-            }
+            tracing.count('agent_llm_parse_failures_total')
+            self._record(request, 'parse_failure')
+            return self._parse_failure()
+        except LLMUnavailable as e:
+            print(f"LLM unavailable: {e}")
+            return self._degraded(user_input)
         except Exception as e:
             print(f"Error in thinking: {e}")
-            return {
-                "action": "respond",
-                "params": {"message": f"An error occurred: {str(e)}"}
-            }
+            tracing.count('agent_llm_errors_total')
+            self._record(request, 'error')
+            return self._error_response(e)
+
+    def think_stream(self, user_input, on_command=None):
+        """
+        Like think(), but consumes the model's response as a stream and
+        dispatches the command as soon as its JSON object closes.
+        
+        Args:
+            user_input (str): User's command
+            on_command (callable): Called exactly once with the command, as
+                early as possible - before any trailing text is received
+            
+        Returns:
+            dict: Structured command with 'action' and 'params' keys
+        """
+        with tracing.span('think', stream=True):
+            return self._think_stream(user_input, on_command)
+
+    def _think_stream(self, user_input, on_command):
+        start = time.perf_counter()
+        dispatched = []
+        
+        def dispatch(command):
+            self.last_timing['first_action'] = time.perf_counter() - start
+            dispatched.append(command)
+            if on_command is not None:
+                on_command(command)
+        
+        command = self._lookup(user_input)
+        if command is not None:
+            dispatch(command)
+            self.last_timing['total'] = time.perf_counter() - start
+            return command
+        
+        self.stats['llm_calls'] += 1
+        self.stats['streams'] += 1
+        parser = StreamingJSONParser()
+        request = None
+        valid = False
+        try:
+            with tracing.span('llm', stream=True) as span:
+                request = self._generate(user_input, stream=True)
+                for chunk in request[1]:
+                    command = parser.feed(chunk.text)
+                    if command is not None and not dispatched:
+                        span.set(first_action_ms=round((time.perf_counter() - start) * 1000, 3))
+                        command, valid = self._check(command)
+                        if valid and self.cache is not None:
+                            self.cache.put(user_input, command)
+                        dispatch(command)
+                self._trace_response(span, parser.text)
+            
+            if not dispatched:
+                # No complete object arrived incrementally; parse the whole text
+                command, valid = self._check(json.loads(self._extract_json(parser.text.strip())))
+                if valid and self.cache is not None:
+                    self.cache.put(user_input, command)
+                dispatch(command)
+            self._record(request, 'ok' if valid else 'parse_failure')
+        
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse LLM response: {parser.text}")
+            tracing.count('agent_llm_parse_failures_total')
+            self._record(request, 'parse_failure')
+            if not dispatched:
+                dispatch(self._parse_failure())
+        except LLMUnavailable as e:
+            print(f"LLM unavailable: {e}")
+            self._record(request, 'error')
+            if not dispatched:
+                dispatch(self._degraded(user_input))
+        except Exception as e:
+            print(f"Error in thinking: {e}")
+            tracing.count('agent_llm_errors_total')
+            self._record(request, 'error')
+            if not dispatched:
+                dispatch(self._error_response(e))
+        
+        self.last_timing['total'] = time.perf_counter() - start
+        self.stats['stream_first_action_time'] += self.last_timing['first_action']
+        self.stats['stream_total_time'] += self.last_timing['total']
+        return dispatched[0]
+
+    def local_answer(self, user_input):
+        """
+        The fast-path or cached answer for a command, without calling the
+        LLM or counting a request (speculation probes partial transcripts
+        with it).
+        
+        Returns:
+            tuple: (command, 'fast_path' or 'cache'), or (None, None)
+        """
+        # Skip the LLM round-trip when the local matcher is confident
+        if self.intent_parser is not None:
+            command = self.intent_parser.parse(user_input)
+            if command and command['confidence'] >= self.fast_path_threshold:
+                return command, 'fast_path'
+        
+        if self.cache is not None:
+            command = self.cache.get(user_input)
+            if command is not None:
+                return command, 'cache'
+        return None, None
+
+    def _lookup(self, user_input):
+        """Answer from the fast path or the cache, or None if the LLM is needed."""
+        self.stats['requests'] += 1
+        command, source = self.local_answer(user_input)
+        if source == 'fast_path':
+            self.stats['fast_path_hits'] += 1
+        elif source == 'cache':
+            self.stats['cache_hits'] += 1
+        self._trace_source(source or 'llm')
+        return command
+
+    def _generate(self, user_input, stream=False):
+        """
+        Send the prompt to the routed backend, moving on to the next one
+        when a backend is unavailable.
+        
+        Returns:
+            tuple: (backend, response, start time) - pass it to _record()
+            
+        Raises:
+            LLMUnavailable: No backend answered
+        """
+        prompt = self._build_prompt(user_input)
+        error = None
+        for backend in self.router.route(user_input)[:1 + self.failover]:
+            start = time.perf_counter()
+            try:
+                response = backend.model.generate_content(prompt, stream=stream)
+            except CircuitOpen as e:
+                error = e  # Nothing was sent; says nothing new about the backend
+                continue
+            except LLMUnavailable as e:
+                backend.record(time.perf_counter() - start, 'error')
+                error = e
+                continue
+            except Exception:
+                backend.record(time.perf_counter() - start, 'error')
+                raise
+            tracing.annotate(backend=backend.name)
+            return backend, response, start
+        raise error
+
+    def _record(self, request, outcome):
+        """Report how a _generate() request ended to its backend's statistics."""
+        if request is not None:
+            backend, _, start = request
+            backend.record(time.perf_counter() - start, outcome)
+
+    def _check(self, command):
+        """
+        Validate an LLM command against the action registry before dispatch.
+        
+        Returns:
+            tuple: (command, valid) - the cleaned command, or a clarify
+                command saying what was wrong (never cached)
+        """
+        try:
+            return REGISTRY.validate(command), True
+        except InvalidCommand as e:
+            print(f"Rejected LLM command: {command}")
+            tracing.count('agent_llm_invalid_commands_total')
+            return {"action": "clarify", "params": {"message": str(e)}}, False
+
+    def _trace_source(self, source):
+        tracing.annotate(source=source)
+        tracing.count('agent_commands_total', source=source)
+
+    def _build_prompt(self, user_input):
+        """Create full prompt."""
+        prompt = self.system_prompt + f'\nUser: "{user_input}"'
+        if tracing.enabled():
+            prompt_bytes = len(prompt.encode('utf-8'))
+            prompt_tokens = tracing.estimate_tokens(prompt)
+            tracing.annotate(prompt_bytes=prompt_bytes, prompt_tokens=prompt_tokens)
+            tracing.count('agent_prompt_bytes_total', prompt_bytes)
+            tracing.count('agent_prompt_tokens_total', prompt_tokens)
+        return prompt
+
+    def _trace_response(self, span, response_text):
+        if tracing.enabled():
+            response_bytes = len(response_text.encode('utf-8'))
+            span.set(response_bytes=response_bytes)
+            tracing.count('agent_response_bytes_total', response_bytes)
+
+    def _extract_json(self, response_text):
+        """Extract JSON (handle markdown code blocks)."""
+        if '```json' in response_text:
+            return response_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in response_text:
+            return response_text.split('```')[1].split('```')[0].strip()
+        return response_text
+
+    def _parse_failure(self):
+        return {
+            "action": "respond",
+            "params": {"message": "I'm having trouble understanding that command. Could you rephrase?"}
+        }
+
+    def _degraded(self, user_input):
+        """
+        Local answer while the LLM is unavailable: the fast-path matcher with
+        a lower bar, else an explanation of what still works.
+        """
+        self.stats['degraded'] += 1
+        tracing.count('agent_llm_degraded_total')
+        tracing.annotate(source='degraded')
+        parser = self.intent_parser or IntentParser()
+        command = parser.parse(user_input)
+        if command and command['confidence'] >= self.degraded_threshold:
+            return dict(command, degraded=True)
+        return {
+            "action": "respond",
+            "params": {"message": "I can't reach the language model right now. Simple commands "
+                                  "like 'open notepad' or 'take a screenshot' still work."},
+            "degraded": True,
+        }
+
+    def _error_response(self, error):
+        return {
+            "action": "respond",
+            "params": {"message": f"An error occurred: {str(error)}"}
+        }
+
+    def stream_latency(self):
+        """
+        Average streaming latencies over all streamed LLM calls.
+        
+        Returns:
+            dict: 'first_action' and 'total' averages in seconds
+        """
+        streams = self.stats['streams']
+        if not streams:
+            return {'first_action': 0.0, 'total': 0.0}
+        return {
+            'first_action': self.stats['stream_first_action_time'] / streams,
+            'total': self.stats['stream_total_time'] / streams,
+        }
+
+    def close(self):
+        """Release the response cache."""
+        if self.cache is not None:
+            self.cache.close()
+
+    def fast_path_hit_rate(self):
+        """Fraction of requests answered locally without an LLM call."""
+        if not self.stats['requests']:
+            return 0.0
+        return self.stats['fast_path_hits'] / self.stats['requests']
 
 
 # Quick test
@@ -166,6 +704,9 @@ if __name__ == "__main__":
             print(f"\nUser: {cmd}")
             result = brain.think(cmd)
             print(f"Brain output: {json.dumps(result, indent=2)}")
+        
+        print(f"\nFast-path hit rate: {brain.fast_path_hit_rate():.0%} "
+              f"({brain.stats['llm_calls']} LLM calls)")
             
     except ValueError as e:
         print(f"\nError: {e}")
@@ -1,16 +1,568 @@
 import os
+import time
+import contextlib
 import shutil
-import webbrowser
+import itertools
+import threading
 import subprocess
-import pyautogui
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import tracing
+from actions import REGISTRY
+from shell_session import ShellSession, OutputPager, run_once
+from bulk_files import BatchWriter, resolve_paths, make_dirs
+
+
+# Actions that only run when their params carry confirmed=True
+CONFIRMATION_ACTIONS = {action.name for action in REGISTRY if action.confirm}
+
+# Result messages that mean a step did not do its job
+FAILURE_PREFIXES = ('Failed', 'Error', 'Could not', 'Unknown action', 'Please confirm',
+                    'File not found', 'Folder not found', 'No job', 'Path not found', 'Cancelled')
+
+# Actions handed to the job manager; plan steps wait for them to finish
+JOB_ACTIONS = {action.name for action in REGISTRY if action.job}
+
+# Actions that use state every caller shares; server and batch mode run one per resource at a time
+ACTION_RESOURCES = {action.name: action.resource for action in REGISTRY if action.resource}
+
+# Bulk creates with more files than this run as background jobs
+BULK_JOB_THRESHOLD = 500
+
+COPY_CHUNK = 1024 * 1024
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation was requested."""
+
+
+class AmbiguousPath(ValueError):
+    """A spoken name matches several indexed paths equally well."""
+
+    def __init__(self, name, kind, candidates):
+        super().__init__(f"{name}: it matches several {kind}s ({', '.join(candidates)}). Say the full path.")
+        self.candidates = candidates
+
+
+class Job:
+    """Handle for one background operation, with live progress counters."""
+
+    def __init__(self, job_id, description):
+        self.id = job_id
+        self.description = description
+        self.state = 'queued'   # queued, running, done, failed, cancelled
+        self.files = 0
+        self.bytes = 0
+        self.result = None
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    def add(self, files=0, nbytes=0):
+        """Count processed work; raises JobCancelled once the job was cancelled."""
+        with self.lock:
+            self.files += files
+            self.bytes += nbytes
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    @property
+    def finished(self):
+        return self.done_event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job ends; returns its result message (None on timeout)."""
+        self.done_event.wait(timeout)
+        return self.result
+
+    def status(self):
+        """One-line summary of where the job is."""
+        progress = f"{self.files} files, {_format_bytes(self.bytes)}"
+        if self.state == 'running':
+            elapsed = time.monotonic() - self.started_at
+            return f"Job {self.id} ({self.description}): running for {elapsed:.0f} s - {progress} so far"
+        if self.state == 'queued':
+            return f"Job {self.id} ({self.description}): waiting to start"
+        return f"Job {self.id}: {self.result}"
+
+
+def _format_bytes(count):
+    for unit in ('bytes', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:.0f} {unit}" if unit == 'bytes' else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+class JobManager:
+    """Runs heavy filesystem work on a worker pool so the agent loop never blocks.
+
+    submit() returns a Job immediately; the work function receives the job
+    and reports progress through job.add(), which is also where a pending
+    cancellation takes effect.
+    """
+
+    def __init__(self, max_workers=2, on_finish=None):
+        """
+        Args:
+            max_workers (int): Jobs that run at the same time
+            on_finish (callable): Called with each job once it ends
+        """
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.on_finish = on_finish
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, description, work, *args):
+        """
+        Start work(job, *args) in the background.
+
+        Returns:
+            Job: Handle for status queries and cancellation
+        """
+        with self.lock:
+            job = Job(next(self.ids), description)
+            self.jobs[job.id] = job
+        self.pool.submit(self._run, job, work, args)
+        return job
+
+    def _run(self, job, work, args):
+        job.state = 'running'
+        job.started_at = time.monotonic()
+        try:
+            job.check()
+            job.result = work(job, *args)
+            job.state = 'done'
+        except JobCancelled:
+            job.result = f"Cancelled {job.description} after {job.files} files ({_format_bytes(job.bytes)})"
+            job.state = 'cancelled'
+        except Exception as e:
+            job.result = f"Failed to {job.description}: {str(e)}"
+            job.state = 'failed'
+        finally:
+            job.finished_at = time.monotonic()
+            job.done_event.set()
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception:
+                pass
+
+    def get(self, job_id):
+        try:
+            return self.jobs.get(int(job_id))
+        except (TypeError, ValueError):
+            return None
+
+    def list(self, active_only=False):
+        """Jobs in submission order."""
+        jobs = list(self.jobs.values())
+        if active_only:
+            jobs = [job for job in jobs if not job.finished]
+        return jobs
+
+    def cancel(self, job_id):
+        """Request cancellation; returns the job, or None if there is no such job."""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+        return job
+
+    def shutdown(self, cancel=True, timeout=0.0, progress=None, interval=5.0):
+        """
+        Stop accepting jobs, giving the running ones time to finish.
+
+        Args:
+            cancel (bool): Cancel the jobs still running after `timeout`
+            timeout (float): Seconds to wait for running jobs first; Ctrl+C
+                ends the wait early
+            progress (callable): Called with each running job every
+                `interval` seconds while waiting
+
+        Returns:
+            list: The jobs that were cancelled
+        """
+        deadline = time.monotonic() + timeout
+        active = self.list(active_only=True)
+        try:
+            while active and time.monotonic() < deadline:
+                if progress is not None:
+                    for job in active:
+                        progress(job)
+                active[0].wait(min(interval, max(0.0, deadline - time.monotonic())))
+                active = self.list(active_only=True)
+        except KeyboardInterrupt:
+            active = self.list(active_only=True)
+        if not cancel:
+            active = []
+        for job in active:
+            job.cancel_event.set()
+        self.pool.shutdown(wait=True)
+        return active
+
+
+def delete_tree(job, root, max_workers=8):
+    """
+    Delete a directory tree, removing top-level subdirectories in parallel.
+
+    Unlinking is dominated by filesystem syscalls that release the GIL, so
+    independent subtrees delete concurrently; small trees with fewer than
+    two subdirectories are deleted on the calling thread.
+    """
+    files, subdirs = [], []
+    for entry in os.scandir(root):
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        else:
+            files.append(entry)
+
+    for entry in files:
+        size = entry.stat(follow_symlinks=False).st_size
+        os.unlink(entry.path)
+        job.add(1, size)
+
+    if len(subdirs) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(subdirs)),
+                                thread_name_prefix='rmtree') as pool:
+            futures = [pool.submit(_delete_subtree, job, path) for path in subdirs]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                job.cancel_event.set()  # Stop the other workers as well
+                raise
+    elif subdirs:
+        _delete_subtree(job, subdirs[0])
+    os.rmdir(root)
+
+
+def _delete_subtree(job, top):
+    for dirpath, dirnames, filenames in os.walk(top, topdown=False):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            size = os.lstat(path).st_size
+            os.unlink(path)
+            job.add(1, size)
+        for name in dirnames:
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                os.unlink(path)  # os.walk lists links to directories as directories
+            else:
+                os.rmdir(path)
+        job.check()
+    os.rmdir(top)
+
+
+def copy_tree(job, source, destination):
+    """Copy a file or directory tree in chunks, counting files and bytes."""
+    if source.is_file():
+        _copy_file(job, source, destination)
+        return
+    for dirpath, dirnames, filenames in os.walk(source):
+        target = destination / Path(dirpath).relative_to(source)
+        target.mkdir(parents=True, exist_ok=True)
+        for name in list(dirnames):
+            link = Path(dirpath) / name
+            if link.is_symlink():
+                # Recreate links to directories rather than copying what they point at
+                os.symlink(os.readlink(link), target / name)
+                dirnames.remove(name)
+        for name in filenames:
+            _copy_file(job, Path(dirpath) / name, target / name)
+
+
+def _copy_file(job, source, destination):
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        while True:
+            chunk = src.read(COPY_CHUNK)
+            if not chunk:
+                break
+            dst.write(chunk)
+            job.add(0, len(chunk))
+    shutil.copystat(source, destination)
+    job.add(1)
+
+
+class ResourceLocks:
+    """One lock per shared resource in ACTION_RESOURCES, for callers that run actions concurrently."""
+
+    def __init__(self):
+        self.locks = {name: threading.Lock() for name in set(ACTION_RESOURCES.values())}
+
+    def resources(self, action, params):
+        """Resources an action (or every step of a plan) uses."""
+        if action == 'plan':
+            return {ACTION_RESOURCES[step.get('action')] for step in params.get('steps') or []
+                    if isinstance(step, dict) and step.get('action') in ACTION_RESOURCES}
+        return {ACTION_RESOURCES[action]} if action in ACTION_RESOURCES else set()
+
+    @contextlib.contextmanager
+    def hold(self, action, params):
+        """Hold the locks of the resources the action uses."""
+        with contextlib.ExitStack() as held:
+            # Always in the same order, so two plans can't deadlock
+            for name in sorted(self.resources(action, params)):
+                held.enter_context(self.locks[name])
+            yield
 
 
 class ActionExecutor:
     """Executes OS-level commands based on parsed intents."""
 
-    def __init__(self):
+    def __init__(self, max_workers=4, persistent_shell=False, command_timeout=10,
+                 screen_backend='auto', sample_interval=1.0):
+        """
+        Args:
+            max_workers (int): Threads used to run independent plan steps
+            persistent_shell (bool): Run commands in one long-lived shell so
+                state like the current directory carries over
+            command_timeout (float): Seconds before a shell command is stopped
+            screen_backend (str): Screen capture backend ('auto', 'mss',
+                'pyautogui' or 'fake')
+            sample_interval (float): Seconds between background samples of
+                CPU, memory, disk and network for get_system_info
+        """
         self.results = []
+        self.max_workers = max_workers
+        self.persistent_shell = persistent_shell
+        self.command_timeout = command_timeout
+        self.pager = OutputPager()
+        # Called with each line of command output as it arrives
+        self.output_callback = None
+        self._shell_session = None
+        self._app_index = None
+        self._process_table = None
+        # Called with each background job once it ends
+        self.job_callback = None
+        # Called with news about work still going on after its action
+        # answered, such as a screenshot that couldn't be saved
+        self.notify_callback = None
+        self._jobs = None
+        self._file_index = None
+        self.screen_backend = screen_backend
+        self._screen = None
+        self.sample_interval = sample_interval
+        self._system_sampler = None
+        # Action name -> implementation, looked up in the registry on first use
+        self._handlers = {}
+        # (action, spoken path) -> the absolute path shown when confirmation was asked
+        self._confirmations = {}
+        # Lazy components may be first used from several threads at once (plans, server mode)
+        self._init_lock = threading.RLock()
+
+    def prewarm(self):
+        """Start the file index scan and the system sampler now instead of on first use."""
+        self.file_index
+        self.system_sampler
+
+    def close(self, job_timeout=30.0, report=print):
+        """
+        Stop background resources such as the persistent shell and running jobs.
+
+        Running jobs (copies, deletes) get up to `job_timeout` seconds to
+        finish, with their progress reported, before they are cancelled; how
+        each one ended, including where a cancelled one stopped, is reported
+        too.
+
+        Args:
+            job_timeout (float): Seconds to wait for running jobs
+            report (callable): Called with each message for the user
+        """
+        if self._jobs is not None:
+            active = self._jobs.list(active_only=True)
+            if active:
+                # Reported here, in order, rather than announced from the workers
+                self.job_callback = None
+                report(f"Waiting up to {job_timeout:.0f} s for {len(active)} background "
+                       f"job{'s' if len(active) > 1 else ''} to finish (Ctrl+C cancels them)...")
+            self._jobs.shutdown(timeout=job_timeout, progress=lambda job: report(job.status()))
+            for job in active:
+                report(job.result)
+            self._jobs = None
+        if self._file_index is not None:
+            self._file_index.close()
+            self._file_index = None
+        if self._screen is not None:
+            self._screen.close()
+            self._screen = None
+        if self._system_sampler is not None:
+            self._system_sampler.stop()
+            self._system_sampler = None
+        if self._shell_session is not None:
+            self._shell_session.close()
+            self._shell_session = None
+
+    @property
+    def shell_session(self):
+        """The persistent shell, started on first use."""
+        if self._shell_session is None:
+            with self._init_lock:
+                if self._shell_session is None:
+                    self._shell_session = ShellSession()
+        return self._shell_session
+
+    @property
+    def jobs(self):
+        """Background job manager, started on first use."""
+        if self._jobs is None:
+            with self._init_lock:
+                if self._jobs is None:
+                    self._jobs = JobManager(on_finish=self._job_finished)
+        return self._jobs
+
+    def _job_finished(self, job):
+        if self.job_callback is not None:
+            self.job_callback(job)
+
+    @property
+    def file_index(self):
+        """Index of files under the configured roots; its first scan starts on first use."""
+        if self._file_index is None:
+            with self._init_lock:
+                if self._file_index is None:
+                    from file_index import FileIndex
+                    self._file_index = FileIndex().start()
+        return self._file_index
+
+    def _resolve_path(self, spoken, kind, wait=1.0, min_score=0.8):
+        """
+        Map a relative spoken name that doesn't exist here to the one indexed
+        path it most likely means.
+
+        Returns:
+            Path: Resolved path, or None to use the name as given
+
+        Raises:
+            AmbiguousPath: Several indexed paths match about equally well
+        """
+        path = Path(spoken).expanduser()
+        if not spoken or path.is_absolute() or path.exists():
+            return None
+        index = self.file_index
+        if not index.wait_ready(wait):
+            return None
+        resolved = index.resolve(spoken, kind=kind, min_score=min_score)
+        if resolved:
+            return Path(resolved)
+        candidates = index.find(spoken, limit=3, kind=kind, min_score=min_score)
+        if len(candidates) > 1:
+            raise AmbiguousPath(spoken, kind, [path for _, path in candidates])
+        return None
+
+    def _deletion_target(self, action, spoken, confirm, kind):
+        """
+        The absolute path a delete may remove, or None while it still needs
+        confirming. A name the file index resolved elsewhere is only deleted
+        after it was shown in a confirmation question, and the confirmed
+        follow-up deletes exactly the path that was shown.
+
+        Returns:
+            tuple: (path or None, the path to ask about)
+
+        Raises:
+            AmbiguousPath: The name matches several indexed paths
+        """
+        key = (action, spoken)
+        if confirm and key in self._confirmations:
+            return self._confirmations.pop(key), None
+        try:
+            # A bare name like "budget.xlsx" is looked up in the file index
+            resolved = self._resolve_path(spoken, kind)
+        except AmbiguousPath:
+            raise
+        except Exception:
+            resolved = None
+        target = (resolved or Path(spoken).expanduser()).absolute()
+        if confirm and resolved is None:
+            return target, None  # The name as given, so the question showed the same path
+        self._confirmations[key] = target
+        return None, target
+
+    def _note_change(self, path, created):
+        """Tell a running file index about a change the agent made."""
+        if self._file_index is not None:
+            if created:
+                self._file_index.note_created(path)
+            else:
+                self._file_index.note_deleted(path)
+
+    @property
+    def screen(self):
+        """Screen capture backend and encoder, created on first use."""
+        if self._screen is None:
+            with self._init_lock:
+                if self._screen is None:
+                    # Imported here: it pulls in the display stack, which most actions never need
+                    from screen_capture import ScreenCapture
+                    self._screen = ScreenCapture(self.screen_backend)
+        return self._screen
+
+    @property
+    def process_table(self):
+        """Cached view of running processes, created on first use."""
+        if self._process_table is None:
+            with self._init_lock:
+                if self._process_table is None:
+                    from process_table import ProcessTable
+                    self._process_table = ProcessTable()
+        return self._process_table
+
+    @property
+    def system_sampler(self):
+        """Background sampler of CPU, memory, disk and network, started on first use."""
+        if self._system_sampler is None:
+            with self._init_lock:
+                if self._system_sampler is None:
+                    from system_monitor import SystemSampler
+                    self._system_sampler = SystemSampler(self.sample_interval).start()
+        return self._system_sampler
+
+    @property
+    def app_index(self):
+        """Installed-application index, loaded on first use."""
+        if self._app_index is None:
+            with self._init_lock:
+                if self._app_index is None:
+                    from app_index import AppIndex
+                    self._app_index = AppIndex()
+        return self._app_index
+
+    def prepare(self, action, params):
+        """
+        Do the read-only groundwork for an action that may be about to run,
+        such as one speculated from a partial transcript: resolve the app,
+        load the process table, start the file index or the screen backend.
+        Nothing on the system changes, and actions behind a confirmation
+        gate are never touched.
+        
+        Returns:
+            bool: Whether anything was prepared
+        """
+        if action == 'plan':
+            steps = params.get('steps') or []
+            return any([self.prepare(step.get('action', ''), step.get('params') or {})
+                        for step in steps if isinstance(step, dict)])
+        if action in CONFIRMATION_ACTIONS or 'confirmed' in params:
+            return False
+        if action == 'open_app':
+            self.app_index.resolve(params.get('app_name', ''))
+        elif action == 'close_app':
+            self.process_table.snapshot()
+        elif action == 'find_file':
+            self.file_index
+        elif action in ('take_screenshot', 'start_burst'):
+            self.screen
+        elif action == 'get_system_info':
+            self.system_sampler
+        else:
+            return False
+        return True
 
     def execute(self, action, params):
         """
@@ -23,52 +575,32 @@ class ActionExecutor:
         Returns:
             str: Result message
         """
-        action_map = {
-            'open_app': self.open_app,
-            'close_app': self.close_app,
-            'create_file': self.create_file,
-            'create_folder': self.create_folder,
-            'delete_file': self.delete_file,
-            'delete_folder': self.delete_folder,
-            'search_web': self.search_web,
-            'open_url': self.open_url,
-            'run_command': self.run_command,
-            'get_system_info': self.get_system_info,
-            'take_screenshot': self.take_screenshot,
-        }
-
-        if action in action_map:
-            try:
-                result = action_map[action](params)
-                return result
-            except Exception as e:
-                return f"Error executing {action}: {str(e)}"
-        else:
-            return f"Unknown action: {action}"
+        with tracing.span('action', action=action) as span:
+            handler = self._handlers.get(action)
+            if handler is None and action in REGISTRY:
+                handler = self._handlers[action] = REGISTRY[action].bind(self)
+            if handler is not None:
+                try:
+                    result = handler(params)
+                except Exception as e:
+                    result = f"Error executing {action}: {str(e)}"
+            else:
+                result = f"Unknown action: {action}"
+            if result.startswith(FAILURE_PREFIXES):
+                span.set(outcome='failed')
+                tracing.count('agent_action_failures_total', action=action)
+            return result
 
     def open_app(self, params):
         """Open an application."""
         app_name = params.get('app_name', '')
         
-        # Common Windows applications
-        app_paths = {
-            'notepad': 'notepad.exe',
-            'calculator': 'calc.exe',
-            'paint': 'mspaint.exe',
-            'explorer': 'explorer.exe',
-            'chrome': r'C:\Program Files\Google\Chrome\Application\chrome.exe',
-            'edge': r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe',
-            'cmd': 'cmd.exe',
-            'powershell': 'powershell.exe',
-        }
-        
-        app_lower = app_name.lower()
-        
-        # Check if it's a known app
-        if app_lower in app_paths:
+        # Resolve the spoken name against the installed applications
+        entry = self.app_index.resolve(app_name)
+        if entry is not None:
             try:
-                subprocess.Popen(app_paths[app_lower])
-                return f"Opening {app_name}"
+                self.app_index.launch(entry)
+                return f"Opening {entry['name']}"
             except Exception as e:
                 return f"Failed to open {app_name}: {str(e)}"
         else:
@@ -80,13 +612,19 @@ class ActionExecutor:
                 return f"Could not find application: {app_name}"
 
     def close_app(self, params):
-        """Close an application."""
+        """Close every running instance of an application."""
         app_name = params.get('app_name', '')
         try:
-            # Use taskkill command on Windows
-            subprocess.run(['taskkill', '/F', '/IM', f'{app_name}.exe'], 
-                         capture_output=True, text=True)
-            return f"Closed {app_name}"
+            processes = self.process_table.find(app_name)
+            if not processes:
+                return f"No running application matches: {app_name}"
+            
+            closed, survived = self.process_table.terminate(processes)
+            names = sorted({p['name'] for p in closed})
+            if survived:
+                return (f"Closed {len(closed)} of {len(processes)} {app_name} processes; "
+                        f"could not close PIDs {', '.join(str(p['pid']) for p in survived)}")
+            return f"Closed {', '.join(names)} ({len(closed)} process{'es' if len(closed) != 1 else ''})"
         except Exception as e:
             return f"Failed to close {app_name}: {str(e)}"
 
@@ -99,6 +637,18 @@ class ActionExecutor:
             # Expand user path
             full_path = Path(file_path).expanduser()
             
+            # "notes/todo.txt" goes into the one existing folder named exactly
+            # notes elsewhere, if there is one; the result says where
+            note = ''
+            if full_path.parent != Path('.'):
+                try:
+                    folder = self._resolve_path(str(full_path.parent), 'folder', wait=0, min_score=1.0)
+                except AmbiguousPath:
+                    folder = None  # Several such folders: create it here, as given
+                if folder is not None:
+                    full_path = folder / full_path.name
+                    note = f" (in the existing {folder} folder; give a full path to create it elsewhere)"
+            
             # Create parent directories if they don't exist
             full_path.parent.mkdir(parents=True, exist_ok=True)
             
@@ -106,7 +656,8 @@ class ActionExecutor:
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            return f"Created file: {full_path}"
+            self._note_change(full_path, created=True)
+            return f"Created file: {full_path}{note}"
         except Exception as e:
             return f"Failed to create file: {str(e)}"
 
@@ -117,22 +668,82 @@ class ActionExecutor:
         try:
             full_path = Path(folder_path).expanduser()
             full_path.mkdir(parents=True, exist_ok=True)
+            self._note_change(full_path, created=True)
             return f"Created folder: {full_path}"
         except Exception as e:
             return f"Failed to create folder: {str(e)}"
 
+    def create_files(self, params):
+        """Create many files from a list and/or a brace pattern like day{1..30}.txt."""
+        try:
+            paths = resolve_paths(params)
+        except ValueError as e:
+            return f"Could not create files: {str(e)}"
+        if not paths:
+            return "Could not create files: no paths given"
+        
+        content = params.get('content', '')
+        template = params.get('template')
+        if template:
+            template = Path(template).expanduser()
+            if not template.is_file():
+                return f"File not found: {template}"
+        durable = bool(params.get('durable', False))
+        
+        if len(paths) > BULK_JOB_THRESHOLD:
+            job = self.jobs.submit(f"create {len(paths)} files", self._create_files_job,
+                                   paths, content, template, durable)
+            return self._job_started(job, params, f"Creating {len(paths)} files")
+        try:
+            return self._create_files_job(None, paths, content, template, durable)
+        except Exception as e:
+            return f"Failed to create files: {str(e)}"
+
+    def _create_files_job(self, job, paths, content, template, durable):
+        make_dirs(path.parent for path in paths)
+        writer = BatchWriter(durable=durable)
+        for path in paths:
+            size = writer.write(path, content, template)
+            if job is not None:
+                job.add(1, size)
+        writer.finish()
+        return f"Created {len(paths)} files{self._describe_location(paths)}"
+
+    def create_folders(self, params):
+        """Create many folders from a list and/or a brace pattern."""
+        try:
+            paths = resolve_paths(params)
+            if not paths:
+                return "Could not create folders: no paths given"
+            make_dirs(paths)
+            return f"Created {len(paths)} folders{self._describe_location(paths)}"
+        except ValueError as e:
+            return f"Could not create folders: {str(e)}"
+        except Exception as e:
+            return f"Failed to create folders: {str(e)}"
+
+    def _describe_location(self, paths):
+        parents = {path.parent for path in paths}
+        if len(parents) == 1:
+            return f" in {parents.pop()}"
+        return ""
+
     def delete_file(self, params):
         """Delete a file (with confirmation)."""
         file_path = params.get('path', '')
         confirm = params.get('confirmed', False)
         
-        if not confirm:
-            return f"Please confirm deletion of: {file_path}"
+        try:
+            full_path, question = self._deletion_target('delete_file', file_path, confirm, 'file')
+        except AmbiguousPath as e:
+            return f"Could not delete {e}"
+        if full_path is None:
+            return f"Please confirm deletion of: {question}"
         
         try:
-            full_path = Path(file_path).expanduser()
             if full_path.exists() and full_path.is_file():
                 full_path.unlink()
+                self._note_change(full_path, created=False)
                 return f"Deleted file: {full_path}"
             else:
                 return f"File not found: {full_path}"
@@ -140,38 +751,129 @@ class ActionExecutor:
             return f"Failed to delete file: {str(e)}"
 
     def delete_folder(self, params):
-        """Delete a folder (with confirmation)."""
+        """Delete a folder (with confirmation) as a background job."""
         folder_path = params.get('path', '')
         confirm = params.get('confirmed', False)
         
-        if not confirm:
-            return f"Please confirm deletion of folder: {folder_path}"
+        try:
+            full_path, question = self._deletion_target('delete_folder', folder_path, confirm, 'folder')
+        except AmbiguousPath as e:
+            return f"Could not delete {e}"
+        if full_path is None:
+            return f"Please confirm deletion of folder: {question}"
         
         try:
-            full_path = Path(folder_path).expanduser()
-            if full_path.exists() and full_path.is_dir():
-                shutil.rmtree(full_path)
-                return f"Deleted folder: {full_path}"
-            else:
+            if not full_path.is_dir() or full_path.is_symlink():
                 return f"Folder not found: {full_path}"
+            job = self.jobs.submit(f"delete {full_path}", self._delete_folder_job, full_path)
+            return self._job_started(job, params, f"Deleting folder {full_path}")
         except Exception as e:
             return f"Failed to delete folder: {str(e)}"
 
+    def _delete_folder_job(self, job, full_path):
+        delete_tree(job, full_path)
+        self._note_change(full_path, created=False)
+        return f"Deleted folder: {full_path} ({job.files} files, {_format_bytes(job.bytes)})"
+
+    def copy_path(self, params):
+        """Copy a file or folder as a background job."""
+        source = Path(params.get('source', '')).expanduser()
+        destination = Path(params.get('destination', '')).expanduser()
+        
+        if not params.get('source') or not source.exists():
+            return f"Path not found: {source}"
+        if source.is_dir() and destination.exists():
+            destination = destination / source.name
+        elif source.is_file() and destination.is_dir():
+            destination = destination / source.name
+        if source.is_dir() and (destination == source or source in destination.parents):
+            return f"Could not copy {source}: destination is inside the source"
+        try:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            return f"Failed to copy {source}: {str(e)}"
+        job = self.jobs.submit(f"copy {source} to {destination}", self._copy_job, source, destination)
+        return self._job_started(job, params, f"Copying {source} to {destination}")
+
+    def _copy_job(self, job, source, destination):
+        copy_tree(job, source, destination)
+        return f"Copied {source} to {destination} ({job.files} files, {_format_bytes(job.bytes)})"
+
+    def _job_started(self, job, params, message):
+        """Result for a freshly submitted job, or its outcome when params ask to wait."""
+        if params.get('wait'):
+            job.wait()
+            return job.result
+        return f"{message} in the background (job {job.id}). Ask for job status to check progress."
+
+    def job_status(self, params):
+        """Report on one background job, or on all of them."""
+        job_id = params.get('job_id')
+        if job_id not in (None, ''):
+            job = self.jobs.get(job_id)
+            return job.status() if job is not None else f"No job with id {job_id}"
+        if self._jobs is None or not self._jobs.list():
+            return "There are no background jobs."
+        jobs = self._jobs.list()
+        active = sum(1 for job in jobs if not job.finished)
+        lines = [f"{active} of {len(jobs)} background jobs still running."]
+        lines += [job.status() for job in jobs[-10:]]
+        return '\n'.join(lines)
+
+    def cancel_job(self, params):
+        """Cancel a running background job (or all of them)."""
+        job_id = params.get('job_id')
+        if job_id in (None, '', 'all'):
+            jobs = self._jobs.list(active_only=True) if self._jobs is not None else []
+            if not jobs:
+                return "There are no running jobs to cancel."
+            for job in jobs:
+                self._jobs.cancel(job.id)
+            return f"Cancelling {len(jobs)} job{'s' if len(jobs) != 1 else ''}"
+        job = self.jobs.cancel(job_id)
+        if job is None:
+            return f"No job with id {job_id}"
+        if job.finished:
+            return f"Job {job.id} already {job.state}"
+        return f"Cancelling job {job.id} ({job.description})"
+
+    def find_file(self, params):
+        """Find files or folders by name using the file index."""
+        name = params.get('name', '') or params.get('path', '')
+        kind = params.get('kind')
+        if kind not in ('file', 'folder'):
+            kind = None
+        if not name:
+            return "Could not find files: no name given"
+        
+        index = self.file_index
+        indexing = not index.wait_ready(timeout=5.0)
+        results = index.find(name, limit=5, kind=kind)
+        note = " (still indexing, results may be incomplete)" if indexing else ""
+        if not results:
+            return f"No {kind or 'file'}s match: {name}{note}"
+        lines = [f"Found {len(results)} match{'es' if len(results) != 1 else ''} for {name}{note}:"]
+        lines += [path for _, path in results]
+        return '\n'.join(lines)
+
     def search_web(self, params):
         """Search the web using default browser."""
         query = params.get('query', '')
         search_url = f"https://www.google.com/search?q={query}"
+        # Imported here: it pulls in a browser lookup most commands never need
+        import webbrowser
         webbrowser.open(search_url)
         return f"Searching for: {query}"
 
     def open_url(self, params):
         """Open a URL in the default browser."""
         url = params.get('url', '')
+        import webbrowser
         webbrowser.open(url)
         return f"Opening: {url}"
 
     def run_command(self, params):
-        """Run a shell command."""
+        """Run a shell command, streaming its output and paging the result."""
         command = params.get('command', '')
         confirm = params.get('confirmed', False)
         
@@ -179,33 +881,191 @@ class ActionExecutor:
             return f"Please confirm running command: {command}"
         
         try:
-            result = subprocess.run(command, shell=True, capture_output=True, 
-                                  text=True, timeout=10)
-            output = result.stdout if result.stdout else result.stderr
-            return f"Command output: {output[:500]}"  # Limit output
+            if self.persistent_shell:
+                code, lines = self.shell_session.run(command, on_output=self.output_callback,
+                                                     timeout=self.command_timeout)
+            else:
+                code, lines = run_once(command, on_output=self.output_callback,
+                                       timeout=self.command_timeout)
         except Exception as e:
             return f"Failed to run command: {str(e)}"
+        
+        page = self.pager.load(lines)
+        if page is None:
+            return f"Command finished with exit code {code} and no output"
+        result = f"Command output: {page}"
+        if self.pager.has_more():
+            result += f"\n({self.pager.remaining()} more lines - say 'show more' to continue)"
+        return result
 
-    def get_system_info(self, params):
-        """Get system information."""
-        import platform
-        info = f"OS: {platform.system()} {platform.release()}\n"
-        info += f"Machine: {platform.machine()}\n"
-        info += f"Processor: {platform.processor()}"
-        return info
+    def show_more(self, params):
+        """Show the next page of the last command's output."""
+        page = self.pager.next_page()
+        if page is None:
+            return "There is no more output."
+        if self.pager.has_more():
+            page += f"\n({self.pager.remaining()} more lines)"
+        return page
 
     def take_screenshot(self, params):
-        """Take a screenshot."""
+        """Capture the screen (or a region/window) and save it on the encoder thread."""
         filename = params.get('filename', 'screenshot.png')
         
         try:
-            # Expand path
             full_path = Path(filename).expanduser()
-            
-            # Take screenshot
-            screenshot = pyautogui.screenshot()
-            screenshot.save(full_path)
-            
-            return f"Screenshot saved to: {full_path}"
+            frame, saved = self.screen.capture(
+                full_path,
+                region=params.get('region'),
+                window=params.get('window'),
+                fmt=params.get('format'),
+                quality=int(params.get('quality', 85)),
+                compress_level=int(params.get('compression', 1)),
+            )
+            if params.get('wait'):
+                saved.result()
+                return f"Screenshot saved to: {full_path}"
+            self._report_failed_saves([saved], f"screenshot {full_path}")
+            return f"Saving screenshot ({frame.width}x{frame.height}) to: {full_path}"
         except Exception as e:
             return f"Failed to take screenshot: {str(e)}"
+
+    def start_burst(self, params):
+        """Keep capturing the screen into a ring buffer of recent distinct frames."""
+        try:
+            burst = self.screen.start_burst(
+                capacity=max(1, int(params.get('frames', 10))),
+                interval=max(0.05, float(params.get('interval', 0.5))),
+                region=params.get('region'),
+            )
+            return (f"Recording the last {burst.frames.maxlen} distinct frames every "
+                    f"{burst.interval:g} s. Say 'save burst' to keep them.")
+        except Exception as e:
+            return f"Failed to start burst capture: {str(e)}"
+
+    def save_burst(self, params):
+        """Stop burst capture and save the buffered frames to a folder."""
+        if self._screen is None or self._screen.burst is None:
+            return "Could not save burst: no burst capture is running"
+        folder = Path(params.get('folder', 'burst')).expanduser()
+        try:
+            stats = self._screen.burst.stats
+            futures = self._screen.save_burst(folder, fmt=params.get('format', 'png'))
+            if params.get('wait'):
+                for future in futures:
+                    future.result()
+            self._report_failed_saves(futures, f"burst frames to {folder}")
+            return (f"Saving {len(futures)} frames to {folder} "
+                    f"({stats['duplicates']} near-duplicates dropped)")
+        except Exception as e:
+            return f"Failed to save burst: {str(e)}"
+
+    def _report_failed_saves(self, futures, description):
+        """Tell the user once all futures are done if any of them failed."""
+        pending, errors, lock = [len(futures)], [], threading.Lock()
+
+        def done(future):
+            error = 'cancelled' if future.cancelled() else future.exception()
+            with lock:
+                if error is not None:
+                    errors.append(error)
+                pending[0] -= 1
+                if pending[0] or not errors:
+                    return
+            count = f" ({len(errors)} of {len(futures)} files)" if len(futures) > 1 else ''
+            (self.notify_callback or print)(f"Failed to save {description}{count}: {errors[0]}")
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def run_plan(self, params):
+        """
+        Run a multi-step plan, executing independent steps concurrently.
+        
+        Each step is {"id": ..., "action": ..., "params": {...}, "after": [ids]}.
+        Steps wait for the steps listed in "after", and for any earlier
+        create_folder whose folder contains their path. A step whose
+        dependency failed or is awaiting confirmation is skipped, and the
+        confirmed gate still applies to every step.
+        
+        Returns:
+            str: One summary line per step, in plan order
+        """
+        steps = self._normalize_plan(params.get('steps', []))
+        if not steps:
+            return "The plan has no steps."
+        
+        results = {}   # step id -> result message
+        failed = set()
+        pending = {step['id']: step for step in steps}
+        running = {}   # future -> step id
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='plan-step') as pool:
+            while pending or running:
+                # Settle steps whose dependencies failed, then start ready ones
+                for step_id, step in list(pending.items()):
+                    blocked = [dep for dep in step['after'] if dep in failed]
+                    if blocked:
+                        results[step_id] = f"Skipped {step['action']}: step {blocked[0]} did not complete"
+                        failed.add(step_id)
+                        del pending[step_id]
+                    elif all(dep in results for dep in step['after']):
+                        future = pool.submit(self._run_step, step)
+                        running[future] = step_id
+                        del pending[step_id]
+                
+                if not running:
+                    # Nothing can make progress: circular or unknown dependencies
+                    for step_id, step in pending.items():
+                        results[step_id] = f"Skipped {step['action']}: unresolvable dependencies"
+                        failed.add(step_id)
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    results[step_id] = future.result()
+                    if results[step_id].startswith(FAILURE_PREFIXES):
+                        failed.add(step_id)
+        
+        completed = len(steps) - len(failed)
+        lines = [f"Completed {completed} of {len(steps)} steps."]
+        lines += [f"{n}. {results[step['id']]}" for n, step in enumerate(steps, 1)]
+        return '\n'.join(lines)
+
+    def _normalize_plan(self, raw_steps):
+        """Assign ids and work out each step's dependencies."""
+        steps = []
+        for index, raw in enumerate(raw_steps, 1):
+            steps.append({
+                'id': str(raw.get('id', index)),
+                'action': raw.get('action', ''),
+                'params': raw.get('params', {}) or {},
+                'after': [str(dep) for dep in raw.get('after', raw.get('depends_on', []))],
+            })
+        
+        # Implicit ordering: anything inside a folder waits for its creation
+        for i, step in enumerate(steps):
+            path = step['params'].get('path') or step['params'].get('folder')
+            if not path:
+                continue
+            path = Path(path).expanduser()
+            for earlier in steps[:i]:
+                if earlier['action'] != 'create_folder' or earlier['id'] in step['after']:
+                    continue
+                folder = Path(earlier['params'].get('path', '')).expanduser()
+                if folder in path.parents or folder == path:
+                    step['after'].append(earlier['id'])
+        return steps
+
+    def _run_step(self, step):
+        """Execute one plan step."""
+        action = step['action']
+        if action == 'plan':
+            return "Error executing plan: nested plans are not supported"
+        if action in ('respond', 'clarify'):
+            return step['params'].get('message', '')
+        if action in JOB_ACTIONS:
+            # Later steps may depend on the result, so wait for the job here
+            return self.execute(action, dict(step['params'], wait=True))
+        return self.execute(action, step['params'])
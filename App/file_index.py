@@ -0,0 +1,517 @@
+import os
+import sys
+import time
+import struct
+import select
+import sqlite3
+import threading
+from pathlib import Path
+
+from fuzzy import normalize_name, trigrams
+
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / '.agent_cache' / 'file_index.sqlite3'
+INDEX_VERSION = 1
+
+# Directories never worth indexing (besides hidden ones)
+SKIP_DIRS = {'node_modules', '__pycache__', 'site-packages', 'venv', 'AppData', 'Library'}
+
+# Trigram characters: padding space, letters, digits
+GRAM_CHARS = {c: i for i, c in enumerate(' abcdefghijklmnopqrstuvwxyz0123456789')}
+
+# inotify event bits (linux/inotify.h)
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def default_roots():
+    """Roots from AGENT_FILE_ROOTS (os.pathsep separated), else the home directory."""
+    configured = os.environ.get('AGENT_FILE_ROOTS')
+    if configured:
+        return [str(Path(p).expanduser()) for p in configured.split(os.pathsep) if p]
+    return [str(Path.home())]
+
+
+def gram_codes(name):
+    """Trigrams of a name packed into small integers for the on-disk index."""
+    codes = set()
+    for gram in trigrams(normalize_name(name)):
+        codes.add(GRAM_CHARS[gram[0]] * 1369 + GRAM_CHARS[gram[1]] * 37 + GRAM_CHARS[gram[2]])
+    return codes
+
+
+def _skip(name):
+    return name.startswith('.') or name in SKIP_DIRS
+
+
+class FileIndex:
+    """Persistent trigram index of file and folder names under a set of roots.
+
+    Names live in SQLite next to posting lists of packed trigram codes, so a
+    lookup reads only the entries that share trigrams with the query. The
+    first scan runs in the background; later starts only rescan directories
+    whose mtime changed. On Linux an inotify watcher then applies creates,
+    deletes and renames as they happen; elsewhere a lookup on a stale index
+    answers from it and has the background thread refresh it by mtime.
+    """
+
+    def __init__(self, roots=None, path=DEFAULT_INDEX_PATH, watch=True, max_watches=8192,
+                 refresh_interval=30.0):
+        """
+        Args:
+            roots (list): Directories to index (defaults to default_roots())
+            path (str|Path): SQLite file, or None for an in-memory index
+            watch (bool): Follow changes with inotify where available
+            max_watches (int): Most directories watched at once; beyond it
+                the index falls back to mtime refreshes
+            refresh_interval (float): Seconds before a lookup on an unwatched
+                index has it refreshed again in the background
+        """
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in (roots or default_roots())]
+        self.watch = watch and sys.platform.startswith('linux')
+        self.max_watches = max_watches
+        self.refresh_interval = refresh_interval
+        self.lock = threading.RLock()
+        self.ready = threading.Event()
+        self.refreshed_at = 0.0
+        self.stats = {'scanned_dirs': 0, 'events': 0, 'lookups': 0}
+
+        self._inotify = None
+        self._watches = {}     # watch descriptor -> directory path
+        self._watched = {}     # directory path -> watch descriptor
+        self._stop = threading.Event()
+        self._refresh_wanted = threading.Event()
+        self._thread = None
+        self._closed = False
+
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path) if path is not None else ':memory:',
+                                  check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        db = self.db
+        version = db.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            db.executescript('DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS files; '
+                             'DROP TABLE IF EXISTS grams;')
+        db.executescript(f'''
+            PRAGMA user_version = {INDEX_VERSION};
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS dirs (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL);
+            CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, dir INTEGER, name TEXT,
+                                              is_dir INTEGER, UNIQUE (dir, name));
+            CREATE TABLE IF NOT EXISTS grams (gram INTEGER, file INTEGER,
+                                              PRIMARY KEY (gram, file)) WITHOUT ROWID;
+        ''')
+        db.commit()
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def start(self):
+        """Scan (incrementally) and start watching on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='file-index', daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Block until the first scan finished; returns False on timeout."""
+        return self.ready.wait(timeout)
+
+    def close(self):
+        """Stop the background thread and close the database once it has exited."""
+        self._stop.set()
+        self._refresh_wanted.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            if self._thread.is_alive():
+                return  # Still in a slow directory; it closes the database on its way out
+        self._close_db()
+
+    def _close_db(self):
+        with self.lock:
+            if self._inotify is not None:
+                os.close(self._inotify)
+                self._inotify = None
+            if not self._closed:
+                self._closed = True
+                self.db.close()
+
+    def _run(self):
+        try:
+            if self.watch:
+                self._open_inotify()
+            try:
+                self.refresh()
+            finally:
+                self.ready.set()
+            if self._inotify is not None:
+                self._watch_loop()
+            else:
+                self._refresh_loop()
+        finally:
+            if self._stop.is_set():
+                self._close_db()
+
+    def _refresh_loop(self):
+        """Without inotify: refresh whenever a lookup found the index stale."""
+        while not self._stop.is_set():
+            if self._refresh_wanted.wait(0.5) and not self._stop.is_set():
+                self._refresh_wanted.clear()
+                self.refresh()
+
+    # ---- scanning --------------------------------------------------------
+
+    def refresh(self):
+        """
+        Bring the index up to date, rescanning only directories whose mtime
+        changed and dropping directories that disappeared.
+
+        Returns:
+            int: Directories rescanned
+        """
+        with self.lock:
+            known = {path: (dir_id, mtime) for dir_id, path, mtime
+                     in self.db.execute('SELECT id, path, mtime FROM dirs')}
+        seen = set()
+        rescanned = 0
+        pending = list(self.roots)
+        while pending and not self._stop.is_set():
+            directory = pending.pop()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            self._add_watch(directory)
+
+            entry = known.get(directory)
+            if entry is None or entry[1] != mtime:
+                # Committed in batches: one transaction per directory dominates a first scan
+                self._sync_dir(directory, mtime, commit=False)
+                rescanned += 1
+                if rescanned % 256 == 0:
+                    with self.lock:
+                        self.db.commit()
+            with self.lock:
+                dir_id = self._dir_id(directory)
+                subdirs = [name for (name,) in self.db.execute(
+                    'SELECT name FROM files WHERE dir = ? AND is_dir = 1', (dir_id,))]
+            pending.extend(os.path.join(directory, name) for name in subdirs)
+
+        if not self._stop.is_set():
+            with self.lock:
+                for directory in set(known) - seen:
+                    self._drop_dir(directory)
+                self.db.commit()
+        self.refreshed_at = time.monotonic()
+        self.stats['scanned_dirs'] += rescanned
+        return rescanned
+
+    def _list(self, directory):
+        entries = []
+        try:
+            with os.scandir(directory) as children:
+                for child in children:
+                    if child.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = child.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir and _skip(child.name):
+                        continue
+                    entries.append((child.name, int(is_dir)))
+        except OSError:
+            pass
+        return entries
+
+    def _dir_id(self, directory, mtime=None):
+        row = self.db.execute('SELECT id FROM dirs WHERE path = ?', (directory,)).fetchone()
+        if row is not None:
+            if mtime is not None:
+                self.db.execute('UPDATE dirs SET mtime = ? WHERE id = ?', (mtime, row[0]))
+            return row[0]
+        return self.db.execute('INSERT INTO dirs (path, mtime) VALUES (?, ?)',
+                               (directory, mtime or 0.0)).lastrowid
+
+    def _sync_dir(self, directory, mtime, commit=True):
+        """Make one directory's entries match the filesystem."""
+        entries = dict(self._list(directory))
+        with self.lock:
+            dir_id = self._dir_id(directory, mtime)
+            current = {name: (file_id, is_dir) for file_id, name, is_dir in self.db.execute(
+                'SELECT id, name, is_dir FROM files WHERE dir = ?', (dir_id,))}
+            for name, (file_id, is_dir) in current.items():
+                if entries.get(name) != is_dir:
+                    self._remove_entry(directory, file_id, name, is_dir)
+            for name, is_dir in entries.items():
+                if current.get(name, (None, None))[1] != is_dir:
+                    self._insert_entry(dir_id, name, is_dir)
+            if commit:
+                self.db.commit()
+
+    def _insert_entry(self, dir_id, name, is_dir):
+        cursor = self.db.execute('INSERT OR IGNORE INTO files (dir, name, is_dir) VALUES (?, ?, ?)',
+                                 (dir_id, name, is_dir))
+        if cursor.rowcount:
+            file_id = cursor.lastrowid
+            self.db.executemany('INSERT OR IGNORE INTO grams (gram, file) VALUES (?, ?)',
+                                [(code, file_id) for code in gram_codes(name)])
+
+    def _delete_grams(self, file_id, name):
+        codes = gram_codes(name)
+        self.db.execute('DELETE FROM grams WHERE gram IN (%s) AND file = ?'
+                        % ','.join('?' * len(codes)), (*codes, file_id))
+
+    def _remove_entry(self, directory, file_id, name, is_dir):
+        self._delete_grams(file_id, name)
+        self.db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+        if is_dir:
+            self._drop_dir(os.path.join(directory, name))
+
+    def _drop_dir(self, directory):
+        """Forget a directory and everything indexed below it."""
+        upper = directory + chr(ord(os.sep) + 1)  # Every path starting with directory + sep
+        rows = self.db.execute('SELECT id, path FROM dirs WHERE path = ? OR (path > ? AND path < ?)',
+                               (directory, directory + os.sep, upper)).fetchall()
+        for dir_id, path in rows:
+            for file_id, name in self.db.execute('SELECT id, name FROM files WHERE dir = ?',
+                                                 (dir_id,)).fetchall():
+                self._delete_grams(file_id, name)
+            self.db.execute('DELETE FROM files WHERE dir = ?', (dir_id,))
+            self.db.execute('DELETE FROM dirs WHERE id = ?', (dir_id,))
+            self._remove_watch(path)
+
+    # ---- change notifications ---------------------------------------------
+
+    def note_created(self, path):
+        """Record a file or folder the agent itself just created."""
+        path = os.path.abspath(path)
+        parent, name = os.path.split(path)
+        if not self._covers(parent) or _skip(name):
+            return
+        with self.lock:
+            row = self.db.execute('SELECT id FROM dirs WHERE path = ?', (parent,)).fetchone()
+            if row is None:
+                return  # Parent not indexed yet; the next scan picks it up
+            self._insert_entry(row[0], name, int(os.path.isdir(path)))
+            self.db.commit()
+
+    def note_deleted(self, path):
+        """Record a file or folder the agent itself just deleted."""
+        path = os.path.abspath(path)
+        parent, name = os.path.split(path)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT files.id, files.is_dir FROM files JOIN dirs ON files.dir = dirs.id '
+                'WHERE dirs.path = ? AND files.name = ?', (parent, name)).fetchone()
+            if row is not None:
+                self._remove_entry(parent, row[0], name, row[1])
+                self.db.commit()
+
+    def _covers(self, path):
+        return any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots)
+
+    def _open_inotify(self):
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+            if fd < 0:
+                return
+            self._libc = libc
+            self._inotify = fd
+        except (OSError, AttributeError):
+            self._inotify = None
+
+    def _add_watch(self, directory):
+        if self._inotify is None or directory in self._watched:
+            return
+        if len(self._watched) >= self.max_watches:
+            return
+        wd = self._libc.inotify_add_watch(self._inotify, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = directory
+            self._watched[directory] = wd
+
+    def _remove_watch(self, directory):
+        wd = self._watched.pop(directory, None)
+        if wd is not None:
+            self._watches.pop(wd, None)
+            if self._inotify is not None:
+                self._libc.inotify_rm_watch(self._inotify, wd)
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._inotify], [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            if not readable:
+                continue
+            try:
+                data = os.read(self._inotify, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            self._apply_events(data)
+
+    def _apply_events(self, data):
+        offset = 0
+        overflow = False
+        with self.lock:
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self.stats['events'] += 1
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    self._watched.pop(directory, None)
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    self._drop_dir(directory)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.note_deleted(os.path.join(directory, name))
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    path = os.path.join(directory, name)
+                    self.note_created(path)
+                    if mask & IN_ISDIR and not _skip(name):
+                        # Its contents may predate the watch: scan the new subtree
+                        self._scan_new_tree(path)
+            self.db.commit()
+        if overflow:
+            self.refresh()
+
+    def _scan_new_tree(self, top):
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            self._add_watch(directory)
+            self._sync_dir(directory, mtime)
+            pending.extend(os.path.join(directory, name) for name, is_dir
+                           in self._list(directory) if is_dir)
+
+    # ---- lookups ----------------------------------------------------------
+
+    def find(self, name, limit=10, kind=None, min_score=0.45):
+        """
+        Find files or folders whose name matches, exactly, as a substring or
+        fuzzily.
+
+        Args:
+            name (str): Spoken or typed name; a leading folder ("notes/todo")
+                narrows the match to paths containing that folder
+            limit (int): Maximum results
+            kind (str): 'file', 'folder' or None for both
+            min_score (float): Minimum similarity (0-1)
+
+        Returns:
+            list: (score, path) tuples, best first
+        """
+        # Before the first scan finishes, answer from what is indexed so far;
+        # a stale index answers too while the scan thread refreshes it
+        if (self.ready.is_set() and self._inotify is None
+                and time.monotonic() - self.refreshed_at > self.refresh_interval):
+            self._refresh_wanted.set()
+        self.stats['lookups'] += 1
+
+        hint, _, base = name.replace('\\', '/').rstrip('/').rpartition('/')
+        key = normalize_name(base)
+        if not key:
+            return []
+        codes = gram_codes(base)
+
+        sql = ('SELECT hits.shared, files.name, files.is_dir, dirs.path FROM '
+               '(SELECT file, COUNT(*) AS shared FROM grams WHERE gram IN (%s) '
+               ' GROUP BY file ORDER BY shared DESC LIMIT 200) AS hits '
+               'JOIN files ON files.id = hits.file JOIN dirs ON dirs.id = files.dir'
+               % ','.join('?' * len(codes)))
+        with self.lock:
+            rows = self.db.execute(sql, tuple(codes)).fetchall()
+
+        lowered = base.lower()
+        hint = normalize_name(hint)
+        results = []
+        for shared, entry_name, is_dir, directory in rows:
+            if kind == 'file' and is_dir or kind == 'folder' and not is_dir:
+                continue
+            if hint and hint not in normalize_name(directory):
+                continue
+            score = self._score(key, len(codes), shared, lowered, entry_name)
+            if score >= min_score:
+                results.append((score, os.path.join(directory, entry_name)))
+        results.sort(key=lambda result: (-result[0], len(result[1])))
+        return results[:limit]
+
+    def _score(self, key, query_size, shared, lowered, entry_name):
+        """Similarity of a candidate from the trigrams it shares with the query."""
+        if entry_name.lower() == lowered:
+            return 1.0
+        candidate = normalize_name(entry_name)
+        stem = normalize_name(os.path.splitext(entry_name)[0])
+        if key in (candidate, stem):
+            return 0.98
+        best = 0.0
+        for target in (candidate, stem):
+            if not target:
+                continue
+            # A padded name of n characters has at most n + 1 distinct trigrams
+            size = len(target) + 1
+            score = 2.0 * min(shared, size) / (query_size + size)
+            if key in target:
+                # Substring match: the more of the name it covers, the better
+                score = max(score, 0.6 + 0.35 * len(key) / len(target))
+            best = max(best, score)
+        return best
+
+    def resolve(self, name, kind=None, min_score=0.8):
+        """
+        The single path a spoken name most likely refers to.
+
+        Returns:
+            str: Path, or None when nothing matches well or the match is
+                 ambiguous
+        """
+        results = self.find(name, limit=2, kind=kind, min_score=min_score)
+        if not results:
+            return None
+        if len(results) > 1 and results[1][0] >= results[0][0] - 0.02 and results[0][0] < 1.0:
+            return None
+        if len(results) > 1 and results[1][0] == 1.0:
+            return None  # Same exact name in several places
+        return results[0][1]
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
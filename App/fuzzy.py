@@ -0,0 +1,86 @@
+"""
+Fuzzy name matching shared by the app launcher, process table and file index.
+
+Names are normalized (lowercase, alphanumerics only) and indexed by
+character trigrams, so a lookup only scores names that share at least one
+trigram with the query instead of comparing against every name.
+"""
+
+import re
+from collections import defaultdict
+
+
+def normalize_name(name):
+    """Lowercase and keep only letters and digits: 'Google Chrome.exe' -> 'googlechromeexe'."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def trigrams(text):
+    """Character trigrams of a normalized name, padded so short names still match."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameMatcher:
+    """Trigram index from names to values with similarity scoring."""
+
+    def __init__(self):
+        self.values = {}                   # normalized name -> list of values
+        self.grams = {}                    # normalized name -> its trigram set
+        self.index = defaultdict(set)      # trigram -> normalized names
+
+    def add(self, name, value):
+        """Index a value under a name. Several values may share a name."""
+        key = normalize_name(name)
+        if not key:
+            return
+        if key not in self.values:
+            self.values[key] = []
+            self.grams[key] = trigrams(key)
+            for gram in self.grams[key]:
+                self.index[gram].add(key)
+        self.values[key].append(value)
+
+    def exact(self, name):
+        """Values whose normalized name equals the query, or []."""
+        return self.values.get(normalize_name(name), [])
+
+    def search(self, name, limit=5, min_score=0.4):
+        """
+        Find the closest names.
+
+        Args:
+            name (str): Query
+            limit (int): Maximum results
+            min_score (float): Minimum similarity (0-1)
+
+        Returns:
+            list: (score, normalized name, values) tuples, best first
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+        if key in self.values:
+            return [(1.0, key, self.values[key])]
+
+        query = trigrams(key)
+        counts = defaultdict(int)
+        for gram in query:
+            for candidate in self.index.get(gram, ()):
+                counts[candidate] += 1
+
+        results = []
+        for candidate, shared in counts.items():
+            # Dice coefficient on trigram sets
+            score = 2.0 * shared / (len(query) + len(self.grams[candidate]))
+            # A query that is a whole prefix of the name ("chrome" for
+            # "chromebrowser") is a strong signal on its own
+            if candidate.startswith(key):
+                score = max(score, 0.5 + 0.5 * len(key) / len(candidate))
+            if score >= min_score:
+                results.append((score, candidate, self.values[candidate]))
+        results.sort(key=lambda result: (-result[0], len(result[1])))
+        return results[:limit]
+
+    def __len__(self):
+        return len(self.values)
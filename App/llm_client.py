@@ -0,0 +1,335 @@
+"""
+Resilient wrapper around the LLM client's generate_content.
+
+ResilientModel has the same generate_content(prompt, stream=False) interface
+as the Gemini model (and stubs.StubModel), and adds:
+
+  - a deadline per attempt: a hung call is abandoned, not waited on forever
+  - bounded retries with full-jitter exponential backoff
+  - optional hedging: when an attempt takes longer than the recent p95
+    latency, a duplicate request is sent and whichever answers first wins
+  - a circuit breaker: after repeated failed calls, calls fail immediately
+    for a while (CircuitOpen) so the Brain can use its local fallback
+    instead of waiting out more timeouts, then a single trial call decides
+    whether to close it again
+
+Every failure that means "the LLM can't answer right now" is raised as an
+LLMUnavailable subclass. Errors that retrying can't fix (bad API key,
+invalid request) are raised unchanged.
+"""
+
+import time
+import queue
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+import tracing
+
+
+# Exception class names that retrying won't fix (google.api_core and friends)
+NON_RETRYABLE = {'PermissionDenied', 'Unauthenticated', 'InvalidArgument', 'NotFound',
+                 'FailedPrecondition', 'ValueError', 'TypeError'}
+
+
+class LLMUnavailable(Exception):
+    """The LLM didn't produce a response (timeouts, errors, open circuit)."""
+
+
+class DeadlineExceeded(LLMUnavailable):
+    """An attempt ran past its deadline."""
+
+
+class CircuitOpen(LLMUnavailable):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial -> closed."""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failed calls that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now (claims the trial slot when half-open)."""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+                return True
+            return self.state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """Give back a trial slot without judging the backend."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opens += 1
+                    tracing.count('agent_llm_circuit_opens_total')
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def retry_in(self):
+        """Seconds until an open circuit allows a trial call."""
+        with self._lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class ResilientModel:
+    """Deadlines, retries, hedging and a circuit breaker around a model."""
+
+    def __init__(self, model, deadline=10.0, retries=2, backoff=0.2, max_backoff=2.0,
+                 hedge=False, hedge_after=None, min_hedge_delay=0.05, hedge_samples=20,
+                 breaker=None, seed=None):
+        """
+        Args:
+            model (object): Anything with generate_content(prompt, stream=...)
+            deadline (float): Seconds one attempt may take (time to the first
+                chunk, and between chunks, when streaming)
+            retries (int): Extra attempts after a failed or timed-out one
+            backoff (float): Base of the exponential backoff, in seconds
+            max_backoff (float): Cap on a single backoff sleep
+            hedge (bool): Send a duplicate request when an attempt is slow
+            hedge_after (float): Hedge delay to use until enough latencies
+                have been seen; None means don't hedge until then
+            min_hedge_delay (float): Never hedge sooner than this
+            hedge_samples (int): Successful calls needed before the p95 is used
+            breaker (CircuitBreaker): Circuit breaker; a default one if None
+            seed (int): Seed for the backoff jitter (repeatable tests)
+        """
+        self.model = model
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.min_hedge_delay = min_hedge_delay
+        self.hedge_samples = hedge_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=200)  # Recent successful attempt latencies
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'timeouts': 0, 'errors': 0,
+                      'hedges': 0, 'hedge_wins': 0, 'short_circuited': 0, 'failed_calls': 0}
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """
+        Call the model within the deadline/retry/breaker policy.
+
+        Raises:
+            LLMUnavailable: No response (CircuitOpen, DeadlineExceeded, or
+                every attempt failed)
+        """
+        self._count('calls')
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise CircuitOpen(f"LLM circuit open, retrying in {self.breaker.retry_in():.0f} s")
+        try:
+            if stream:
+                response = self._stream(prompt, kwargs)
+            else:
+                response = self._call(prompt, kwargs)
+        except LLMUnavailable:
+            self._count('failed_calls')
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # Says nothing about the backend's health (e.g. a bad request)
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging: the recent p95 latency."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < self.hedge_samples:
+            return self.hedge_after
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return max(self.min_hedge_delay, p95)
+
+    def _count(self, key, metric=None):
+        with self._lock:
+            self.stats[key] += 1
+        if metric is not None:
+            tracing.count(metric)
+
+    def _sleep_backoff(self, attempt):
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        ceiling = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        with self._lock:
+            delay = self._random.uniform(0, ceiling)
+        time.sleep(delay)
+
+    def _retryable(self, error):
+        return isinstance(error, LLMUnavailable) or type(error).__name__ not in NON_RETRYABLE
+
+    def _call(self, prompt, kwargs):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retries', 'agent_llm_retries_total')
+                self._sleep_backoff(attempt)
+            try:
+                response = self._attempt(prompt, kwargs)
+                tracing.annotate(attempts=attempt + 1)
+                return response
+            except Exception as e:
+                if not self._retryable(e):
+                    raise
+                last_error = e
+        tracing.annotate(attempts=self.retries + 1)
+        if isinstance(last_error, LLMUnavailable):
+            raise last_error
+        raise LLMUnavailable(f"LLM failed after {self.retries + 1} attempts: {last_error}") from last_error
+
+    def _attempt(self, prompt, kwargs):
+        """One attempt, plus at most one hedged duplicate; the first success wins."""
+        start = time.perf_counter()
+        deadline_at = start + self.deadline
+        hedge_at = None
+        if self.hedge:
+            delay = self.hedge_delay()
+            if delay is not None and delay < self.deadline:
+                hedge_at = start + delay
+
+        primary = self._submit(prompt, kwargs)
+        pending = [primary]
+        error = None
+        while pending:
+            now = time.perf_counter()
+            if now >= deadline_at:
+                self._count('timeouts', 'agent_llm_timeouts_total')
+                raise DeadlineExceeded(f"No LLM response within {self.deadline:.1f} s")
+            until = deadline_at if hedge_at is None else min(deadline_at, hedge_at)
+            done, _ = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    response, latency = future.result()
+                    with self._lock:
+                        self.latencies.append(latency)
+                    if future is not primary:
+                        self._count('hedge_wins')
+                    return response
+                error = future.exception()
+                self._count('errors', 'agent_llm_attempt_errors_total')
+
+            if hedge_at is not None and time.perf_counter() >= hedge_at and not done:
+                # Slower than usual: race a duplicate against the original
+                hedge_at = None
+                self._count('hedges', 'agent_llm_hedges_total')
+                tracing.annotate(hedged=True)
+                pending.append(self._submit(prompt, kwargs))
+        raise error
+
+    def _submit(self, prompt, kwargs):
+        """Run one generate_content call on its own daemon thread.
+
+        A call that never returns is abandoned when its deadline passes; a
+        daemon thread can't keep the agent from exiting.
+        """
+        self._count('attempts')
+        future = Future()
+
+        def call():
+            started = time.perf_counter()
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result((response, time.perf_counter() - started))
+
+        threading.Thread(target=call, name='llm-call', daemon=True).start()
+        return future
+
+    def _stream(self, prompt, kwargs):
+        """
+        Streaming call: the first chunk is fetched (with retries) before
+        returning, so failures before any output are retried like normal
+        calls. After that each chunk must arrive within the deadline.
+        """
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retries', 'agent_llm_retries_total')
+                self._sleep_backoff(attempt)
+            chunks = queue.Queue()
+            self._count('attempts')
+            threading.Thread(target=self._pump, args=(prompt, kwargs, chunks),
+                             name='llm-stream', daemon=True).start()
+            try:
+                first = self._next_chunk(chunks)
+            except Exception as e:
+                if not self._retryable(e):
+                    raise
+                last_error = e
+                continue
+            return self._rest(first, chunks)
+        if isinstance(last_error, LLMUnavailable):
+            raise last_error
+        raise LLMUnavailable(f"LLM failed after {self.retries + 1} attempts: {last_error}") from last_error
+
+    def _pump(self, prompt, kwargs, chunks):
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                chunks.put(('chunk', chunk))
+            chunks.put(('end', None))
+        except BaseException as e:
+            chunks.put(('error', e))
+
+    def _next_chunk(self, chunks):
+        try:
+            kind, value = chunks.get(timeout=self.deadline)
+        except queue.Empty:
+            self._count('timeouts', 'agent_llm_timeouts_total')
+            raise DeadlineExceeded(f"No LLM output within {self.deadline:.1f} s")
+        if kind == 'error':
+            self._count('errors', 'agent_llm_attempt_errors_total')
+            raise value
+        return value if kind == 'chunk' else None
+
+    def _rest(self, first, chunks):
+        chunk = first
+        while chunk is not None:
+            yield chunk
+            try:
+                chunk = self._next_chunk(chunks)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                raise LLMUnavailable(f"LLM stream failed: {e}") from e
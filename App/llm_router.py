@@ -0,0 +1,344 @@
+"""
+LLM backends and a router that picks one per request.
+
+A backend is one model the Brain can ask: Gemini by model name, a local
+model behind an HTTP endpoint (Ollama-style /api/generate, or
+stubs.StubLLMServer), or any object with generate_content() for tests.
+Each backend keeps live statistics over its recent requests - latency
+percentiles, error rate and how often its answer parsed as a command - and
+has a relative cost and a capability (the most complex input it is trusted
+with, from 0 to 1).
+
+The router scores how complex a command looks and ranks the backends:
+healthy ones before unhealthy ones, capable ones before the rest, ones
+within the latency budget before slow ones, then the cheapest. The Brain
+tries them in that order, moving on when one is unavailable. A small
+fraction of requests explore another capable backend so the statistics of
+a backend that fell out of favour can recover.
+"""
+
+import re
+import json
+import random
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+
+import tracing
+from llm_client import CircuitBreaker, ResilientModel
+
+
+# Relative cost (USD per 1M input tokens) and capability of known models;
+# unknown models get the defaults of their backend class
+KNOWN_MODELS = {
+    'gemini-1.5-flash-8b': (0.0375, 0.3),
+    'gemini-1.5-flash': (0.075, 0.6),
+    'gemini-pro': (0.5, 1.0),
+    'gemini-1.5-pro': (1.25, 1.0),
+}
+
+# Words that suggest several steps, numbered ranges, or conditions and reasoning
+MULTI_STEP = re.compile(r'\b(?:and|then|after|also|plus|each|every|both)\b|,|;')
+RANGE = re.compile(r'\d+\s*(?:to|through|thru|until|-)\s*\w*?\d+')
+REASONING = re.compile(r'\b(?:if|unless|otherwise|why|explain|compare|summari[sz]e|except|depending|'
+                       r'how (?:would|do|can|should))\b')
+
+
+class BackendError(Exception):
+    """An HTTP backend answered with an error status."""
+
+
+class TextResponse:
+    """A response or streamed chunk: just .text, like Gemini's."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class HTTPModel:
+    """GenerativeModel-style client for a local model over HTTP.
+
+    POSTs {"model", "prompt", "stream": false} and reads the reply's "text"
+    (stubs.StubLLMServer) or "response" (Ollama's /api/generate). Like any
+    network client it waits as long as the server takes; the backend puts
+    it behind a ResilientModel for deadlines and retries.
+    """
+
+    def __init__(self, url, model_name=None, chunk_size=16):
+        self.url = url
+        self.model_name = model_name
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        body = {'model': self.model_name, 'prompt': prompt, 'stream': False}
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as reply:
+                payload = json.loads(reply.read())
+        except urllib.error.HTTPError as e:
+            raise BackendError(f"HTTP {e.code}") from None
+        text = payload.get('text', payload.get('response', ''))
+        if stream:
+            return iter([TextResponse(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)])
+        return TextResponse(text)
+
+
+class LLMBackend:
+    """One model the router can choose, with its recent statistics."""
+
+    name = 'model'
+    default_cost = 1.0
+    default_capability = 1.0
+
+    def __init__(self, model=None, name=None, cost=None, capability=None, resilience=True, window=100):
+        """
+        Args:
+            model (object): Anything with generate_content(); subclasses
+                load their own on first use instead
+            name (str): Label in stats, traces and metrics
+            cost (float): Relative price per 1M input tokens
+            capability (float): Most complex input (0-1) this backend is
+                trusted with
+            resilience (bool|dict): ResilientModel options, as for Brain;
+                False calls the model directly
+            window (int): Recent requests the statistics cover
+        """
+        self.name = name or self.name
+        self.cost = self.default_cost if cost is None else cost
+        self.capability = self.default_capability if capability is None else capability
+        self.resilience = resilience
+        # Health checks read the same breaker the ResilientModel trips
+        configured = resilience.get('breaker') if isinstance(resilience, dict) else None
+        self.breaker = configured or CircuitBreaker()
+        self.latencies = deque(maxlen=window)  # Seconds, answered requests only
+        self.outcomes = deque(maxlen=window)  # 'ok', 'parse_failure' or 'error'
+        self.totals = {'requests': 0, 'ok': 0, 'parse_failure': 0, 'error': 0, 'latency': 0.0}
+        self._model = model
+        self._wrapped = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The model behind the resilience policy, loaded on first use."""
+        if self._wrapped is None:
+            with self._lock:
+                if self._wrapped is None:
+                    model = self._model if self._model is not None else self.load()
+                    if self.resilience is False:
+                        self._wrapped = model
+                    else:
+                        options = dict(self.resilience) if isinstance(self.resilience, dict) else {}
+                        options['breaker'] = self.breaker
+                        self._wrapped = ResilientModel(model, **options)
+        return self._wrapped
+
+    def load(self):
+        """Create the underlying model (subclasses)."""
+        raise NotImplementedError
+
+    def record(self, latency, outcome):
+        """
+        Add one request's result to the statistics.
+
+        Args:
+            latency (float): Seconds until the response was complete
+            outcome (str): 'ok', 'parse_failure' (answered, but not a
+                usable command) or 'error' (no answer)
+        """
+        with self._lock:
+            self.outcomes.append(outcome)
+            self.totals['requests'] += 1
+            self.totals[outcome] += 1
+            if outcome != 'error':
+                self.latencies.append(latency)
+                self.totals['latency'] += latency
+        tracing.count('agent_llm_backend_requests_total', backend=self.name, outcome=outcome)
+
+    def percentile(self, pct):
+        """Recent latency percentile in seconds, or None before any answers."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100.0))]
+
+    def error_rate(self):
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return sum(1 for o in self.outcomes if o == 'error') / len(self.outcomes)
+
+    def parse_rate(self):
+        """Fraction of recent answers that parsed as a command."""
+        with self._lock:
+            answered = [o for o in self.outcomes if o != 'error']
+        if not answered:
+            return 1.0
+        return answered.count('ok') / len(answered)
+
+    def available(self):
+        """False while this backend's circuit breaker is open."""
+        return self.breaker.state != 'open' or self.breaker.retry_in() == 0
+
+    def snapshot(self):
+        """Statistics for /stats, reports and benchmarks."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            'backend': self.name, 'cost': self.cost, 'capability': self.capability,
+            'requests': self.totals['requests'], 'breaker': self.breaker.state,
+            'p50_ms': None if p50 is None else round(p50 * 1000, 1),
+            'p95_ms': None if p95 is None else round(p95 * 1000, 1),
+            'error_rate': round(self.error_rate(), 3), 'parse_rate': round(self.parse_rate(), 3),
+        }
+
+
+class GeminiBackend(LLMBackend):
+    """A Gemini model through google.generativeai."""
+
+    name = 'gemini'
+    default_cost = 0.5
+
+    def __init__(self, api_key, model_name='gemini-pro', **options):
+        cost, capability = KNOWN_MODELS.get(model_name, (None, None))
+        options.setdefault('cost', cost)
+        options.setdefault('capability', capability)
+        options.setdefault('name', model_name)
+        super().__init__(**options)
+        self.api_key = api_key
+        self.model_name = model_name
+
+    def load(self):
+        import google.generativeai as genai
+
+        genai.configure(api_key=self.api_key)
+        return genai.GenerativeModel(self.model_name)
+
+
+class HTTPBackend(LLMBackend):
+    """A local model served over HTTP (see HTTPModel)."""
+
+    name = 'local'
+    default_cost = 0.0
+    default_capability = 0.25
+
+    def __init__(self, url, model_name=None, **options):
+        options.setdefault('name', model_name or self.name)
+        super().__init__(**options)
+        self.url = url
+        self.model_name = model_name
+
+    def load(self):
+        return HTTPModel(self.url, self.model_name)
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'http': HTTPBackend,
+}
+
+
+def create_backend(spec, api_key=None, **options):
+    """
+    Build a backend from a command-line spec.
+
+    'gemini:<model>' (e.g. gemini:gemini-1.5-flash-8b) or 'http:<url>'
+    (optionally 'http:<url>#<model>' for Ollama-style servers).
+    """
+    kind, _, target = spec.partition(':')
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {kind}. Choose from {', '.join(BACKENDS)}")
+    if kind == 'gemini':
+        return GeminiBackend(api_key, target or 'gemini-pro', **options)
+    url, _, model_name = target.partition('#')
+    if not url:
+        raise ValueError("An http backend needs a URL, e.g. http:http://127.0.0.1:11434/api/generate")
+    return HTTPBackend(url, model_name or None, **options)
+
+
+def complexity(user_input):
+    """
+    Rough 0-1 score of how hard a command is to turn into an action.
+
+    Long commands, several steps ("and then", commas) and conditions or
+    questions push it up; "open notepad" scores near 0.
+    """
+    text = user_input.lower()
+    words = len(text.split())
+    score = min(words, 30) / 30 * 0.4
+    score += min(len(MULTI_STEP.findall(text)), 3) * 0.2
+    score += 0.25 if RANGE.search(text) else 0.0
+    score += min(len(REASONING.findall(text)), 2) * 0.25
+    return round(min(score, 1.0), 3)
+
+
+class LLMRouter:
+    """Chooses a backend per request from complexity and live statistics."""
+
+    def __init__(self, backends, latency_budget=3.0, max_error_rate=0.5, min_parse_rate=0.7,
+                 explore=0.05, seed=None):
+        """
+        Args:
+            backends (list): LLMBackends; the order breaks ties
+            latency_budget (float): Backends whose recent p95 is above this
+                many seconds are used only if nothing faster is capable
+            max_error_rate (float): Recent error rate above which a backend
+                counts as unhealthy
+            min_parse_rate (float): Recent parse-success rate below which a
+                backend counts as unhealthy
+            explore (float): Fraction of requests sent to another capable
+                backend to keep its statistics fresh
+            seed (int): Seed for exploration (repeatable runs)
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = list(backends)
+        self.latency_budget = latency_budget
+        self.max_error_rate = max_error_rate
+        self.min_parse_rate = min_parse_rate
+        self.explore = explore
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def healthy(self, backend):
+        return (backend.available() and backend.error_rate() <= self.max_error_rate
+                and backend.parse_rate() >= self.min_parse_rate)
+
+    def route(self, user_input):
+        """
+        Backends to try for this command, best first.
+
+        Returns:
+            list: Every backend, ranked
+        """
+        if len(self.backends) == 1:
+            return list(self.backends)
+        score = complexity(user_input)
+
+        def rank(entry):
+            position, backend = entry
+            capable = backend.capability >= score
+            p95 = backend.percentile(95)
+            slow = p95 is not None and p95 > self.latency_budget
+            # Among capable backends the cheapest wins; otherwise the most capable
+            preference = backend.cost if capable else -backend.capability
+            return (not self.healthy(backend), not capable, slow, preference, p95 or 0.0, position)
+
+        ranked = [backend for _, backend in sorted(enumerate(self.backends), key=rank)]
+        with self._lock:
+            exploring = self._random.random() < self.explore
+            if exploring:
+                others = [b for b in ranked[1:] if b.capability >= score and b.available()]
+                pick = self._random.choice(others) if others else None
+        if exploring and pick is not None:
+            ranked.remove(pick)
+            ranked.insert(0, pick)
+        tracing.annotate(complexity=score)
+        return ranked
+
+    def snapshot(self):
+        """Per-backend statistics."""
+        return [backend.snapshot() for backend in self.backends]
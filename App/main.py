@@ -10,44 +10,131 @@ This is the main entry point for the OS Agent that can:
 Usage:
     python main.py --mode voice    # Voice mode (default)
     python main.py --mode text     # Text mode
+    python main.py --mode server   # Local HTTP API for scripts (see server.py)
+    python main.py --mode batch --input commands.txt > results.jsonl
+    python main.py --serial        # One command at a time, no pipelining
+    python main.py --stream        # Act on streamed LLM output as soon as it parses
+    python main.py --profile       # Write span traces and metrics to .agent_cache/profile
 """
 
 import sys
+import asyncio
 import argparse
+import contextlib
+import functools
+import itertools
+import threading
 from pathlib import Path
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 
 # Import our modules
+import tracing
 from speech_engine import Listener, Speaker
 from brain import Brain
 from executor import ActionExecutor
 
 
+EXIT_WORDS = ['exit', 'quit', 'stop', 'goodbye']
+
+# Pipeline stage return markers
+_DROP = object()
+_EXIT = object()
+
+
+class _Job:
+    """One command as it moves through the pipeline stages."""
+
+    def __init__(self, id):
+        self.id = id  # Ties the stage spans of one command together
+        self.audio = None
+        self.text = None
+        self.command = None
+        self.result = None  # Set early to skip the remaining stages
+        self.speech_key = None  # Speaker coalescing key for the result
+        self.speculation = None  # Speculative parses of this utterance's partial transcripts
+
+
 class OSAgent:
     """Main OS Agent class that ties everything together."""
     
-    def __init__(self, mode='voice'):
+    def __init__(self, mode='voice', pipelined=True, queue_size=4, stream=False, prewarm=False,
+                 continuous=False, stt='google', persistent_shell=False, screen='auto',
+                 speculate=False, profile=None, mode_options=None, llm_options=None,
+                 llm_backends=None, brain=None, executor=None, listener=None, speaker=None):
         """
         Initialize the OS Agent.
         
         Args:
-            mode (str): 'voice' or 'text'
+            mode (str): 'voice', 'text', 'server' or 'batch'
+            pipelined (bool): Overlap listen/think/execute/speak stages.
+                False falls back to the serial loop.
+            queue_size (int): Max commands buffered between pipeline stages
+            stream (bool): Stream LLM responses and act as soon as the
+                command is parsed
+            prewarm (bool): Load the LLM client and start the file index scan
+                in the background at startup instead of on first use
+            continuous (bool): Keep the microphone open in the background
+                (voice mode) so speech between commands isn't lost
+            stt (str): Speech recognizer backend ('google' or 'vosk')
+            persistent_shell (bool): Reuse one shell process for run_command
+            screen (str): Screen capture backend ('auto', 'mss', 'pyautogui'
+                or 'fake')
+            speculate (bool): Voice mode, pipelined: parse partial
+                transcripts while recognition is still running
+            profile (str): Folder for span traces and metrics; None leaves
+                tracing off
+            mode_options (dict): Settings for server mode (AgentServer
+                arguments) or batch mode (input, output, concurrency,
+                independent)
+            llm_options (dict): Deadline/retry/hedging settings for the LLM
+                client (ResilientModel arguments); False calls it directly
+            llm_backends (list): Backend specs to route between (see
+                llm_router.create_backend); None uses gemini-pro alone
+            brain, executor, listener, speaker: Ready-made components to use
+                instead of the real ones (tests and benchmarks pass stubs)
         """
         self.mode = mode
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.stream = stream
+        self.mode_options = mode_options or {}
         self.running = False
+        self._command_ids = itertools.count(1)
+        self.tracer = tracing.enable(profile) if profile else None
+        self.speculator = None
         
         # Initialize components
         print("Initializing OS Agent...")
         
         try:
             # Always need the brain and executor
-            self.brain = Brain()
-            self.executor = ActionExecutor()
+            self.brain = brain or Brain(resilience=True if llm_options is None else llm_options,
+                                        backends=llm_backends)
+            self.executor = executor or ActionExecutor(persistent_shell=persistent_shell,
+                                                       screen_backend=screen)
+            # Announce background jobs (folder deletes, copies) when they end
+            self.executor.job_callback = self.announce_job
+            self.executor.notify_callback = self.announce
+            # Show command output as it is produced, in every mode
+            self.executor.output_callback = self.stream_output
+            if prewarm:
+                self.brain.prewarm()
+                self.executor.prewarm()
             
             # Speech components only for voice mode
             if mode == 'voice':
-                self.speaker = Speaker()
-                self.listener = Listener()
+                self.speaker = speaker or Speaker()
+                self.listener = listener or Listener(continuous=continuous, backend=stt)
+                # Barge-in: new speech cuts off whatever the agent is saying;
+                # the listener ignores the agent's own voice while it plays
+                self.listener.on_speech = self.speaker.interrupt
+                self.listener.is_playing = self.speaker.is_speaking
+                if speculate and pipelined:
+                    from speculation import Speculator
+                    self.speculator = Speculator(self.brain, self.executor)
                 self.speaker.speak("OS Agent initialized. I'm ready to help!")
+            elif mode in ('server', 'batch'):
+                print(f"OS Agent initialized in {mode.upper()} mode.")
             else:
                 print("OS Agent initialized in TEXT mode. Type 'exit' to quit.")
                 
@@ -55,35 +142,79 @@ class OSAgent:
             print(f"Failed to initialize: {e}")
             sys.exit(1)
 
-    def output(self, message):
-        """Output a message (voice or text depending on mode)."""
+    def output(self, message, wait=True, key=None):
+        """
+        Output a message (voice or text depending on mode).
+        
+        Args:
+            message (str): Text to say or print
+            wait (bool): Block until the message has been spoken
+            key (str): Speaker coalescing key (see Speaker.speak)
+        """
         if self.mode == 'voice':
-            self.speaker.speak(message)
+            self.speaker.speak(message, async_mode=not wait, key=key)
         else:
             print(f"Agent: {message}")
 
+    def announce(self, message):
+        """Report something that happened in the background (called from any thread)."""
+        self.output(message, wait=False)
+
+    def announce_job(self, job):
+        """Report a finished background job (called from its worker thread)."""
+        self.output(job.result, wait=False, key=f"job-{job.id}")
+
+    def stream_output(self, line):
+        """Show one line of live command output (called from the command's thread)."""
+        if self.mode == 'voice':
+            # A line still waiting to be spoken is replaced by the newest one
+            self.output(line, wait=False, key='command-output')
+        else:
+            print(f"  | {line}")  # To stderr in batch mode, where stdout holds the results
+
     def get_input(self):
         """Get input from user (voice or text)."""
         if self.mode == 'voice':
-            result = self.listener.listen()
-            
-            # Handle errors
-            if result == "ERROR:TIMEOUT":
-                return None  # Silent timeout
-            elif result == "ERROR:UNCLEAR":
-                self.output("Sorry, I didn't catch that. Could you repeat?")
-                return None
-            elif result.startswith("ERROR"):
-                self.output("I'm having trouble hearing you.")
-                return None
-            
-            return result
+            return self.check_input(self.listener.listen())
         else:
-            try:
-                user_input = input("You: ").strip()
-                return user_input if user_input else None
-            except EOFError:
-                return "exit"
+            return self.read_text()
+
+    def read_text(self):
+        """Read one line of text input."""
+        try:
+            user_input = input("You: ").strip()
+            return user_input if user_input else None
+        except EOFError:
+            return "exit"
+
+    def check_input(self, result):
+        """
+        Turn listener errors into user feedback.
+        
+        Returns:
+            str: Recognized text, or None if there is nothing to process
+        """
+        text, feedback = self.classify_input(result)
+        if feedback:
+            self.output(feedback)
+        return text
+
+    def classify_input(self, result):
+        """
+        Split a listener result into text to process and feedback to give.
+        
+        Returns:
+            tuple: (text or None, feedback message or None)
+        """
+        # Handle errors
+        if result == "ERROR:TIMEOUT":
+            return None, None  # Silent timeout
+        elif result == "ERROR:UNCLEAR":
+            return None, "Sorry, I didn't catch that. Could you repeat?"
+        elif result.startswith("ERROR"):
+            return None, "I'm having trouble hearing you."
+        
+        return result, None
 
     def process_command(self, command_dict):
         """
@@ -110,41 +241,134 @@ class OSAgent:
             result = self.executor.execute(action, params)
             return result
 
-    def run(self):
-        """Main event loop."""
-        self.running = True
-        
+    def dispatch(self, command_dict):
+        """Execute a command and output its result."""
+        self.output(self.process_command(command_dict))
+
+    def print_banner(self):
+        """Print the startup banner."""
         print("\n" + "="*60)
         print("OS AGENT ACTIVE")
         print("="*60)
         if self.mode == 'voice':
             print("Speak your commands. Say 'exit' or 'quit' to stop.")
+        elif self.mode == 'server':
+            print("Serving API requests. Press Ctrl+C to stop.")
+        elif self.mode == 'batch':
+            print("Running commands from the batch input. Press Ctrl+C to stop.")
         else:
             print("Type your commands. Type 'exit' or 'quit' to stop.")
         print("="*60 + "\n")
+
+    def run(self):
+        """Main event loop."""
+        self.running = True
+        self.print_banner()
         
+        try:
+            if self.mode == 'server':
+                self.run_server()
+            elif self.mode == 'batch':
+                self.run_batch()
+            elif self.pipelined:
+                asyncio.run(self.run_pipeline())
+            else:
+                self.run_serial()
+        except KeyboardInterrupt:
+            print("\n\nInterrupted by user.")
+            self.running = False
+            if self.mode == 'voice':
+                self.speaker.interrupt()
+        finally:
+            self.executor.close(report=self.output)
+            if self.mode == 'voice':
+                self.speaker.close()
+            if self.speculator is not None:
+                self.speculator.close()
+                self.report_speculation()
+            if self.tracer is not None:
+                self.report_profile()
+
+        print("\nOS Agent terminated.")
+
+    def report_profile(self):
+        """Write out the trace and metrics and print where the time went."""
+        tracing.disable()
+        print(f"\nProfile: {self.tracer.trace_path}")
+        print(f"Metrics: {self.tracer.metrics_path}")
+        for label, count, mean_ms, total_ms in self.tracer.summary()[:12]:
+            print(f"  {label:<44} {count:>5} x {mean_ms:9.1f} ms = {total_ms / 1000:8.2f} s")
+
+    def report_speculation(self):
+        """Print how often speculation on partial transcripts paid off."""
+        report = self.speculator.report()
+        print(f"\nSpeculation: {report['hits']}/{report['utterances']} hits ({report['hit_rate']:.0%}), "
+              f"{report['saved_ms_avg']:.0f} ms saved per hit, {report['speculations']} speculative "
+              f"thinks ({report['wasted']} unused), {report['prepared']} actions prepared")
+
+    def run_server(self):
+        """Server loop: answer API requests until interrupted."""
+        from server import AgentServer
+        
+        server = AgentServer(self.brain, self.executor, **self.mode_options)
+        print(f"Listening on {server.address}")
+        try:
+            server.serve_forever()
+        finally:
+            server.close()
+
+    def run_batch(self):
+        """Batch loop: run every command of the input and write JSONL results."""
+        from batch import BatchRunner, read_items
+        
+        options = self.mode_options
+        runner = BatchRunner(self.brain, self.executor, concurrency=options.get('concurrency', 8))
+        with contextlib.ExitStack() as files:
+            source = options.get('input') or '-'
+            lines = sys.stdin if source == '-' else files.enter_context(open(source, encoding='utf-8'))
+            out = options.get('output') or sys.stdout
+            if isinstance(out, str):
+                out = files.enter_context(open(out, 'w', encoding='utf-8'))
+            stats = runner.run(read_items(lines, independent=options.get('independent', False)), out)
+        
+        print(f"{stats['commands']} commands in {stats['wall']:.2f} s "
+              f"({stats['failed']} failed); think {stats['think_time']:.2f} s, "
+              f"execute {stats['execute_time']:.2f} s in total")
+
+    def run_serial(self):
+        """Serial loop: listen, think, execute and speak one command at a time."""
         while self.running:
+            command_id = next(self._command_ids)
             try:
                 # Get user input
-                user_input = self.get_input()
+                with tracing.span('stage', stage='listen', command=command_id):
+                    user_input = self.get_input()
                 
                 if user_input is None:
                     continue
                 
                 # Check for exit commands
-                if user_input.lower() in ['exit', 'quit', 'stop', 'goodbye']:
+                if user_input.lower() in EXIT_WORDS:
                     self.output("Goodbye! Shutting down OS Agent.")
                     self.running = False
                     break
                 
                 # Process with brain
-                command = self.brain.think(user_input)
+                if self.stream:
+                    # Execute and reply as soon as the command is parsed
+                    with tracing.span('stage', stage='think', command=command_id):
+                        self.brain.think_stream(user_input, on_command=self.dispatch)
+                    continue
+                with tracing.span('stage', stage='think', command=command_id):
+                    command = self.brain.think(user_input)
                 
                 # Execute command
-                result = self.process_command(command)
+                with tracing.span('stage', stage='execute', command=command_id):
+                    result = self.process_command(command)
                 
                 # Output result
-                self.output(result)
+                with tracing.span('stage', stage='speak', command=command_id):
+                    self.output(result)
                 
             except KeyboardInterrupt:
                 print("\n\nInterrupted by user.")
@@ -153,22 +377,235 @@ class OSAgent:
             except Exception as e:
                 error_msg = f"An error occurred: {str(e)}"
                 print(f"ERROR: {error_msg}")
+                tracing.count('agent_errors_total', stage='serial')
                 self.output("Sorry, something went wrong.")
 
-        print("\nOS Agent terminated.")
+    async def run_pipeline(self):
+        """
+        Pipelined loop: capture, recognize, think, execute and speak run as
+        separate stages joined by bounded queues, so the next command can be
+        captured and parsed while the previous result is still being spoken.
+        
+        Each stage has a single worker and its own thread for blocking calls,
+        so results come out in the order the commands went in, and every
+        component (e.g. the pyttsx3 engine) is only ever used from one thread.
+        """
+        loop = asyncio.get_running_loop()
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(4)]
+        
+        def forward_to_execute(job):
+            # Lets a streaming think stage hand a job on before it returns
+            asyncio.run_coroutine_threadsafe(queues[2].put(job), loop).result()
+        
+        stages = [
+            ('recognize', self._recognize_stage),
+            ('think', functools.partial(self._think_stage, forward_to_execute)),
+            ('execute', self._execute_stage),
+            ('speak', self._speak_stage),
+        ]
+        pools = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'agent-{name}')
+                 for name, _ in stages}
+        
+        # Capture blocks on input()/the microphone with no way to interrupt it,
+        # so it runs on a daemon thread rather than a pool worker
+        capture = threading.Thread(target=self._capture_worker, args=(loop, queues[0]),
+                                   name='agent-capture', daemon=True)
+        capture.start()
+        
+        tasks = []
+        for i, (name, handler) in enumerate(stages):
+            out_queue = queues[i + 1] if i + 1 < len(stages) else None
+            tasks.append(asyncio.create_task(
+                self._stage_loop(name, handler, pools[name], queues[i], out_queue)))
+        
+        try:
+            # The speak stage finishes last, after the exit sentinel drains through
+            await tasks[-1]
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=False)
+
+    def _capture_worker(self, loop, out_queue):
+        """Capture stage: keep recording input until an exit is requested."""
+        def put(job):
+            # Blocks while the queue is full, giving backpressure
+            asyncio.run_coroutine_threadsafe(out_queue.put(job), loop).result()
+        
+        try:
+            while self.running:
+                job = _Job(next(self._command_ids))
+                if self.mode == 'voice':
+                    with tracing.span('stage', stage='capture', command=job.id):
+                        job.audio = self.listener.capture()
+                else:
+                    job.text = self.read_text()
+                    if job.text is None:
+                        continue
+                    if job.text.lower() in EXIT_WORDS:
+                        break
+                if not self.running:
+                    return
+                put(job)
+            put(None)
+        except (RuntimeError, CancelledError):
+            pass  # Event loop already closed, or shutting down with a put() still waiting
+
+    async def _stage_loop(self, name, handler, pool, in_queue, out_queue):
+        """Run one stage: pull jobs, process them off-loop, pass them on in order."""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await in_queue.get()
+            
+            if job is not None and (job.result is None or out_queue is None):
+                try:
+                    job = await loop.run_in_executor(pool, self._run_stage, name, handler, job)
+                except Exception as e:
+                    print(f"ERROR: An error occurred in {name}: {str(e)}")
+                    tracing.count('agent_errors_total', stage=name)
+                    job.result = "Sorry, something went wrong."
+                if job is _DROP:
+                    continue
+            
+            if job is None or job is _EXIT:
+                if out_queue is not None:
+                    await out_queue.put(None)
+                else:
+                    await loop.run_in_executor(pool, self.output, "Goodbye! Shutting down OS Agent.")
+                break
+            
+            if out_queue is not None:
+                await out_queue.put(job)
+
+    def _run_stage(self, name, handler, job):
+        with tracing.span('stage', stage=name, command=job.id):
+            return handler(job)
+
+    def _recognize_stage(self, job):
+        if self.mode == 'voice':
+            if isinstance(job.audio, str):
+                text = job.audio
+            elif self.speculator is not None:
+                job.speculation = self.speculator.session()
+                text = self.listener.recognize(job.audio, on_partial=job.speculation.partial)
+            else:
+                text = self.listener.recognize(job.audio)
+            if text.lower() in EXIT_WORDS:
+                self.running = False
+                return _EXIT
+            job.text, job.result = self.classify_input(text)
+            if job.text is None and job.speculation is not None:
+                job.speculation.cancel()
+            if job.text is None and job.result is None:
+                return _DROP
+            if job.result is not None:
+                job.speech_key = 'feedback'  # A newer "didn't catch that" replaces an unspoken one
+        return job
+
+    def _think_stage(self, forward, job):
+        command = job.speculation.final(job.text) if job.speculation is not None else None
+        if command is not None:
+            job.command = command
+            return job
+        if self.stream:
+            def on_command(command):
+                job.command = command
+                forward(job)
+            self.brain.think_stream(job.text, on_command=on_command)
+            return _DROP  # Already forwarded
+        job.command = self.brain.think(job.text)
+        return job
+
+    def _execute_stage(self, job):
+        job.result = self.process_command(job.command)
+        return job
+
+    def _speak_stage(self, job):
+        # Queue the reply and move on; long outputs never hold up the next command
+        self.output(job.result, wait=False, key=job.speech_key)
+        return job
 
 
 def main():
     """Entry point."""
     parser = argparse.ArgumentParser(description='OS Agent - Voice/Text System Controller')
     parser.add_argument('--mode', type=str, default='voice', 
-                       choices=['voice', 'text'],
-                       help='Input mode: voice or text (default: voice)')
+                       choices=['voice', 'text', 'server', 'batch'],
+                       help='Input mode: voice, text, server (local HTTP API) or batch (default: voice)')
+    parser.add_argument('--serial', action='store_true',
+                       help='Handle one command at a time instead of pipelining stages')
+    parser.add_argument('--stream', action='store_true',
+                       help='Stream LLM responses and act as soon as the command is parsed')
+    parser.add_argument('--prewarm', action='store_true',
+                       help='Load the LLM client and scan the file index in the background during startup')
+    parser.add_argument('--continuous', action='store_true',
+                       help='Voice mode: listen continuously in the background')
+    parser.add_argument('--stt', type=str, default='google', choices=['google', 'vosk'],
+                       help='Speech recognizer: google (online) or vosk (offline, needs VOSK_MODEL_PATH)')
+    parser.add_argument('--speculate', action='store_true',
+                       help='Voice mode: start parsing partial transcripts before recognition finishes')
+    parser.add_argument('--persistent-shell', action='store_true',
+                       help='Run shell commands in one long-lived session (keeps cd, variables)')
+    parser.add_argument('--screen', type=str, default='auto', choices=['auto', 'mss', 'pyautogui', 'fake'],
+                       help='Screen capture backend (fake draws a synthetic screen for headless runs)')
+    parser.add_argument('--profile', nargs='?', const=str(tracing.DEFAULT_PROFILE_DIR), metavar='DIR',
+                       help='Trace every stage and action; write JSONL spans and Prometheus metrics to DIR')
+    
+    parser.add_argument('--llm-deadline', type=float, default=10.0, metavar='SECONDS',
+                       help='Give up on an LLM attempt after this long (default: 10)')
+    parser.add_argument('--llm-retries', type=int, default=2,
+                       help='Retries after a failed or timed-out LLM attempt (default: 2)')
+    parser.add_argument('--hedge', action='store_true',
+                       help='Send a duplicate LLM request when one is slower than the recent p95')
+    parser.add_argument('--llm-backend', action='append', metavar='SPEC',
+                       help='Route between several models: gemini:<model> or http:<url>[#model] '
+                            '(repeat the flag; default: gemini:gemini-pro)')
+    parser.add_argument('--no-llm-resilience', action='store_true',
+                       help='Call the LLM directly: no deadline, retries or circuit breaker')
+    
+    parser.add_argument('--host', default='127.0.0.1', help='Server mode: interface to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Server mode: TCP port')
+    parser.add_argument('--socket', metavar='PATH', help='Server mode: listen on a Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=8, help='Server mode: requests handled at the same time')
+    parser.add_argument('--queue-size', type=int, default=64,
+                       help='Server mode: waiting requests accepted before answering 503')
+    parser.add_argument('--token', help='Server mode: require "Authorization: Bearer TOKEN" '
+                                        '(default: AGENT_SERVER_TOKEN)')
+    parser.add_argument('--allow-confirmed', action='store_true',
+                       help='Server mode: let clients send "confirmed": true to delete files and run commands')
+    
+    parser.add_argument('--input', default='-', metavar='FILE',
+                       help='Batch mode: commands, one per line (default: stdin)')
+    parser.add_argument('--output', default='-', metavar='FILE',
+                       help='Batch mode: JSONL results (default: stdout)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                       help='Batch mode: LLM calls in flight at once')
+    parser.add_argument('--independent', action='store_true',
+                       help='Batch mode: commands may run in parallel, not only in input order')
     
     args = parser.parse_args()
+    if args.mode == 'server':
+        mode_options = {'host': args.host, 'port': args.port, 'socket_path': args.socket,
+                        'workers': args.workers, 'queue_size': args.queue_size, 'token': args.token,
+                        'allow_confirmed': args.allow_confirmed}
+    elif args.mode == 'batch':
+        mode_options = {'input': args.input, 'output': args.output if args.output != '-' else sys.stdout,
+                        'concurrency': args.concurrency, 'independent': args.independent}
+        # stdout is reserved for results; progress messages go to stderr
+        sys.stdout = sys.stderr
+    else:
+        mode_options = None
+    llm_options = False if args.no_llm_resilience else {
+        'deadline': args.llm_deadline, 'retries': args.llm_retries, 'hedge': args.hedge}
     
     # Create and run agent
-    agent = OSAgent(mode=args.mode)
+    agent = OSAgent(mode=args.mode, pipelined=not args.serial, stream=args.stream,
+                    prewarm=args.prewarm, continuous=args.continuous, stt=args.stt,
+                    persistent_shell=args.persistent_shell, screen=args.screen, speculate=args.speculate,
+                    profile=args.profile,
+                    mode_options=mode_options, llm_options=llm_options, llm_backends=args.llm_backend)
     agent.run()
 
 
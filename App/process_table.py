@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+
+from fuzzy import NameMatcher, normalize_name
+
+
+class ProcessTable:
+    """Cheap, briefly cached snapshot of running processes with fuzzy lookup.
+
+    On Linux the snapshot is read straight from /proc; elsewhere psutil is
+    used when installed, with one tasklist/ps call as the fallback. Several
+    lookups within the cache TTL share one snapshot. Only the current user's
+    processes are listed, since those are the ones it may signal.
+    """
+
+    def __init__(self, ttl=1.0, aliases=None):
+        """
+        Args:
+            ttl (float): Seconds a snapshot stays valid
+            aliases (dict): Spoken name -> process names (defaults to the
+                app launcher's aliases)
+        """
+        if aliases is None:
+            from app_index import ALIASES as aliases
+        self.ttl = ttl
+        self.aliases = {normalize_name(k): v for k, v in aliases.items()}
+        self.processes = []
+        self.matcher = NameMatcher()
+        # Script and file arguments ("python script.py"), tried when no program name matches
+        self.arg_matcher = NameMatcher()
+        self.taken_at = 0.0
+        self.uid = os.getuid() if hasattr(os, 'getuid') else None
+        # Never match the agent itself or whatever launched it
+        self.protected = {os.getpid(), os.getppid(), 0, 1}
+
+    def snapshot(self, force=False):
+        """
+        Current process list, reusing the cached one while it is fresh.
+
+        Returns:
+            list: Dicts with 'pid', 'name', 'cmdline' and 'uid'
+        """
+        if force or time.monotonic() - self.taken_at > self.ttl:
+            if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+                processes = self._read_proc()
+            else:
+                processes = self._read_psutil()
+                if processes is None:
+                    processes = self._read_command()
+            self.processes = [p for p in processes if p['pid'] not in self.protected
+                              and (self.uid is None or p.get('uid') in (None, self.uid))]
+            self.matcher = NameMatcher()
+            self.arg_matcher = NameMatcher()
+            for process in self.processes:
+                self.matcher.add(self._strip_ext(process['name']), process)
+                if process['cmdline']:
+                    program = os.path.basename(process['cmdline'][0])
+                    if program and program != process['name']:
+                        self.matcher.add(self._strip_ext(program), process)
+                for arg in process['cmdline'][1:]:
+                    if not arg.startswith('-'):
+                        name = os.path.basename(arg.rstrip('/\\'))
+                        self.arg_matcher.add(os.path.splitext(name)[0] or name, process)
+            self.taken_at = time.monotonic()
+        return self.processes
+
+    def _strip_ext(self, name):
+        return name[:-4] if name.lower().endswith('.exe') else name
+
+    def _read_proc(self):
+        processes = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                uid = os.stat(f'/proc/{entry}').st_uid
+                if uid != self.uid:
+                    continue  # Another user's; not ours to close
+                with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                    cmdline = [part.decode('utf-8', 'replace') for part in f.read().split(b'\0') if part]
+                if not cmdline:
+                    continue  # Kernel thread or zombie
+                with open(f'/proc/{entry}/comm', 'r') as f:
+                    name = f.read().strip()
+            except OSError:
+                continue  # Exited while we were reading
+            processes.append({'pid': int(entry), 'name': name, 'cmdline': cmdline, 'uid': uid})
+        return processes
+
+    def _read_psutil(self):
+        try:
+            import psutil
+        except ImportError:
+            return None
+        processes = []
+        fields = ['pid', 'name', 'cmdline'] + (['uids'] if self.uid is not None else [])
+        for proc in psutil.process_iter(fields):
+            info = proc.info
+            uids = info.get('uids')
+            processes.append({'pid': info['pid'], 'name': info['name'] or '',
+                              'cmdline': info['cmdline'] or [], 'uid': uids.real if uids else None})
+        return processes
+
+    def _read_command(self):
+        processes = []
+        if sys.platform == 'win32':
+            output = subprocess.run(['tasklist', '/FO', 'CSV', '/NH'],
+                                    capture_output=True, text=True).stdout
+            for line in output.splitlines():
+                fields = [field.strip('"') for field in line.split('","')]
+                if len(fields) >= 2 and fields[1].isdigit():
+                    processes.append({'pid': int(fields[1]), 'name': fields[0], 'cmdline': []})
+        else:
+            output = subprocess.run(['ps', '-axo', 'pid=,uid=,comm='],
+                                    capture_output=True, text=True).stdout
+            for line in output.splitlines():
+                fields = line.split(None, 2)
+                if len(fields) == 3 and fields[0].isdigit() and fields[1].isdigit():
+                    command = fields[2].strip()
+                    processes.append({'pid': int(fields[0]), 'name': os.path.basename(command),
+                                      'cmdline': [command], 'uid': int(fields[1])})
+        return processes
+
+    def find(self, app_name, min_score=0.75):
+        """
+        Processes that match a spoken application name.
+
+        Aliases are tried first ("calculator" -> calc, gnome-calculator);
+        otherwise every process whose name is close enough to the best
+        match is returned, so all windows/instances close together. Only
+        when no program name matches are script and file arguments tried
+        ("my script" -> python script.py).
+
+        Returns:
+            list: Matching process dicts
+        """
+        self.snapshot()
+        for candidate in self.aliases.get(normalize_name(app_name), []):
+            matches = self.matcher.exact(candidate)
+            if matches:
+                return self._unique(matches)
+
+        results = (self.matcher.search(app_name, limit=10, min_score=min_score)
+                   or self.arg_matcher.search(app_name, limit=10, min_score=min_score))
+        if not results:
+            return []
+        best = results[0][0]
+        matches = []
+        for score, _, processes in results:
+            if score >= best - 0.05:
+                matches.extend(processes)
+        return self._unique(matches)
+
+    def _unique(self, processes):
+        seen = set()
+        unique = []
+        for process in processes:
+            if process['pid'] not in seen:
+                seen.add(process['pid'])
+                unique.append(process)
+        return unique
+
+    def terminate(self, processes, timeout=3.0):
+        """
+        Close several processes in one batch: ask politely first, then force
+        whatever is still running after the timeout.
+
+        Returns:
+            tuple: (closed processes, processes that survived)
+        """
+        if not processes:
+            return [], []
+        pids = [p['pid'] for p in processes]
+
+        self._signal(pids, force=False)
+        remaining = self._wait_for_exit(pids, timeout)
+        if remaining:
+            self._signal(remaining, force=True)
+            remaining = self._wait_for_exit(remaining, timeout)
+
+        self.taken_at = 0.0  # The table changed
+        closed = [p for p in processes if p['pid'] not in remaining]
+        survived = [p for p in processes if p['pid'] in remaining]
+        return closed, survived
+
+    def _signal(self, pids, force):
+        if sys.platform == 'win32':
+            command = ['taskkill'] + (['/F'] if force else [])
+            for pid in pids:
+                command += ['/PID', str(pid)]
+            subprocess.run(command, capture_output=True, text=True)
+            return
+        sig = signal.SIGKILL if force else signal.SIGTERM
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _wait_for_exit(self, pids, timeout):
+        """Poll until the processes exit; returns the pids still alive."""
+        deadline = time.monotonic() + timeout
+        remaining = list(pids)
+        delay = 0.01
+        while remaining:
+            if sys.platform == 'win32':
+                running = {p['pid'] for p in self.snapshot(force=True)}
+                remaining = [pid for pid in remaining if pid in running]
+            else:
+                remaining = [pid for pid in remaining if self._alive(pid)]
+            if not remaining or time.monotonic() >= deadline:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+        return remaining
+
+    def _alive(self, pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        if not os.path.isdir('/proc'):
+            return True
+        # Exited children linger as zombies until reaped; they are gone for our purposes
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+        except (OSError, IndexError):
+            return True
@@ -0,0 +1,205 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / '.agent_cache' / 'responses.sqlite3'
+
+# Words that don't change the meaning of a command at its start or end
+FILLER_WORDS = {'please', 'pls', 'um', 'uh', 'er', 'hmm', 'hey', 'ok', 'okay', 'kindly', 'thanks'}
+# Bumped when normalize_input changes, so old keys are never hit
+KEY_VERSION = '2'
+FILLER_PHRASES = re.compile(r'^(?:(?:can|could|would|will) you)\b\s*', re.IGNORECASE)
+
+
+def normalize_input(user_input):
+    """
+    Reduce a command to a canonical cache key.
+
+    Collapses whitespace and removes filler ("please", "can you", ...) from
+    the start and end. Case, symbols and words in the middle are kept:
+    "C++" and "C#", "README.md" and "2+2" are different commands.
+
+    Args:
+        user_input (str): Raw user command
+
+    Returns:
+        str: Normalized command
+    """
+    words = user_input.split()
+    while words:
+        text = ' '.join(words)
+        phrase = FILLER_PHRASES.match(text)
+        if phrase:
+            words = text[phrase.end():].split()
+        elif words[0].strip(',.!?').lower() in FILLER_WORDS:
+            words = words[1:]
+        else:
+            break
+    while words and words[-1].strip(',.!?').lower() in FILLER_WORDS:
+        words = words[:-1]
+    return ' '.join(words).rstrip(',.!?')
+
+
+def fingerprint(*parts):
+    """Short stable hash of the prompt/model configuration (and the key format)."""
+    digest = hashlib.sha256('\0'.join((KEY_VERSION,) + parts).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class ResponseCache:
+    """LRU + TTL cache of Brain responses, persisted to SQLite."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, namespace='', max_entries=512, ttl=7 * 24 * 3600):
+        """
+        Initialize the cache and load warm entries from disk.
+
+        Args:
+            path (str|Path): SQLite file, or None for a memory-only cache
+            namespace (str): Prefix mixed into every key (prompt/model hash)
+            max_entries (int): Maximum entries kept in memory and on disk
+            ttl (float): Seconds before an entry expires
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (stored_at, command)
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'stores': 0}
+        self.lock = threading.Lock()
+
+        self.db = None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(path), check_same_thread=False)
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, stored_at REAL, command TEXT)'
+            )
+            self.db.commit()
+            self._load()
+
+    def _load(self):
+        """Load this namespace's most recent non-expired entries from disk."""
+        cutoff = time.time() - self.ttl
+        self.db.execute('DELETE FROM responses WHERE stored_at < ?', (cutoff,))
+        # Entries of other prompts/models can never be hit; leave them on disk
+        prefix = f"{self.namespace}:"
+        rows = self.db.execute(
+            'SELECT key, stored_at, command FROM responses WHERE substr(key, 1, ?) = ? '
+            'ORDER BY stored_at DESC LIMIT ?',
+            (len(prefix), prefix, self.max_entries)
+        ).fetchall()
+        for key, stored_at, command in reversed(rows):
+            self.entries[key] = (stored_at, json.loads(command))
+        self.db.commit()
+
+    def make_key(self, user_input):
+        """Build the cache key for a command."""
+        return f"{self.namespace}:{normalize_input(user_input)}"
+
+    def get(self, user_input):
+        """
+        Look up a cached command.
+
+        Args:
+            user_input (str): User's command
+
+        Returns:
+            dict: Cached command, or None on a miss
+        """
+        key = self.make_key(user_input)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            stored_at, command = entry
+            if time.time() - stored_at > self.ttl:
+                del self.entries[key]
+                self._delete(key)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return json.loads(json.dumps(command))  # callers may mutate params
+
+    def put(self, user_input, command):
+        """
+        Store a command. Clarifications and confirmed destructive commands
+        are never cached.
+
+        Args:
+            user_input (str): User's command
+            command (dict): Parsed command from the LLM
+        """
+        if not self.is_cacheable(command):
+            return
+
+        key = self.make_key(user_input)
+        stored_at = time.time()
+        # A copy, so the caller changing its command later can't change the cache
+        serialized = json.dumps(command)
+        command = json.loads(serialized)
+        with self.lock:
+            self.entries[key] = (stored_at, command)
+            self.entries.move_to_end(key)
+            self.stats['stores'] += 1
+
+            evicted = []
+            while len(self.entries) > self.max_entries:
+                old_key, _ = self.entries.popitem(last=False)
+                evicted.append(old_key)
+                self.stats['evictions'] += 1
+
+            if self.db is not None:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?)',
+                    (key, stored_at, serialized)
+                )
+                self.db.executemany('DELETE FROM responses WHERE key = ?',
+                                    [(k,) for k in evicted])
+                self.db.commit()
+
+    def is_cacheable(self, command):
+        """Only cache well-formed, unambiguous, unconfirmed commands."""
+        if not isinstance(command, dict) or 'action' not in command:
+            return False
+        if command['action'] == 'clarify':
+            return False
+        return not command.get('params', {}).get('confirmed', False)
+
+    def _delete(self, key):
+        if self.db is not None:
+            self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self.db.commit()
+
+    def clear(self):
+        """Drop every entry from memory and disk."""
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM responses')
+                self.db.commit()
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache."""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def close(self):
+        """Close the on-disk store."""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,484 @@
+import os
+import sys
+import time
+import zlib
+import struct
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CaptureUnavailable(Exception):
+    """The capture backend can't be used here (missing package, no display)."""
+
+
+class Frame:
+    """One captured image as raw 8-bit RGB rows."""
+
+    def __init__(self, rgb, width, height, taken_at=None):
+        self.rgb = rgb
+        self.width = width
+        self.height = height
+        self.taken_at = taken_at if taken_at is not None else time.time()
+        self._hash = None
+
+    @property
+    def hash(self):
+        """64-bit difference hash (dHash) sampled straight from the pixels.
+
+        The frame is sampled on a 9x8 grid of luminance values and each bit
+        says whether a sample is brighter than its right neighbour, so small
+        changes (a blinking cursor, compression noise) flip few bits while
+        real content changes flip many.
+        """
+        if self._hash is None:
+            rgb, width, height = self.rgb, self.width, self.height
+            value = 0
+            for gy in range(8):
+                row = (gy * (height - 1) // 7) * width
+                previous = None
+                for gx in range(9):
+                    i = (row + gx * (width - 1) // 8) * 3
+                    luma = rgb[i] * 299 + rgb[i + 1] * 587 + rgb[i + 2] * 114
+                    if previous is not None:
+                        value = (value << 1) | (previous > luma)
+                    previous = luma
+            self._hash = value
+        return self._hash
+
+    def distance(self, other):
+        """Number of differing hash bits (0 = near-identical, 64 = unrelated)."""
+        return bin(self.hash ^ other.hash).count('1')
+
+    def crop(self, left, top, width, height):
+        """A sub-rectangle of this frame, clipped to its bounds."""
+        left, top = max(0, left), max(0, top)
+        width = min(width, self.width - left)
+        height = min(height, self.height - top)
+        if width <= 0 or height <= 0:
+            raise ValueError("region is outside the screen")
+        stride = self.width * 3
+        rows = [self.rgb[(top + y) * stride + left * 3:(top + y) * stride + (left + width) * 3]
+                for y in range(height)]
+        return Frame(b''.join(rows), width, height, self.taken_at)
+
+    def to_image(self):
+        """The frame as a Pillow image."""
+        from PIL import Image
+        return Image.frombuffer('RGB', (self.width, self.height), self.rgb, 'raw', 'RGB', 0, 1)
+
+
+def encode_png(frame, compress_level=1):
+    """
+    Encode a frame as PNG with zlib only (no Pillow needed).
+
+    zlib releases the GIL while compressing, so this runs truly in parallel
+    with the agent loop when called on the encoder thread. Level 1 is several
+    times faster than Pillow's default of 6 for screen content and only a
+    little larger.
+    """
+    stride = frame.width * 3
+    rgb = frame.rgb
+    # Filter type 0 (none) in front of every row
+    raw = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(frame.height))
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', frame.width, frame.height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw, compress_level)) + chunk(b'IEND', b''))
+
+
+FORMATS = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'webp', '.bmp': 'bmp'}
+
+
+def image_format(fmt):
+    """
+    The encoder's name for a format as a user may say it ("jpg", "PNG", ".webp").
+
+    Raises:
+        ValueError: Not a format the encoder writes
+    """
+    name = FORMATS.get('.' + str(fmt).strip().lower().lstrip('.'))
+    if name is None:
+        raise ValueError(f"Unsupported image format: {fmt}. Use png, jpg, webp or bmp")
+    return name
+
+
+def encode(frame, fmt='png', quality=85, compress_level=1):
+    """
+    Encode a frame.
+
+    Args:
+        fmt (str): 'png', 'jpeg', 'webp' or 'bmp'
+        quality (int): JPEG/WebP quality (1-100)
+        compress_level (int): PNG zlib level (0 = fastest, 9 = smallest)
+
+    Returns:
+        bytes: Encoded image
+    """
+    if fmt == 'png':
+        return encode_png(frame, compress_level)
+    import io
+    buffer = io.BytesIO()
+    options = {'quality': quality} if fmt in ('jpeg', 'webp') else {}
+    frame.to_image().save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+class FrameEncoder:
+    """Encodes and writes frames on a background thread."""
+
+    def __init__(self, max_workers=1):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='encode')
+
+    def save(self, frame, path, fmt=None, quality=85, compress_level=1):
+        """
+        Queue a frame to be encoded and written.
+
+        Args:
+            fmt (str): Image format; defaults to the one implied by the file
+                extension (PNG if unknown)
+
+        Returns:
+            Future: Resolves to the written Path
+        """
+        path = Path(path)
+        fmt = FORMATS.get(path.suffix.lower(), 'png') if fmt is None else image_format(fmt)
+        return self.pool.submit(self._write, frame, path, fmt, quality, compress_level)
+
+    def _write(self, frame, path, fmt, quality, compress_level):
+        data = encode(frame, fmt, quality, compress_level)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.part')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return path
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class CaptureBackend:
+    """Interface for screen grabbers."""
+
+    name = 'base'
+
+    def grab(self, region=None):
+        """
+        Args:
+            region (tuple): (left, top, width, height), or None for the whole screen
+
+        Returns:
+            Frame
+
+        Raises:
+            CaptureUnavailable: Nothing can be captured here
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MSSBackend(CaptureBackend):
+    """Fast native capture through the mss package (X11, Windows, macOS)."""
+
+    name = 'mss'
+
+    def __init__(self):
+        try:
+            import mss
+        except ImportError:
+            raise CaptureUnavailable("Fast capture needs 'pip install mss'")
+        self.mss = mss
+        self.local = threading.local()  # mss handles are per thread
+
+    def _session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            try:
+                session = self.mss.mss()
+            except Exception as e:
+                raise CaptureUnavailable(f"No display to capture: {e}")
+            self.local.session = session
+        return session
+
+    def grab(self, region=None):
+        session = self._session()
+        if region is None:
+            monitor = session.monitors[1] if len(session.monitors) > 1 else session.monitors[0]
+        else:
+            left, top, width, height = region
+            monitor = {'left': left, 'top': top, 'width': width, 'height': height}
+        shot = session.grab(monitor)
+        return Frame(shot.rgb, shot.width, shot.height)
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """Capture through pyautogui/Pillow (slower, but already a dependency)."""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        try:
+            import pyautogui
+        except Exception as e:
+            raise CaptureUnavailable(f"pyautogui is not usable here: {e}")
+        self.pyautogui = pyautogui
+
+    def grab(self, region=None):
+        image = self.pyautogui.screenshot(region=tuple(region) if region else None)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return Frame(image.tobytes(), image.width, image.height)
+
+
+class FakeBackend(CaptureBackend):
+    """Synthetic screen for headless tests and CI (no display, no Pillow).
+
+    Draws a fixed gradient with a square that moves every `motion` grabs, so
+    consecutive frames are identical when motion is 0 and distinct otherwise.
+    """
+
+    name = 'fake'
+
+    def __init__(self, width=640, height=480, motion=1, delay=0.0):
+        """
+        Args:
+            width, height (int): Screen size
+            motion (int): Grabs between square movements (0 = static screen)
+            delay (float): Seconds each grab takes, to mimic a real grabber
+        """
+        self.width = width
+        self.height = height
+        self.motion = motion
+        self.delay = delay
+        self.grabs = 0
+        row = bytearray()
+        for x in range(width):
+            shade = x * 255 // max(1, width - 1)
+            row += bytes((shade, 64, 255 - shade))
+        self.background = bytes(row) * height
+
+    def grab(self, region=None):
+        if self.delay:
+            time.sleep(self.delay)
+        step = self.grabs // self.motion if self.motion else 0
+        self.grabs += 1
+
+        pixels = bytearray(self.background)
+        size = max(8, min(self.width, self.height) // 4)
+        left = (step * size) % max(1, self.width - size)
+        top = ((step * size) // max(1, self.width - size) * size) % max(1, self.height - size)
+        white = b'\xff' * (size * 3)
+        for y in range(top, top + size):
+            start = (y * self.width + left) * 3
+            pixels[start:start + size * 3] = white
+        frame = Frame(bytes(pixels), self.width, self.height)
+        return frame.crop(*region) if region else frame
+
+
+BACKENDS = {
+    'mss': MSSBackend,
+    'pyautogui': PyAutoGUIBackend,
+    'fake': FakeBackend,
+}
+
+
+def create_backend(name='auto', **options):
+    """Build a capture backend by name; 'auto' prefers mss, then pyautogui."""
+    if name == 'auto':
+        for candidate in ('mss', 'pyautogui'):
+            try:
+                return BACKENDS[candidate]()
+            except CaptureUnavailable:
+                continue
+        raise CaptureUnavailable("No screen capture backend is available; install mss or pyautogui")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name}. Choose from auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+def window_region(title):
+    """
+    Screen rectangle of the first window whose title contains `title`.
+
+    Returns:
+        tuple: (left, top, width, height), or None if no window matched
+    """
+    if sys.platform == 'win32':
+        try:
+            import pygetwindow
+        except ImportError:
+            return None
+        windows = [w for w in pygetwindow.getWindowsWithTitle(title) if w.width and w.height]
+        if not windows:
+            return None
+        window = windows[0]
+        return window.left, window.top, window.width, window.height
+    if sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+        try:
+            output = subprocess.run(['xwininfo', '-name', title], capture_output=True,
+                                    text=True, timeout=2).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        fields = {}
+        for line in output.splitlines():
+            key, _, value = line.strip().partition(':')
+            fields[key] = value.strip()
+        try:
+            return (int(fields['Absolute upper-left X']), int(fields['Absolute upper-left Y']),
+                    int(fields['Width']), int(fields['Height']))
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+class BurstRecorder:
+    """Captures frames on a background thread into a bounded ring buffer.
+
+    Only the last `capacity` frames are kept, and a frame whose hash is
+    within `threshold` bits of the previously kept one is dropped, so a
+    static screen doesn't flush out the interesting frames.
+    """
+
+    def __init__(self, backend, capacity=10, interval=0.5, threshold=2, region=None):
+        """
+        Args:
+            backend (CaptureBackend): Where frames come from
+            capacity (int): Frames kept
+            interval (float): Seconds between captures
+            threshold (int): Hash distance at or below which a frame counts
+                as a duplicate
+            region (tuple): Capture only this rectangle
+        """
+        self.backend = backend
+        self.frames = deque(maxlen=capacity)
+        self.interval = interval
+        self.threshold = threshold
+        self.region = region
+        self.stats = {'captured': 0, 'kept': 0, 'duplicates': 0, 'errors': 0}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='burst', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop capturing; returns the kept frames, oldest first."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.snapshot()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.frames)
+
+    def add(self, frame):
+        """Keep a frame unless it nearly duplicates the last kept one."""
+        with self.lock:
+            self.stats['captured'] += 1
+            if self.frames and frame.distance(self.frames[-1]) <= self.threshold:
+                self.stats['duplicates'] += 1
+                return False
+            self.frames.append(frame)
+            self.stats['kept'] += 1
+            return True
+
+    def _run(self):
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.add(self.backend.grab(self.region))
+            except Exception:
+                self.stats['errors'] += 1
+                if self.stats['errors'] >= 3 and not self.stats['captured']:
+                    return  # The backend isn't working at all
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+
+class ScreenCapture:
+    """Screenshots and bursts through one backend and a shared background encoder."""
+
+    def __init__(self, backend='auto', encoder_threads=1):
+        """
+        Args:
+            backend (str|CaptureBackend): Backend name or instance
+            encoder_threads (int): Threads encoding and writing images
+        """
+        self.backend = create_backend(backend) if isinstance(backend, str) else backend
+        self.encoder = FrameEncoder(encoder_threads)
+        self.burst = None
+
+    def capture(self, path, region=None, window=None, fmt=None, quality=85, compress_level=1):
+        """
+        Grab the screen now and save it in the background.
+
+        Args:
+            region (tuple): (left, top, width, height)
+            window (str): Title of a window to capture instead
+
+        Returns:
+            tuple: (Frame, Future resolving to the written Path)
+
+        Raises:
+            ValueError: The window wasn't found or the region is invalid
+        """
+        if window:
+            region = window_region(window)
+            if region is None:
+                raise ValueError(f"no window titled '{window}'")
+        if region is not None:
+            region = tuple(int(v) for v in region)
+            if len(region) != 4 or region[2] <= 0 or region[3] <= 0:
+                raise ValueError("region must be [left, top, width, height]")
+        frame = self.backend.grab(region)
+        return frame, self.encoder.save(frame, path, fmt, quality, compress_level)
+
+    def start_burst(self, capacity=10, interval=0.5, threshold=2, region=None):
+        if self.burst is not None and self.burst.running:
+            self.burst.stop()
+        self.burst = BurstRecorder(self.backend, capacity, interval, threshold, region).start()
+        return self.burst
+
+    def save_burst(self, folder, fmt='png', compress_level=1):
+        """
+        Stop the burst and queue its frames for saving.
+
+        Returns:
+            list: Futures, one per saved frame
+        """
+        if self.burst is None:
+            return []
+        fmt = image_format(fmt)
+        frames = self.burst.stop()
+        self.burst = None
+        folder = Path(folder)
+        futures = []
+        for n, frame in enumerate(frames, 1):
+            stamp = time.strftime('%H%M%S', time.localtime(frame.taken_at))
+            futures.append(self.encoder.save(frame, folder / f"frame_{n:03d}_{stamp}.{fmt.replace('jpeg', 'jpg')}",
+                                             fmt, compress_level=compress_level))
+        return futures
+
+    def close(self):
+        if self.burst is not None:
+            self.burst.stop()
+        self.encoder.close()
+        self.backend.close()
@@ -0,0 +1,399 @@
+"""
+Headless server mode: Brain.think and ActionExecutor.execute over a local
+HTTP API, on a TCP port or a Unix socket.
+
+Endpoints (JSON in, JSON out):
+
+  POST /command   {"text": "open notepad", "client": "id"}   think, then execute
+  POST /think     {"text": "open notepad"}                   parsed command only
+  POST /execute   {"action": "open_app", "params": {...}}    execute only
+  GET  /health    liveness
+  GET  /stats     queue depth, counts and average timings
+  GET  /metrics   Prometheus text (needs --profile)
+
+Only local programs may call the API: POST bodies must be sent as
+application/json, requests carrying a browser Origin header are refused (a
+web page can't make the agent run commands), and with a token every
+request needs "Authorization: Bearer <token>". /execute commands are
+checked against the action registry like LLM output, and "confirmed": true
+is removed from every command unless the server allows confirmations, so
+delete_file and run_command only ask for confirmation.
+
+Requests are queued per client ("client" in the body or the X-Client-Id
+header, otherwise the connection) and served by a pool of workers. Commands
+from one client run one at a time in arrival order; different clients run
+concurrently. When `queue_size` requests are already waiting the server
+answers 503 with Retry-After instead of queueing more. Actions that use
+shared state (screen capture, the shell session and its output pager) hold
+a per-resource lock, so e.g. two screenshots never run at the same time.
+"""
+
+import os
+import hmac
+import json
+import time
+import itertools
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tracing
+from actions import REGISTRY, InvalidCommand
+from executor import ResourceLocks
+
+
+class ServerBusy(Exception):
+    """The request queue is full."""
+
+
+class _Request:
+    """One queued API call."""
+
+    def __init__(self, kind, body, client):
+        self.id = None  # Set on admission, so ids follow queue order
+        self.kind = kind
+        self.body = body
+        self.client = client
+        self.queued_at = time.perf_counter()
+        self.response = None
+        self.done = threading.Event()
+
+
+class ClientScheduler:
+    """
+    Worker pool fed by per-client FIFO queues.
+
+    A client is handed to a worker only while none of its requests is
+    running, so each client's requests complete in the order they arrived,
+    and clients with work take turns round-robin.
+    """
+
+    def __init__(self, handler, workers=8, queue_size=64):
+        """
+        Args:
+            handler (callable): Called with each request on a worker thread
+            workers (int): Requests processed at the same time
+            queue_size (int): Waiting requests accepted before ServerBusy
+        """
+        self.handler = handler
+        self.queue_size = queue_size
+        self.pending = 0
+        self._ids = itertools.count(1)
+        self._clients = {}  # client -> deque of waiting requests
+        self._ready = deque()  # Clients with waiting requests and none running
+        self._running = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._workers = [threading.Thread(target=self._work, name=f'server-worker-{n}', daemon=True)
+                         for n in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, request):
+        """
+        Queue a request behind the client's earlier ones.
+
+        Raises:
+            ServerBusy: When queue_size requests are already waiting
+        """
+        with self._cond:
+            if self.pending >= self.queue_size:
+                raise ServerBusy()
+            self.pending += 1
+            request.id = next(self._ids)
+            waiting = self._clients.get(request.client)
+            if waiting is None:
+                waiting = self._clients[request.client] = deque()
+            waiting.append(request)
+            if len(waiting) == 1 and request.client not in self._running:
+                self._ready.append(request.client)
+                self._cond.notify()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                client = self._ready.popleft()
+                request = self._clients[client].popleft()
+                self._running.add(client)
+                self.pending -= 1
+            try:
+                self.handler(request)
+            finally:
+                request.done.set()
+                with self._cond:
+                    self._running.discard(client)
+                    if self._clients[client]:
+                        self._ready.append(client)
+                        self._cond.notify()
+                    else:
+                        del self._clients[client]
+
+    def depth(self):
+        with self._cond:
+            return {'waiting': self.pending, 'running': len(self._running), 'clients': len(self._clients)}
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=1)
+
+
+class AgentServer:
+    """Serves the agent's brain and executor to local clients."""
+
+    def __init__(self, brain, executor, host='127.0.0.1', port=8765, socket_path=None,
+                 workers=8, queue_size=64, request_timeout=120.0, token=None, allow_confirmed=False):
+        """
+        Initialize the server and bind its socket.
+
+        Args:
+            brain (Brain): Parses commands
+            executor (ActionExecutor): Runs actions
+            host (str): Interface to listen on (TCP)
+            port (int): TCP port; 0 picks a free one
+            socket_path (str): Listen on this Unix socket instead of TCP
+            workers (int): Requests processed at the same time
+            queue_size (int): Waiting requests accepted before answering 503
+            request_timeout (float): Seconds a caller waits before a 504
+            token (str): Require "Authorization: Bearer <token>" on every
+                request (default: the AGENT_SERVER_TOKEN environment variable)
+            allow_confirmed (bool): Let commands carry "confirmed": true, so
+                clients can run deletes and shell commands; otherwise they
+                only get the confirmation question
+        """
+        self.brain = brain
+        self.executor = executor
+        self.request_timeout = request_timeout
+        self.token = token or os.environ.get('AGENT_SERVER_TOKEN') or None
+        self.allow_confirmed = allow_confirmed
+        self.locks = ResourceLocks()
+        self._stats_lock = threading.Lock()
+        self.stats = {'received': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0,
+                      'queue_time': 0.0, 'think_time': 0.0, 'execute_time': 0.0}
+        self.scheduler = ClientScheduler(self._handle, workers=workers, queue_size=queue_size)
+
+        if socket_path:
+            if _UnixHTTPServer is None:
+                raise OSError("Unix sockets are not supported on this platform")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)  # Left behind by an earlier run
+            self.httpd = _UnixHTTPServer(socket_path, _Handler)
+            self.address = f"unix:{socket_path}"
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), _Handler)
+            self.address = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.agent = self
+        self.socket_path = socket_path
+
+    def serve_forever(self):
+        """Handle requests until shutdown() is called from another thread."""
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """Stop accepting requests, stop the workers and release the socket."""
+        self.httpd.shutdown()
+        self.close()
+
+    def close(self):
+        self.scheduler.stop()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def submit(self, kind, body, client):
+        """
+        Queue a request and wait for its result.
+
+        Returns:
+            tuple: (HTTP status, response dict)
+        """
+        request = _Request(kind, body, client)
+        self._count('received')
+        try:
+            self.scheduler.submit(request)
+        except ServerBusy:
+            self._count('rejected')
+            return 503, {'error': 'Server busy, retry later'}
+        if not request.done.wait(self.request_timeout):
+            self._count('timeouts')
+            return 504, {'error': 'Timed out waiting for the agent'}
+        return 200, request.response
+
+    def _handle(self, request):
+        """Worker side of submit(): think and/or execute one request."""
+        started = time.perf_counter()
+        response = {'id': request.id, 'client': request.client}
+        timings = {'queue_ms': round((started - request.queued_at) * 1000, 3)}
+        try:
+            with tracing.span('request', kind=request.kind, command=request.id, client=request.client):
+                if request.kind == 'execute':
+                    command = request.body  # Validated by the handler
+                else:
+                    with tracing.span('stage', stage='think'):
+                        command = self.brain.think(request.body.get('text', ''))
+                    timings['think_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                if not self.allow_confirmed:
+                    command = dict(command, params=unconfirmed(command.get('action', ''),
+                                                               command.get('params') or {}))
+                response['command'] = command
+
+                if request.kind != 'think':
+                    execute_started = time.perf_counter()
+                    with tracing.span('stage', stage='execute'):
+                        response['result'] = self.execute(command)
+                    timings['execute_ms'] = round((time.perf_counter() - execute_started) * 1000, 3)
+        except Exception as e:
+            self._count('errors')
+            tracing.count('agent_errors_total', stage='server')
+            response['error'] = f"An error occurred: {str(e)}"
+
+        response['timings'] = timings
+        with self._stats_lock:
+            self.stats['completed'] += 1
+            # Ids give arrival order and this the finishing order; per client they always agree
+            response['completed'] = self.stats['completed']
+            self.stats['queue_time'] += timings['queue_ms'] / 1000
+            self.stats['think_time'] += timings.get('think_ms', 0.0) / 1000
+            self.stats['execute_time'] += timings.get('execute_ms', 0.0) / 1000
+        request.response = response
+
+    def execute(self, command):
+        """Run a parsed command, holding the locks of the shared resources it uses."""
+        action = command.get('action', '')
+        params = command.get('params') or {}
+        if action in ('respond', 'clarify'):
+            return params.get('message', '')
+
+        with self.locks.hold(action, params):
+            return self.executor.execute(action, params)
+
+    def authorized(self, header):
+        """Whether an Authorization header value carries the token (always, without one)."""
+        if self.token is None:
+            return True
+        scheme, _, value = (header or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip(), self.token)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def snapshot(self):
+        """Counters, queue depth and average timings for GET /stats."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        completed = stats['completed'] or 1
+        for key in ('queue_time', 'think_time', 'execute_time'):
+            stats[key.replace('_time', '_ms_avg')] = round(stats.pop(key) / completed * 1000, 3)
+        stats['queue'] = self.scheduler.depth()
+        stats['brain'] = dict(self.brain.stats)
+        stats['llm_backends'] = self.brain.router.snapshot()
+        return stats
+
+
+def unconfirmed(action, params):
+    """The params with any "confirmed" flag forced to false, plan steps included."""
+    params = dict(params)
+    if action == 'plan':
+        params['steps'] = [dict(step, params=unconfirmed(step.get('action', ''), step.get('params') or {}))
+                           if isinstance(step, dict) else step for step in params.get('steps') or []]
+    elif 'confirmed' in params:
+        params['confirmed'] = False
+    return params
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixHTTPServer = None  # No AF_UNIX on this platform
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Translates HTTP requests into AgentServer.submit calls."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so load tests don't pay a connect per command
+    routes = {'/command': 'command', '/think': 'think', '/execute': 'execute'}
+
+    def do_GET(self):
+        agent = self.server.agent
+        if not self._allowed():
+            return
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._reply(200, agent.snapshot())
+        elif self.path == '/metrics':
+            self._reply(200, tracing.render_metrics(), content_type='text/plain; version=0.0.4')
+        else:
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        kind = self.routes.get(self.path)
+        if kind is None:
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+            return
+        if not self._allowed():
+            return
+        # Browsers can only send a JSON content type after a CORS preflight, which is never answered
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            self._reply(415, {'error': 'Send the request body as Content-Type: application/json'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            self._reply(400, {'error': f"Invalid request body: {e}"})
+            return
+        if kind != 'execute' and not body.get('text'):
+            self._reply(400, {'error': 'Missing "text"'})
+            return
+
+        # Without a client id, each connection is its own client
+        client = str(body.get('client') or self.headers.get('X-Client-Id') or f"conn-{id(self.connection)}")
+        if kind == 'execute':
+            try:
+                body = REGISTRY.validate(body)
+            except InvalidCommand as e:
+                self._reply(400, {'error': str(e)})
+                return
+        status, response = self.server.agent.submit(kind, body, client)
+        self._reply(status, response, retry_after=1 if status == 503 else None)
+
+    def _allowed(self):
+        """Refuse browser pages and callers without the token; replies itself when refusing."""
+        if self.headers.get('Origin'):
+            self._reply(403, {'error': 'Requests from web pages are not accepted'})
+            return False
+        if not self.server.agent.authorized(self.headers.get('Authorization')):
+            self._reply(401, {'error': 'Missing or wrong token'})
+            return False
+        return True
+
+    def _reply(self, status, payload, content_type='application/json', retry_after=None):
+        data = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        data = data.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the agent's own output
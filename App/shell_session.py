@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import uuid
+import queue
+import signal
+import threading
+import subprocess
+
+
+class ShellTimeout(Exception):
+    """A command did not finish in time."""
+
+
+def _read_lines(stream, lines):
+    """Reader thread: queue each output line, then None at end of stream."""
+    for line in stream:
+        lines.put(line.rstrip('\r\n'))
+    lines.put(None)
+
+
+def _kill_tree(process):
+    """Kill a shell and every process it started, then reap it."""
+    if sys.platform == 'win32':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)
+    else:
+        try:
+            # The shell leads its own process group (start_new_session)
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def _next_line(lines, deadline):
+    """Next queued line, raising queue.Empty once the deadline passes."""
+    if deadline is None:
+        return lines.get()
+    return lines.get(timeout=max(0.0, deadline - time.monotonic()))
+
+
+class ShellSession:
+    """One long-lived shell process reused across commands.
+
+    Commands share state (current directory, environment variables) the way
+    they would in a terminal, and skip the cost of starting a new shell each
+    time. Output is read line by line on a background thread so it can be
+    streamed while the command runs; stderr is merged into stdout.
+    """
+
+    def __init__(self, shell=None):
+        """
+        Args:
+            shell (list): Shell command line. Defaults to cmd.exe on Windows
+                and bash (or sh) elsewhere.
+        """
+        if shell is None:
+            if sys.platform == 'win32':
+                shell = ['cmd.exe', '/Q', '/K']
+            elif os.path.exists('/bin/bash'):
+                shell = ['/bin/bash', '--noprofile', '--norc']
+            else:
+                shell = ['/bin/sh']
+        self.shell = shell
+        self.lock = threading.Lock()
+        self.process = None
+        self.lines = None
+        self._start()
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            self.shell, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1,
+            encoding='utf-8', errors='replace', start_new_session=True
+        )
+        self.lines = queue.Queue()
+        reader = threading.Thread(target=_read_lines, args=(self.process.stdout, self.lines),
+                                  name='shell-reader', daemon=True)
+        reader.start()
+
+    def run(self, command, on_output=None, timeout=None):
+        """
+        Run a command in the session.
+
+        Args:
+            command (str): Shell command
+            on_output (callable): Called with each output line as it arrives
+            timeout (float): Seconds before the session is killed and restarted
+
+        Returns:
+            tuple: (exit code, list of output lines)
+
+        Raises:
+            ShellTimeout: The command took longer than timeout
+        """
+        with self.lock:
+            if self.process.poll() is not None:
+                self._start()
+
+            # The marker line tells us where this command's output ends
+            marker = f"__agent_done_{uuid.uuid4().hex}__"
+            # stdin comes from the null device so a command can't swallow the marker
+            if sys.platform == 'win32':
+                script = f"{command} < NUL\necho {marker} %errorlevel%\n"
+            else:
+                script = f"{{ {command}\n}} < /dev/null\necho {marker} $?\n"
+            self.process.stdin.write(script)
+            self.process.stdin.flush()
+
+            output = []
+            deadline = time.monotonic() + timeout if timeout else None
+            while True:
+                try:
+                    line = _next_line(self.lines, deadline)
+                except queue.Empty:
+                    self._restart()
+                    raise ShellTimeout(f"Command timed out after {timeout} s; shell session restarted")
+                if line is None:
+                    # The command exited the shell (e.g. "exit")
+                    self._start()
+                    return None, output
+                if marker in line:
+                    before, _, code = line.partition(marker)
+                    if before.strip():
+                        output.append(before)
+                        if on_output is not None:
+                            on_output(before)
+                    code = code.strip()
+                    return (int(code) if code.lstrip('-').isdigit() else None), output
+                output.append(line)
+                if on_output is not None:
+                    on_output(line)
+
+    def _restart(self):
+        self.close()
+        self._start()
+
+    def close(self):
+        """Stop the shell process and whatever it is still running."""
+        if self.process is not None:
+            _kill_tree(self.process)
+
+
+def run_once(command, on_output=None, timeout=None):
+    """
+    Run a command in a fresh shell, streaming its output.
+
+    Returns:
+        tuple: (exit code, list of output lines)
+
+    Raises:
+        ShellTimeout: The command took longer than timeout
+    """
+    process = subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, bufsize=1, encoding='utf-8', errors='replace', start_new_session=True
+    )
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+
+    output = []
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        try:
+            line = _next_line(lines, deadline)
+        except queue.Empty:
+            _kill_tree(process)
+            raise ShellTimeout(f"Command timed out after {timeout} s")
+        if line is None:
+            break
+        output.append(line)
+        if on_output is not None:
+            on_output(line)
+    return process.wait(), output
+
+
+class OutputPager:
+    """Keeps the full output of the last command and hands it out page by page."""
+
+    def __init__(self, page_lines=15, page_chars=500):
+        """
+        Args:
+            page_lines (int): Maximum lines per page
+            page_chars (int): Maximum characters per page
+        """
+        self.page_lines = page_lines
+        self.page_chars = page_chars
+        self.lines = []
+        self.position = 0
+
+    def load(self, lines):
+        """Replace the buffer with new output and return its first page."""
+        self.lines = list(lines)
+        self.position = 0
+        return self.next_page()
+
+    def next_page(self):
+        """
+        Returns:
+            str: The next page of output, or None when everything was shown
+        """
+        if self.position >= len(self.lines):
+            return None
+        page = []
+        size = 0
+        while self.position < len(self.lines) and len(page) < self.page_lines:
+            line = self.lines[self.position]
+            if page and size + len(line) > self.page_chars:
+                break
+            if len(line) > self.page_chars:
+                # Split very long lines across pages
+                self.lines[self.position] = line[self.page_chars:]
+                line = line[:self.page_chars]
+            else:
+                self.position += 1
+            page.append(line)
+            size += len(line) + 1
+        return '\n'.join(page)
+
+    def has_more(self):
+        return self.position < len(self.lines)
+
+    def remaining(self):
+        """Lines not shown yet."""
+        return len(self.lines) - self.position
@@ -0,0 +1,264 @@
+"""
+Speculative intent parsing on partial transcripts.
+
+While the recognizer is still working, each growing partial transcript is
+tried against the Brain's fast path and cache, and a partial that stays the
+newest for a moment (a pause in speech) is sent to Brain.think in the
+background, so the LLM isn't asked about every word. Results are kept per
+utterance, keyed by the (normalized) prefix they were computed from, but
+always computed from the text as recognized: case and punctuation can
+matter ("README.md", "C++"). When the final transcript arrives it reuses a
+result if the text is the same, or only extends the prefix with trailing
+filler ("... please", "... for me"), so the LLM round-trip overlaps
+recognition instead of following it.
+
+Speculation only ever thinks. Nothing is executed before the final
+transcript; the one side effect allowed is ActionExecutor.prepare(), the
+read-only groundwork of an action (resolving the app for open_app, loading
+the process table or screen backend), and never for actions behind a
+confirmation gate.
+"""
+
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+# Words a final transcript may add to a speculated prefix without changing its meaning
+TRAILING_FILLER = re.compile(r'^(?:\s+(?:please|now|right now|for me|thanks|thank you|ok|okay))*$')
+
+
+def normalize(text):
+    """Lowercase, without surrounding punctuation and repeated spaces."""
+    return ' '.join(re.sub(r'[^\w\s./\\:-]', ' ', text.lower()).split())
+
+
+def surface(text):
+    """The text as recognized, without repeated spaces and closing punctuation."""
+    return ' '.join(text.split()).rstrip('.?!,')
+
+
+class _Entry:
+    """One speculative think of a prefix."""
+
+    def __init__(self, key, text):
+        self.key = key  # normalize(text), for matching
+        self.text = text  # As recognized; what is thought about
+        self.started = time.perf_counter()
+        self.finished = None
+        self.command = None
+        self.done = threading.Event()
+
+
+class Speculation:
+    """Speculative parses for one utterance."""
+
+    def __init__(self, speculator):
+        self.speculator = speculator
+        self.entries = {}  # normalized prefix -> _Entry
+        self.running = 0
+        self.pending = None  # (key, text) of the newest prefix waiting for a free slot
+        self.latest = None  # Newest partial seen
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def partial(self, text):
+        """Recognizer callback: speculate on a partial transcript."""
+        key = normalize(text)
+        if len(key.split()) < self.speculator.min_words:
+            return
+        with self._lock:
+            if self.closed or key in self.entries:
+                return
+            self.latest = key
+        
+        # The fast path and cache cost microseconds: try every partial
+        command, _ = self.speculator.brain.local_answer(text)
+        if command is not None:
+            with self._lock:
+                entry = self.entries.setdefault(key, _Entry(key, text))
+            self.speculator.resolve(entry, command)
+            return
+        
+        # The LLM only for partials that stay the newest for a moment
+        if self.speculator.settle > 0:
+            timer = threading.Timer(self.speculator.settle, self._settled, args=(key, text))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._settled(key, text)
+
+    def _settled(self, key, text):
+        """Start an LLM speculation for `key` unless a newer partial arrived."""
+        with self._lock:
+            if self.closed or key in self.entries or key != self.latest:
+                return
+            if self.running >= self.speculator.in_flight:
+                self.pending = (key, text)  # Older waiting prefixes are stale now
+                return
+            entry = self._start(key, text)
+        self.speculator.submit(self._run, entry)
+
+    def final(self, text):
+        """
+        The command for the final transcript, if a speculation covers it.
+
+        Returns:
+            dict: The speculated command, or None to think normally
+        """
+        arrived = time.perf_counter()
+        key = normalize(text)
+        with self._lock:
+            self.closed = True
+            self.pending = None
+            entry = self.entries.get(key)
+            if entry is None or surface(entry.text) != surface(text):
+                entry = self._extended(key, text)
+            unused = len(self.entries) - (entry is not None)
+        if entry is not None:
+            entry.done.wait()
+            if entry.command is None:
+                entry = None  # The speculation failed; think normally
+        self.speculator.record(entry, arrived, unused)
+        return entry.command if entry is not None else None
+
+    def cancel(self):
+        """The utterance was dropped (exit, unclear speech); discard its speculations."""
+        with self._lock:
+            self.closed = True
+            self.pending = None
+
+    def _extended(self, key, text):
+        """
+        The longest speculated prefix that the final text only pads with
+        filler, and whose recognized text it starts with verbatim.
+        """
+        best = None
+        for prefix, entry in self.entries.items():
+            if (key.startswith(prefix) and TRAILING_FILLER.match(key[len(prefix):])
+                    and surface(text).startswith(surface(entry.text))):
+                if best is None or len(prefix) > len(best.key):
+                    best = entry
+        return best
+
+    def _start(self, key, text):
+        entry = self.entries[key] = _Entry(key, text)
+        self.running += 1
+        return entry
+
+    def _run(self, entry):
+        try:
+            self.speculator.think(entry)
+        finally:
+            with self._lock:
+                self.running -= 1
+                follow = None
+                if self.pending is not None and not self.closed:
+                    follow = self._start(*self.pending)
+                    self.pending = None
+            if follow is not None:
+                self.speculator.submit(self._run, follow)
+
+
+class Speculator:
+    """Starts speculative thinks for utterances and keeps hit/saving stats."""
+
+    def __init__(self, brain, executor=None, min_words=2, settle=0.25, in_flight=2, workers=4):
+        """
+        Args:
+            brain (Brain): Thinks on the partial transcripts
+            executor (ActionExecutor): Prepares speculated actions; None
+                skips pre-warming
+            min_words (int): Shortest partial worth speculating on
+            settle (float): Seconds a partial must stay the newest before
+                it is sent to the LLM (the fast path and cache are tried on
+                every partial); 0 sends every partial
+            in_flight (int): Speculative thinks running at once per
+                utterance; newer partials replace older waiting ones
+            workers (int): Threads shared by all utterances
+        """
+        self.brain = brain
+        self.executor = executor
+        self.min_words = min_words
+        self.settle = settle
+        self.in_flight = in_flight
+        # Bound once, so wrappers installed later (benchmarks) see only real thinks
+        self.think_command = brain.think
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix='speculate')
+        self._lock = threading.Lock()
+        self.stats = {'utterances': 0, 'speculations': 0, 'hits': 0, 'misses': 0, 'wasted': 0,
+                      'prepared': 0, 'saved_time': 0.0}
+
+    def session(self):
+        """A Speculation for the next utterance."""
+        return Speculation(self)
+
+    def submit(self, function, entry):
+        with self._lock:
+            self.stats['speculations'] += 1
+        self._pool.submit(function, entry)
+
+    def think(self, entry):
+        """Think on a prefix in the background; never executes anything."""
+        try:
+            with tracing.span('speculate', words=len(entry.text.split())):
+                self.resolve(entry, self.think_command(entry.text))
+        except Exception as e:
+            print(f"Speculation failed: {e}")
+        finally:
+            if not entry.done.is_set():
+                entry.finished = time.perf_counter()
+                entry.done.set()
+
+    def resolve(self, entry, command):
+        """Store a speculated command and prepare its action off the caller's thread."""
+        entry.command = command
+        entry.finished = time.perf_counter()
+        entry.done.set()
+        if self.executor is not None:
+            self._pool.submit(self._prepare, command)
+
+    def _prepare(self, command):
+        try:
+            if self.executor.prepare(command.get('action', ''), command.get('params') or {}):
+                with self._lock:
+                    self.stats['prepared'] += 1
+        except Exception as e:
+            print(f"Preparing a speculated action failed: {e}")
+
+    def record(self, entry, arrived, unused):
+        """
+        Count one final transcript. A hit is credited with the time it saved:
+        the think that would have started at `arrived` now ends at
+        max(arrived, entry.finished) instead of arrived + its duration.
+        """
+        outcome = 'miss' if entry is None else 'hit'
+        saved = 0.0
+        if entry is not None:
+            saved = (entry.finished - entry.started) - max(0.0, entry.finished - arrived)
+        with self._lock:
+            self.stats['utterances'] += 1
+            self.stats['hits' if entry is not None else 'misses'] += 1
+            self.stats['wasted'] += unused
+            self.stats['saved_time'] += max(0.0, saved)
+        tracing.count('agent_speculation_total', outcome=outcome)
+        tracing.annotate(speculation=outcome)
+
+    def report(self):
+        """
+        Hit rate and latency saved so far.
+
+        Returns:
+            dict: hit_rate, saved_ms_avg (per hit), plus the raw counters
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats['hits']
+        stats['hit_rate'] = hits / stats['utterances'] if stats['utterances'] else 0.0
+        stats['saved_ms_avg'] = stats['saved_time'] / hits * 1000 if hits else 0.0
+        return stats
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -1,20 +1,536 @@
-import speech_recognition as sr
-import pyttsx3
+import os
+import json
+import math
+import time
+import wave
+import queue
+import hashlib
+import array
+import itertools
 import threading
+from collections import deque
+from pathlib import Path
+import tracing
+
+
+# speech_recognition and pyttsx3 pull in the audio stack, so they are only
+# imported once a Listener or Speaker is actually created
+
+
+def rms(chunk, sample_width):
+    """Root-mean-square energy of a chunk of signed little-endian PCM."""
+    if sample_width == 2:
+        samples = array.array('h', chunk[:len(chunk) - len(chunk) % 2])
+    else:
+        samples = [int.from_bytes(chunk[i:i + sample_width], 'little', signed=True)
+                   for i in range(0, len(chunk) - sample_width + 1, sample_width)]
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class VoiceSegmenter:
+    """Splits a continuous audio stream into utterances.
+    
+    Energy-based voice activity detection over fixed-size chunks. A short
+    pre-roll ring buffer keeps the audio just before speech was detected, so
+    the first syllable isn't clipped. While nobody is speaking the energy
+    threshold is periodically recalibrated from the ambient noise.
+    """
+    
+    def __init__(self, sample_rate, sample_width, chunk_size=1024, energy_threshold=300,
+                 pre_roll=0.3, silence=0.8, min_speech=0.2, max_phrase=10.0,
+                 recalibrate_every=30.0, threshold_ratio=1.5, min_threshold=50,
+                 echo_ratio=1.5, on_speech_start=None):
+        """
+        Args:
+            sample_rate (int): Samples per second
+            sample_width (int): Bytes per sample
+            chunk_size (int): Samples per chunk passed to feed()
+            energy_threshold (float): Starting RMS level that counts as speech
+            pre_roll (float): Seconds of audio kept from before speech starts
+            silence (float): Seconds of quiet that end an utterance
+            min_speech (float): Shorter bursts are discarded as noise
+            max_phrase (float): Utterances are cut off after this many seconds
+            recalibrate_every (float): Seconds of ambient audio between
+                threshold updates (0 disables recalibration)
+            threshold_ratio (float): Threshold as a multiple of ambient energy
+            min_threshold (float): Floor for the recalibrated threshold
+            echo_ratio (float): During playback, speech must be this many
+                times louder than the loudest recent echo of it
+            on_speech_start (callable): Called when speech is first detected
+        """
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.echo_ratio = echo_ratio
+        self.on_speech_start = on_speech_start
+        
+        chunk_seconds = chunk_size / sample_rate
+        self.pre_roll = deque(maxlen=max(1, int(pre_roll / chunk_seconds)))
+        self.silence_chunks = max(1, int(silence / chunk_seconds))
+        self.min_speech_chunks = max(1, int(min_speech / chunk_seconds))
+        self.max_phrase_chunks = max(1, int(max_phrase / chunk_seconds))
+        self.recalibrate_chunks = int(recalibrate_every / chunk_seconds)
+        self.ambient = deque(maxlen=max(1, int(1.0 / chunk_seconds)))  # Last second of quiet
+        self.echo = deque(maxlen=max(1, int(1.0 / chunk_seconds)))  # Last second of playback
+        
+        self.stats = {'segments': 0, 'discarded': 0, 'recalibrations': 0}
+        self.reset()
+
+    def reset(self):
+        """Forget any partial utterance."""
+        self.pre_roll.clear()
+        self.frames = []
+        self.in_speech = False
+        self.voiced = 0
+        self.quiet = 0
+        self.since_calibration = 0
+
+    def calibrate(self, chunks):
+        """Set the threshold from chunks of ambient noise."""
+        levels = [rms(chunk, self.sample_width) for chunk in chunks]
+        if levels:
+            ambient = sum(levels) / len(levels)
+            self.energy_threshold = max(self.min_threshold, ambient * self.threshold_ratio)
+            self.stats['recalibrations'] += 1
+
+    def feed(self, chunk, playback=False):
+        """
+        Process the next chunk of audio.
+        
+        Args:
+            chunk (bytes): Raw PCM audio
+            playback (bool): The agent is talking, so the microphone hears
+                it; only speech clearly louder than that echo counts
+            
+        Returns:
+            bytes: A completed utterance, or None
+        """
+        level = rms(chunk, self.sample_width)
+        if playback:
+            echo = max(self.echo) if self.echo else level
+            loud = level > max(self.energy_threshold, echo * self.echo_ratio)
+            if not loud:
+                self.echo.append(level)
+        else:
+            loud = level > self.energy_threshold
+        
+        if not self.in_speech:
+            if not loud:
+                self.pre_roll.append(chunk)
+                if not playback:
+                    self._track_ambient(level)
+                return None
+            self.in_speech = True
+            self.frames = list(self.pre_roll)
+            self.pre_roll.clear()
+            self.voiced = 0
+            self.quiet = 0
+            if self.on_speech_start is not None:
+                self.on_speech_start()
+        
+        self.frames.append(chunk)
+        if loud:
+            self.voiced += 1
+            self.quiet = 0
+        else:
+            self.quiet += 1
+        
+        if self.quiet >= self.silence_chunks or len(self.frames) >= self.max_phrase_chunks:
+            return self.finish()
+        return None
+
+    def finish(self):
+        """
+        End the current utterance (e.g. at end of stream).
+        
+        Returns:
+            bytes: The utterance, or None if it was too short to keep
+        """
+        frames, voiced = self.frames, self.voiced
+        self.in_speech = False
+        self.frames = []
+        self.voiced = 0
+        self.quiet = 0
+        if not frames:
+            return None
+        if voiced < self.min_speech_chunks:
+            self.stats['discarded'] += 1
+            return None
+        self.stats['segments'] += 1
+        return b''.join(frames)
+
+    def _track_ambient(self, level):
+        self.ambient.append(level)
+        if not self.recalibrate_chunks:
+            return
+        self.since_calibration += 1
+        if self.since_calibration >= self.recalibrate_chunks:
+            self.since_calibration = 0
+            ambient = sum(self.ambient) / len(self.ambient)
+            self.energy_threshold = max(self.min_threshold, ambient * self.threshold_ratio)
+            self.stats['recalibrations'] += 1
+
+
+def segment_wav(path, chunk_size=1024, **options):
+    """
+    Run a WAV file through the same segmentation path as live capture.
+    
+    Args:
+        path (str): 16-bit PCM mono WAV file
+        chunk_size (int): Samples per chunk
+        **options: Passed to VoiceSegmenter
+        
+    Returns:
+        list: One bytes object of raw PCM per detected utterance
+    """
+    with wave.open(str(path), 'rb') as wav:
+        segmenter = VoiceSegmenter(wav.getframerate(), wav.getsampwidth(), chunk_size, **options)
+        segments = []
+        while True:
+            chunk = wav.readframes(chunk_size)
+            if not chunk:
+                break
+            segment = segmenter.feed(chunk)
+            if segment:
+                segments.append(segment)
+        segment = segmenter.finish()
+        if segment:
+            segments.append(segment)
+    return segments
+
+
+class RecognitionUnclear(Exception):
+    """The audio contained no recognizable speech."""
+
+
+class RecognitionUnavailable(Exception):
+    """The recognizer could not be reached or loaded."""
+
+
+class PCMAudio:
+    """Raw mono PCM audio, compatible with what backends read from sr.AudioData."""
+
+    def __init__(self, frame_data, sample_rate, sample_width):
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    def get_raw_data(self, convert_rate=None, convert_width=None):
+        if convert_rate not in (None, self.sample_rate) or convert_width not in (None, self.sample_width):
+            raise ValueError("PCMAudio does not resample; record at the backend's rate and width")
+        return self.frame_data
+
+    def duration(self):
+        """Length in seconds."""
+        return len(self.frame_data) / (self.sample_rate * self.sample_width)
+
+
+def load_wav(path):
+    """Read a 16-bit mono WAV file into PCMAudio."""
+    with wave.open(str(path), 'rb') as wav:
+        return PCMAudio(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+
+class RecognizerBackend:
+    """Interface for speech-to-text engines.
+    
+    recognize() returns the final transcript. stream() yields growing partial
+    transcripts as they become available, ending with the final one, so
+    downstream stages can start before recognition finishes. Subclasses
+    implement at least one of the two.
+    """
+    
+    name = 'base'
+    
+    def recognize(self, audio):
+        """
+        Args:
+            audio: sr.AudioData or PCMAudio
+            
+        Returns:
+            str: Final transcript
+            
+        Raises:
+            RecognitionUnclear: No speech was recognized
+            RecognitionUnavailable: The engine could not be used
+        """
+        final = None
+        for final in self.stream(audio):
+            pass
+        if not final:
+            raise RecognitionUnclear()
+        return final
+
+    def stream(self, audio):
+        """Yield partial transcripts; engines without partials yield only the final one."""
+        yield self.recognize(audio)
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through speech_recognition (needs network)."""
+    
+    name = 'google'
+    
+    def __init__(self, recognizer=None):
+        import speech_recognition as sr
+        
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        
+        if not isinstance(audio, sr.AudioData):
+            audio = sr.AudioData(audio.get_raw_data(), audio.sample_rate, audio.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            raise RecognitionUnclear()
+        except sr.RequestError as e:
+            raise RecognitionUnavailable(str(e))
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline recognition with Vosk, with streaming partial results."""
+    
+    name = 'vosk'
+    SAMPLE_RATE = 16000
+    BLOCK_BYTES = 8000  # 0.25 s of 16 kHz 16-bit audio per decoder step
+    
+    def __init__(self, model_path=None):
+        """
+        Args:
+            model_path (str): Unpacked Vosk model directory. Defaults to the
+                VOSK_MODEL_PATH environment variable.
+        """
+        try:
+            import vosk
+        except ImportError:
+            raise RecognitionUnavailable("Offline recognition needs 'pip install vosk'")
+        
+        model_path = model_path or os.getenv('VOSK_MODEL_PATH')
+        if not model_path:
+            raise RecognitionUnavailable("Set VOSK_MODEL_PATH to a downloaded Vosk model directory")
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def stream(self, audio):
+        decoder = self.vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE)
+        data = audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2)
+        text = ''
+        for i in range(0, len(data), self.BLOCK_BYTES):
+            if decoder.AcceptWaveform(data[i:i + self.BLOCK_BYTES]):
+                # End of a phrase inside the utterance
+                text = ' '.join(filter(None, [text, json.loads(decoder.Result())['text']]))
+                partial = ''
+            else:
+                partial = json.loads(decoder.PartialResult())['partial']
+            current = ' '.join(filter(None, [text, partial]))
+            if current:
+                yield current
+        final = ' '.join(filter(None, [text, json.loads(decoder.FinalResult())['text']]))
+        if not final:
+            raise RecognitionUnclear()
+        yield final
+
+
+class FileBackend(RecognizerBackend):
+    """Test backend driven by a directory of WAV files with .txt transcripts.
+    
+    Audio is matched to a transcript by its content, so recordings can be
+    sent through capture/segmentation and still be recognized. Partials
+    reveal the transcript word by word, paced like a streaming engine.
+    """
+    
+    name = 'file'
+    
+    def __init__(self, corpus_dir, real_time_factor=0.0):
+        """
+        Args:
+            corpus_dir (str): Directory of name.wav + name.txt pairs
+            real_time_factor (float): Simulated processing time as a
+                fraction of the audio duration
+        """
+        self.real_time_factor = real_time_factor
+        self.transcripts = {}
+        for wav_path in sorted(Path(corpus_dir).glob('*.wav')):
+            txt_path = wav_path.with_suffix('.txt')
+            if txt_path.exists():
+                audio = load_wav(wav_path)
+                self.transcripts[self._key(audio.get_raw_data())] = txt_path.read_text().strip()
+
+    def _key(self, data):
+        return hashlib.sha1(data).hexdigest()
+
+    def stream(self, audio):
+        data = audio.get_raw_data()
+        transcript = self.transcripts.get(self._key(data))
+        if not transcript:
+            raise RecognitionUnclear()
+        words = transcript.split()
+        duration = len(data) / (audio.sample_rate * audio.sample_width)
+        step = duration * self.real_time_factor / len(words)
+        for n in range(1, len(words) + 1):
+            time.sleep(step)
+            yield ' '.join(words[:n])
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'vosk': VoskBackend,
+    'file': FileBackend,
+}
+
+
+def create_backend(name, **options):
+    """Build a recognizer backend by name ('google', 'vosk' or 'file')."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech recognizer: {name}. Choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+# Consecutive failed microphone reads before continuous capture gives up
+MAX_READ_FAILURES = 20
 
 
 class Listener:
     """Handles speech-to-text conversion."""
     
-    def __init__(self):
+    def __init__(self, continuous=False, backend='google'):
+        """
+        Args:
+            continuous (bool): Capture in the background all the time, so
+                speech during playback or between commands isn't lost
+            backend (str|RecognizerBackend): Speech-to-text engine, by name
+                ('google', 'vosk') or instance
+        """
+        import speech_recognition as sr
+        
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
+        if isinstance(backend, str):
+            backend = GoogleBackend(self.recognizer) if backend == 'google' else create_backend(backend)
+        self.backend = backend
+        
+        # Called when new speech is detected, e.g. Speaker.interrupt for barge-in
+        self.on_speech = None
+        # True while the agent is talking (e.g. Speaker.is_speaking): its own
+        # voice mustn't count as speech
+        self.is_playing = None
+        
+        # Background capture state (see start_background)
+        self.segments = None
+        self.segmenter = None
+        self._background = None
+        self._background_running = False
+        self._background_error = None
         
         # Adjust for ambient noise on initialization
         print("Calibrating microphone for ambient noise... Please wait.")
         with self.microphone as source:
             self.recognizer.adjust_for_ambient_noise(source, duration=1)
         print("Microphone ready!")
+        
+        if continuous:
+            self.start_background()
+
+    def start_background(self, max_pending=8, timeout=10.0, **segmenter_options):
+        """
+        Start continuous capture: a background thread keeps the microphone
+        open, segments speech with VoiceSegmenter and queues each utterance
+        for capture() to return.
+        
+        Args:
+            max_pending (int): Utterances buffered before the oldest is dropped
+            timeout (float): Seconds to wait for the microphone to open
+            **segmenter_options: Passed to VoiceSegmenter
+            
+        Raises:
+            RuntimeError: The microphone didn't open in time
+            Exception: Whatever opening the microphone raised
+        """
+        if self._background_running:
+            return
+        self.segments = queue.Queue(maxsize=max_pending)
+        self._background_running = True
+        self._background_error = None
+        ready = threading.Event()
+        self._background = threading.Thread(target=self._capture_continuously,
+                                            args=(ready, segmenter_options),
+                                            name='listener-capture', daemon=True)
+        self._background.start()
+        if not ready.wait(timeout):
+            self._background_running = False
+            self._background = None
+            raise RuntimeError(f"The microphone didn't open within {timeout:.0f} s")
+        if self._background_error is not None:
+            self._background = None
+            raise self._background_error
+
+    def stop_background(self):
+        """Stop continuous capture."""
+        self._background_running = False
+        if self._background is not None:
+            self._background.join(timeout=2)
+            self._background = None
+
+    def _capture_continuously(self, ready, segmenter_options):
+        try:
+            import speech_recognition as sr
+            
+            def speech_started():
+                if self.on_speech is not None:
+                    self.on_speech()
+            
+            with self.microphone as source:
+                segmenter_options.setdefault('energy_threshold', self.recognizer.energy_threshold)
+                self.segmenter = VoiceSegmenter(source.SAMPLE_RATE, source.SAMPLE_WIDTH, source.CHUNK,
+                                                on_speech_start=speech_started, **segmenter_options)
+                ready.set()
+                self._segment_stream(sr, source)
+        except Exception as e:
+            self._background_running = False
+            if ready.is_set():
+                print(f"Continuous listening stopped: {e}")
+            else:
+                self._background_error = e  # Raised by start_background
+        finally:
+            ready.set()
+
+    def _segment_stream(self, sr, source):
+        """Read the open microphone and queue each utterance until stopped."""
+        failures = 0
+        while self._background_running:
+            try:
+                chunk = source.stream.read(source.CHUNK)
+                failures = 0
+            except Exception as e:
+                # e.g. the device was unplugged: back off, and give up after a while
+                failures += 1
+                if failures == 1:
+                    print(f"Microphone read failed: {e}")
+                if failures >= MAX_READ_FAILURES:
+                    raise RuntimeError(f"the microphone failed {failures} times in a row ({e})")
+                time.sleep(min(0.05 * 2 ** failures, 1.0))
+                continue
+            segment = self.segmenter.feed(chunk, playback=self._playing())
+            if not segment:
+                continue
+            
+            audio = sr.AudioData(segment, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            try:
+                self.segments.put_nowait(audio)
+            except queue.Full:
+                # Nobody is consuming; keep the newest speech
+                self.segments.get_nowait()
+                self.segments.put_nowait(audio)
+
+    def _playing(self):
+        return self.is_playing is not None and self.is_playing()
 
     def listen(self, timeout=5, phrase_time_limit=10):
         """
@@ -27,63 +543,263 @@ class Listener:
         Returns:
             str: Recognized text or error message
         """
+        with tracing.span('listen'):
+            audio = self.capture(timeout=timeout, phrase_time_limit=phrase_time_limit)
+            if isinstance(audio, str):
+                return audio
+            return self.recognize(audio)
+
+    def capture(self, timeout=5, phrase_time_limit=10):
+        """
+        Record a single phrase from the microphone.
+        
+        Args:
+            timeout (int): Seconds to wait for speech to start
+            phrase_time_limit (int): Max seconds for a phrase
+            
+        Returns:
+            sr.AudioData: Captured audio, or an error message string
+        """
+        import speech_recognition as sr
+        
+        if self._background_running:
+            # Utterances are already being segmented in the background
+            try:
+                return self.segments.get(timeout=timeout)
+            except queue.Empty:
+                return "ERROR:TIMEOUT"
+        
+        # Without the segmenter the agent's own voice can't be told apart
+        # from the user's, so listen only once it has finished talking
+        while self._playing():
+            time.sleep(0.05)
         try:
             with self.microphone as source:
                 print("Listening...")
                 audio = self.recognizer.listen(source, timeout=timeout, 
-                                              phrase_time_limit=phrase_time_limit)
+                                               phrase_time_limit=phrase_time_limit)
+            if self.on_speech is not None:
+                self.on_speech()
+            return audio
+        except sr.WaitTimeoutError:
+            return "ERROR:TIMEOUT"
+        except Exception as e:
+            return f"ERROR:{str(e)}"
+
+    def recognize(self, audio, on_partial=None):
+        """
+        Convert captured audio to text.
+        
+        Args:
+            audio (sr.AudioData): Audio returned by capture()
+            on_partial (callable): Called with each partial transcript while
+                recognition is still running
             
+        Returns:
+            str: Recognized text or error message
+        """
+        with tracing.span('recognize') as span:
+            text = self._recognize(audio, on_partial)
+            if text.startswith('ERROR'):
+                kind = text.split(':')[1].lower() if text.count(':') else ''
+                if kind not in ('unclear', 'service'):
+                    kind = 'other'  # Free-form exception text would explode the label set
+                span.set(outcome=kind)
+                tracing.count('agent_recognition_errors_total', kind=kind)
+            return text
+
+    def _recognize(self, audio, on_partial):
+        try:
             print("Processing speech...")
-            # Use Google Web Speech API (free)
-            text = self.recognizer.recognize_google(audio)
+            if on_partial is None:
+                text = self.backend.recognize(audio)
+            else:
+                text = None
+                for text in self.backend.stream(audio):
+                    on_partial(text)
+                if not text:
+                    raise RecognitionUnclear()
             print(f"You said: {text}")
             return text
             
-        except sr.WaitTimeoutError:
-            return "ERROR:TIMEOUT"
-        except sr.UnknownValueError:
+        except RecognitionUnclear:
             return "ERROR:UNCLEAR"
-        except sr.RequestError as e:
+        except RecognitionUnavailable as e:
             return f"ERROR:SERVICE:{str(e)}"
         except Exception as e:
             return f"ERROR:{str(e)}"
 
 
+class _Utterance:
+    """A queued message for the TTS worker."""
+
+    def __init__(self, text, key, generation, sequence):
+        self.text = text
+        self.key = key
+        self.generation = generation
+        self.sequence = sequence
+        self.done = threading.Event()
+        # The speaker thread has no span context of its own; remember whose reply this is
+        self.command = tracing.current_command()
+
+
 class Speaker:
-    """Handles text-to-speech conversion."""
+    """Handles text-to-speech conversion.
+    
+    A single long-lived worker thread owns the pyttsx3 engine (which is not
+    thread-safe) and speaks messages from a priority queue, so callers never
+    block on runAndWait unless they ask to.
+    """
+    
+    # Lower numbers are spoken first
+    PRIORITY_URGENT = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_LOW = 2
     
-    def __init__(self):
-        self.engine = pyttsx3.init()
+    def __init__(self, engine_factory=None):
+        """
+        Args:
+            engine_factory (callable): Builds the TTS engine on the worker
+                thread. Defaults to a configured pyttsx3 engine.
+        """
+        self.engine_factory = engine_factory or self._create_engine
+        self.engine = None
+        self.queue = queue.PriorityQueue()
+        self.stats = {'spoken': 0, 'dropped': 0, 'interrupted': 0}
+        
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._generation = 0    # Bumped to drop everything queued so far
+        self._latest = {}       # key -> sequence number of the newest message
+        self._interrupt = threading.Event()
+        self._speaking = None
+        self._init_error = None
+        
+        ready = threading.Event()
+        self.worker = threading.Thread(target=self._run, args=(ready,), name='tts-worker', daemon=True)
+        self.worker.start()
+        ready.wait()
+        if self._init_error is not None:
+            raise self._init_error
+
+    def _create_engine(self):
+        import pyttsx3
+        
+        engine = pyttsx3.init()
         
         # Configure voice properties
-        voices = self.engine.getProperty('voices')
+        voices = engine.getProperty('voices')
         # Try to use a female voice if available (usually index 1)
         if len(voices) > 1:
-            self.engine.setProperty('voice', voices[1].id)
+            engine.setProperty('voice', voices[1].id)
         
         # Set speech rate (default is 200)
-        self.engine.setProperty('rate', 175)
+        engine.setProperty('rate', 175)
         
         # Set volume (0.0 to 1.0)
-        self.engine.setProperty('volume', 0.9)
+        engine.setProperty('volume', 0.9)
+        return engine
 
-    def speak(self, text, async_mode=False):
+    def speak(self, text, async_mode=False, priority=PRIORITY_NORMAL, key=None, replace=False):
         """
         Convert text to speech.
         
         Args:
             text (str): Text to speak
-            async_mode (bool): If True, speak in background thread
+            async_mode (bool): If True, return as soon as the text is queued
+            priority (int): PRIORITY_URGENT, PRIORITY_NORMAL or PRIORITY_LOW
+            key (str): Coalescing key; a newer message with the same key
+                replaces an older one that hasn't started yet
+            replace (bool): Drop every message still waiting in the queue
         """
         print(f"Agent: {text}")
         
-        if async_mode:
-            # Run in separate thread to avoid blocking
-            thread = threading.Thread(target=self._speak_sync, args=(text,))
-            thread.daemon = True
-            thread.start()
-        else:
-            self._speak_sync(text)
+        with self._lock:
+            if replace:
+                self._drop_queued()
+            utterance = _Utterance(text, key, self._generation, next(self._sequence))
+            if key is not None:
+                self._latest[key] = utterance.sequence
+            self.queue.put((priority, utterance.sequence, utterance))
+        
+        if not async_mode:
+            utterance.done.wait()
+
+    def interrupt(self):
+        """
+        Barge-in: stop the current utterance immediately and drop
+        everything still queued.
+        """
+        with self._lock:
+            self._drop_queued()
+            if self._speaking is not None:
+                self._interrupt.set()
+
+    def wait_until_idle(self):
+        """Block until every queued message has been spoken or dropped."""
+        self.queue.join()
+
+    def is_speaking(self):
+        """True while an utterance is being played."""
+        return self._speaking is not None
+
+    def close(self):
+        """Finish queued speech and stop the worker."""
+        self.queue.put((float('inf'), next(self._sequence), None))
+        self.worker.join(timeout=30)
+
+    def _drop_queued(self):
+        # Messages from an older generation are skipped by the worker
+        self._generation += 1
+
+    def _is_stale(self, utterance):
+        if utterance.generation != self._generation:
+            return True
+        return utterance.key is not None and self._latest.get(utterance.key) != utterance.sequence
+
+    def _run(self, ready):
+        """Worker loop: the only code that touches the engine."""
+        try:
+            self.engine = self.engine_factory()
+            # Checked between words so an utterance can be cut off mid-sentence
+            self.engine.connect('started-word', self._on_word)
+        except Exception as e:
+            self._init_error = e
+            ready.set()
+            return
+        ready.set()
+        
+        while True:
+            _, _, utterance = self.queue.get()
+            try:
+                if utterance is None:
+                    break
+                with self._lock:
+                    if self._is_stale(utterance):
+                        self.stats['dropped'] += 1
+                        continue
+                    self._interrupt.clear()
+                    self._speaking = utterance
+                
+                with tracing.span('speak', command=utterance.command, chars=len(utterance.text)) as span:
+                    self._speak_sync(utterance.text)
+                    if self._interrupt.is_set():
+                        span.set(outcome='interrupted')
+                
+                with self._lock:
+                    self._speaking = None
+                    if self._interrupt.is_set():
+                        self.stats['interrupted'] += 1
+                    else:
+                        self.stats['spoken'] += 1
+            finally:
+                if utterance is not None:
+                    utterance.done.set()
+                self.queue.task_done()
+
+    def _on_word(self, name, location, length):
+        if self._interrupt.is_set():
+            self.engine.stop()
 
     def _speak_sync(self, text):
         """Internal method to speak synchronously."""
@@ -0,0 +1,311 @@
+"""
+Local stand-ins for external services, for tests and benchmarks.
+
+StubModel mimics the parts of google.generativeai.GenerativeModel that the
+Brain uses, including stream=True, without any network access. StubListener
+replays a list of commands as if they were spoken, and StubEngine stands in
+for the pyttsx3 engine inside a real Speaker. All of them can inject
+latency so benchmarks see realistic timings. StubLLMServer serves StubModel
+answers over local HTTP with injected latency spikes, errors, hangs and
+outages; RemoteStubModel is the matching client.
+"""
+
+import re
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_router import HTTPModel
+
+
+class StubChunk:
+    """One streamed piece of a response (mirrors the .text of a Gemini chunk)."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubResponse:
+    """A complete, non-streamed response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Drop-in replacement for GenerativeModel with canned responses."""
+
+    def __init__(self, responses=None, latency=0.0, chunk_size=8, chunk_delay=0.0,
+                 fence=True, trailing_text=''):
+        """
+        Args:
+            responses (dict): Maps user input (case-insensitive) to a command
+                dict. Unknown inputs get a 'respond' echo.
+            latency (float): Seconds before the first byte
+            chunk_size (int): Characters per streamed chunk
+            chunk_delay (float): Seconds between streamed chunks
+            fence (bool): Wrap the JSON in a ```json code fence like Gemini does
+            trailing_text (str): Extra text sent after the JSON object
+        """
+        self.responses = {k.lower(): v for k, v in (responses or {}).items()}
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.fence = fence
+        self.trailing_text = trailing_text
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Return a StubResponse, or an iterator of StubChunks when streaming."""
+        self.calls += 1
+        text = self.render(self.user_input(prompt))
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return StubResponse(text)
+
+    def user_input(self, prompt):
+        """Pull the user's command back out of the Brain's prompt."""
+        match = re.search(r'User: "([^\n]*)"\s*$', prompt)
+        return match.group(1) if match else prompt
+
+    def command_for(self, user_input):
+        """The command dict this stub answers with."""
+        command = self.responses.get(user_input.strip().lower())
+        if command is None:
+            command = {"action": "respond", "params": {"message": f"You said: {user_input}"}}
+        return command
+
+    def render(self, user_input):
+        """Format the response text the way the real model tends to."""
+        text = json.dumps(self.command_for(user_input))
+        if self.fence:
+            text = f"```json\n{text}\n```"
+        return text + self.trailing_text
+
+    def _stream(self, text):
+        time.sleep(self.latency)
+        for i in range(0, len(text), self.chunk_size):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield StubChunk(text[i:i + self.chunk_size])
+
+
+class StubLLMServer:
+    """Local HTTP "LLM" with injectable latency and failures.
+
+    POST /generate {"prompt": ...} answers {"text": ...} the way StubModel
+    would. The fault settings are plain attributes, so a test can change them
+    while the server runs (e.g. set down=True for an outage).
+    """
+
+    def __init__(self, responses=None, latency=0.2, jitter=0.05, slow_rate=0.0, slow_latency=2.0,
+                 error_rate=0.0, hang_rate=0.0, hang_time=60.0, seed=None):
+        """
+        Args:
+            responses (dict): As for StubModel
+            latency (float): Base seconds per request
+            jitter (float): Extra uniform random seconds per request
+            slow_rate (float): Fraction of requests that take slow_latency instead
+            slow_latency (float): Seconds for a slow request (the tail)
+            error_rate (float): Fraction of requests answered with HTTP 500
+            hang_rate (float): Fraction of requests that don't answer for hang_time
+            hang_time (float): Seconds a hung request waits before answering
+            seed (int): Seed for the random faults (repeatable runs)
+        """
+        self.model = StubModel(responses, fence=True)
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_time = hang_time
+        self.down = False
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                status, payload = stub.answer(body.get('prompt', ''))
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+
+    def answer(self, prompt):
+        """Decide this request's fate, sleep accordingly and return (status, payload)."""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            jitter = self._random.uniform(0, self.jitter)
+        if self.down:
+            return 503, {'error': 'unavailable'}
+        if roll < self.hang_rate:
+            self._stopped.wait(self.hang_time)
+            return 504, {'error': 'hung'}
+        roll -= self.hang_rate
+        if roll < self.error_rate:
+            time.sleep(self.latency / 2)
+            return 500, {'error': 'internal error'}
+        roll -= self.error_rate
+        time.sleep(self.slow_latency if roll < self.slow_rate else self.latency + jitter)
+        return 200, {'text': self.model.render(self.model.user_input(prompt))}
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='stub-llm-server', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()  # Release hung requests
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RemoteStubModel(HTTPModel):
+    """GenerativeModel-style client for StubLLMServer.
+
+    Like a real network client it waits as long as the server takes; put it
+    behind llm_client.ResilientModel to get deadlines and retries.
+    """
+
+
+class StubAudio:
+    """A captured "utterance": the transcript it will be recognized as."""
+
+    def __init__(self, text, captured_at):
+        self.text = text
+        self.captured_at = captured_at
+
+
+class StubListener:
+    """Replays commands through the Listener interface.
+
+    capture() hands out the next command (after the utterance duration),
+    recognize() returns its text after the recognition latency, and once the
+    commands run out the listener says "exit".
+    """
+
+    def __init__(self, commands, utterance_time=0.0, recognize_latency=0.0, per_word=0.0, pause=0.0):
+        """
+        Args:
+            commands (list): Texts to "say", in order
+            utterance_time (float): Seconds each capture takes (the user speaking)
+            pause (float): Seconds of silence before each utterance
+            recognize_latency (float): Seconds from the last partial to the
+                final transcript
+            per_word (float): Recognition seconds per word (partials arrive
+                at this pace)
+        """
+        self.commands = list(commands)
+        self.utterance_time = utterance_time
+        self.recognize_latency = recognize_latency
+        self.per_word = per_word
+        self.pause = pause
+        self.on_speech = None
+        self.captured = []    # monotonic time each utterance ended, in order
+        self.lock = threading.Lock()
+        self.position = 0
+
+    def capture(self, timeout=5, phrase_time_limit=10):
+        with self.lock:
+            if self.position < len(self.commands):
+                text = self.commands[self.position]
+                self.position += 1
+            else:
+                text = 'exit'
+        time.sleep(self.pause + self.utterance_time)
+        audio = StubAudio(text, time.monotonic())
+        if text != 'exit':
+            self.captured.append(audio.captured_at)
+        if self.on_speech is not None:
+            self.on_speech()
+        return audio
+
+    def recognize(self, audio, on_partial=None):
+        # Words are decoded one by one, then the final transcript waits for
+        # the end-of-speech decision, like a streaming recognizer
+        words = audio.text.split()
+        for n in range(1, len(words) + 1):
+            time.sleep(self.per_word)
+            if on_partial is not None:
+                on_partial(' '.join(words[:n]))
+        time.sleep(self.recognize_latency)
+        return audio.text
+
+    def listen(self, timeout=5, phrase_time_limit=10):
+        return self.recognize(self.capture(timeout, phrase_time_limit))
+
+    def start_background(self, max_pending=8, **segmenter_options):
+        pass
+
+    def stop_background(self):
+        pass
+
+
+class StubEngine:
+    """pyttsx3-compatible engine that "speaks" by sleeping per word.
+
+    Pass StubEngine (or a lambda building one) as Speaker(engine_factory=...).
+    Every finished utterance is logged as (text, start, end) in .spoken.
+    """
+
+    def __init__(self, per_word=0.0, startup=0.0):
+        """
+        Args:
+            per_word (float): Seconds per spoken word
+            startup (float): Seconds before the first word of each utterance
+        """
+        self.per_word = per_word
+        self.startup = startup
+        self.pending = []
+        self.callbacks = {}
+        self.properties = {'rate': 200, 'volume': 1.0, 'voices': [], 'voice': None}
+        self.spoken = []
+        self._stopped = False
+
+    def connect(self, topic, callback):
+        self.callbacks.setdefault(topic, []).append(callback)
+
+    def say(self, text):
+        self.pending.append(text)
+
+    def runAndWait(self):
+        self._stopped = False
+        for text in self.pending:
+            start = time.monotonic()
+            time.sleep(self.startup)
+            location = 0
+            for word in text.split():
+                if self._stopped:
+                    break
+                for callback in self.callbacks.get('started-word', []):
+                    callback('started-word', location, len(word))
+                time.sleep(self.per_word)
+                location += len(word) + 1
+            self.spoken.append((text, start, time.monotonic()))
+        self.pending = []
+
+    def stop(self):
+        self._stopped = True
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
@@ -0,0 +1,406 @@
+"""
+Background sampler of CPU, memory, disk, network and top-process figures.
+
+A daemon thread reads raw counters every `interval` seconds - from /proc
+on Linux, from psutil elsewhere when it is installed - turns them into
+rates and keeps the results in a SampleRing: a fixed-size ring of floats
+(one array, no per-sample objects), so ten minutes of history cost about
+50 KB. The get_system_info action (system_info below) then answers from
+memory, with current values, short-window averages and trends, instead of
+measuring on the spot.
+
+The per-process scan is the expensive part, so it runs only every few
+samples and keeps just the top few processes.
+"""
+
+import os
+import sys
+import math
+import time
+import shutil
+import threading
+from array import array
+
+# Numeric fields of one sample, in ring order
+FIELDS = ('time', 'cpu', 'memory', 'memory_used', 'memory_total', 'disk', 'disk_read', 'disk_write',
+          'net_rx', 'net_tx', 'load')
+NAN = float('nan')
+# Block devices whose traffic is already counted on the disk underneath
+VIRTUAL_DISKS = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'fd')
+
+
+class SampleRing:
+    """Fixed-size ring buffer of numeric samples, stored in one flat array."""
+
+    def __init__(self, size, fields=FIELDS):
+        """
+        Args:
+            size (int): Samples kept; the oldest is overwritten
+            fields (tuple): Field names, one float each
+        """
+        self.size = size
+        self.fields = fields
+        self.width = len(fields)
+        self.index = {name: i for i, name in enumerate(fields)}
+        self.data = array('d', [NAN]) * (size * self.width)
+        self.count = 0  # Samples ever written
+        self._lock = threading.Lock()
+
+    def append(self, values):
+        """Add one sample (a dict of field -> number; missing fields are NaN)."""
+        row = [float(values.get(name, NAN)) for name in self.fields]
+        with self._lock:
+            start = (self.count % self.size) * self.width
+            self.data[start:start + self.width] = array('d', row)
+            self.count += 1
+
+    def latest(self):
+        """The newest sample as a dict, or None when empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            start = ((self.count - 1) % self.size) * self.width
+            return dict(zip(self.fields, self.data[start:start + self.width]))
+
+    def series(self, field, seconds=None):
+        """
+        Values of one field, oldest first.
+
+        Args:
+            field (str): Field name
+            seconds (float): Only samples from the last this many seconds
+
+        Returns:
+            list: (time, value) pairs, NaN values left out
+        """
+        column, clock = self.index[field], self.index['time']
+        with self._lock:
+            available = min(self.count, self.size)
+            newest = self.data[((self.count - 1) % self.size) * self.width + clock] if self.count else 0.0
+            points = []
+            for back in range(available - 1, -1, -1):
+                start = ((self.count - 1 - back) % self.size) * self.width
+                stamp = self.data[start + clock]
+                if seconds is not None and newest - stamp > seconds:
+                    continue
+                value = self.data[start + column]
+                if not math.isnan(value):
+                    points.append((stamp, value))
+        return points
+
+    def nbytes(self):
+        return self.data.itemsize * len(self.data)
+
+
+class SystemSampler:
+    """Samples system figures on a daemon thread into a SampleRing."""
+
+    def __init__(self, interval=1.0, history=600, top_every=5, top_count=5, disk_path=None):
+        """
+        Args:
+            interval (float): Seconds between samples
+            history (int): Samples kept in the ring (600 at 1 s = 10 minutes)
+            top_every (int): Scan processes every this many samples
+            top_count (int): Processes kept from each scan
+            disk_path (str): Filesystem whose usage is reported (default:
+                the one holding the home folder)
+        """
+        self.interval = interval
+        self.top_every = max(1, top_every)
+        self.top_count = top_count
+        self.disk_path = disk_path or os.path.expanduser('~')
+        self.ring = SampleRing(history)
+        self.top = []  # [(name, pid, cpu %, rss bytes)] from the latest scan
+        self.stats = {'samples': 0, 'scans': 0, 'sample_time': 0.0, 'scan_time': 0.0, 'errors': 0}
+        self.source = 'proc' if sys.platform.startswith('linux') and os.path.isdir('/proc') else 'psutil'
+        self._previous = None
+        self._previous_ticks = {}
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._disks = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Take a first reading now and keep sampling in the background; returns self."""
+        if self._thread is None:
+            try:
+                self.sample(scan=True)
+            except Exception:
+                self.stats['errors'] += 1  # The thread keeps trying; answers show what it gets
+            self._thread = threading.Thread(target=self._run, name='system-sampler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def wait_ready(self, timeout=None):
+        """Block until the first sample with rates (they need two readings) exists."""
+        return self._ready.wait(timeout)
+
+    def _run(self):
+        # start() took the first reading; the first rates follow after a
+        # short interval so CPU and I/O figures appear almost at once
+        delay = min(self.interval, 0.2)
+        n = 1
+        while not self._stop.wait(delay):
+            try:
+                # The second scan is the first with per-process rates
+                self.sample(scan=n == 1 or n % self.top_every == 0)
+            except Exception:
+                self.stats['errors'] += 1
+            n += 1
+            delay = self.interval
+
+    def sample(self, scan=False):
+        """Take one reading now (the thread calls this; benchmarks may too)."""
+        start = time.perf_counter()
+        now = time.monotonic()
+        raw = self._read_proc() if self.source == 'proc' else self._read_psutil()
+        previous, self._previous = self._previous, (now, raw)
+        self.ring.append(self._rates(previous, (now, raw)))
+        if previous is not None:
+            self._ready.set()
+        self.stats['samples'] += 1
+        self.stats['sample_time'] += time.perf_counter() - start
+        if scan:
+            start = time.perf_counter()
+            self.top = self._scan_processes(now)
+            self.stats['scans'] += 1
+            self.stats['scan_time'] += time.perf_counter() - start
+
+    def _rates(self, previous, current):
+        """One ring sample; rates need a previous reading, levels don't."""
+        now, new = current
+        then, old = previous or (now, {})
+        elapsed = max(now - then, 1e-6)
+        sample = {'time': now, 'memory_used': new.get('memory_used', NAN),
+                  'memory_total': new.get('memory_total', NAN), 'disk': new.get('disk', NAN),
+                  'load': new.get('load', NAN)}
+        if new.get('memory_total'):
+            sample['memory'] = new['memory_used'] / new['memory_total'] * 100
+        if 'cpu_total' in new and 'cpu_total' in old:
+            busy = (new['cpu_total'] - new['cpu_idle']) - (old['cpu_total'] - old['cpu_idle'])
+            total = new['cpu_total'] - old['cpu_total']
+            sample['cpu'] = max(0.0, min(100.0, busy / total * 100)) if total > 0 else 0.0
+        for counter in ('disk_read', 'disk_write', 'net_rx', 'net_tx'):
+            if counter in new and counter in old:
+                sample[counter] = max(0.0, (new[counter] - old[counter]) / elapsed)
+        return sample
+
+    def _common(self):
+        raw = {}
+        try:
+            usage = shutil.disk_usage(self.disk_path)
+            raw['disk'] = usage.used / usage.total * 100
+        except OSError:
+            pass
+        if hasattr(os, 'getloadavg'):
+            raw['load'] = os.getloadavg()[0]
+        return raw
+
+    def _read_proc(self):
+        raw = self._common()
+        # A missing or unreadable file (containers, hardened kernels) only
+        # drops its own fields
+        for read in (self._proc_cpu, self._proc_memory, self._proc_disks, self._proc_network):
+            try:
+                read(raw)
+            except (OSError, ValueError, IndexError):
+                self.stats['errors'] += 1
+        return raw
+
+    def _proc_cpu(self, raw):
+        with open('/proc/stat', 'rb') as f:
+            ticks = [int(v) for v in f.readline().split()[1:]]
+        raw['cpu_total'] = sum(ticks[:8])  # Guest time is already inside user time
+        raw['cpu_idle'] = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)  # idle + iowait
+
+    def _proc_memory(self, raw):
+        memory = {}
+        with open('/proc/meminfo', 'rb') as f:
+            for line in f:
+                key, _, rest = line.partition(b':')
+                if key in (b'MemTotal', b'MemAvailable'):
+                    memory[key] = int(rest.split()[0]) * 1024
+                    if len(memory) == 2:
+                        break
+        if len(memory) == 2:
+            raw['memory_total'] = memory[b'MemTotal']
+            raw['memory_used'] = memory[b'MemTotal'] - memory[b'MemAvailable']
+
+    def _proc_disks(self, raw):
+        if self._disks is None:
+            try:
+                self._disks = {name for name in os.listdir('/sys/block') if not name.startswith(VIRTUAL_DISKS)}
+            except OSError:
+                self._disks = set()
+        read = written = 0
+        with open('/proc/diskstats', 'rb') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 9 and fields[2].decode() in self._disks:
+                    read += int(fields[5]) * 512
+                    written += int(fields[9]) * 512
+        raw['disk_read'], raw['disk_write'] = read, written
+
+    def _proc_network(self, raw):
+        received = sent = 0
+        with open('/proc/net/dev', 'rb') as f:
+            for line in f.readlines()[2:]:
+                name, _, counters = line.partition(b':')
+                if name.strip() == b'lo':
+                    continue
+                fields = counters.split()
+                received += int(fields[0])
+                sent += int(fields[8])
+        raw['net_rx'], raw['net_tx'] = received, sent
+
+    def _read_psutil(self):
+        raw = self._common()
+        try:
+            import psutil
+        except ImportError:
+            return raw  # Only disk usage and load average without psutil
+        times = psutil.cpu_times()
+        raw['cpu_total'] = sum(times)
+        raw['cpu_idle'] = times.idle + getattr(times, 'iowait', 0.0)
+        memory = psutil.virtual_memory()
+        raw['memory_total'], raw['memory_used'] = memory.total, memory.total - memory.available
+        disk = psutil.disk_io_counters()
+        if disk is not None:
+            raw['disk_read'], raw['disk_write'] = disk.read_bytes, disk.write_bytes
+        net = psutil.net_io_counters(pernic=True)
+        raw['net_rx'] = sum(c.bytes_recv for name, c in net.items() if not name.lower().startswith(('lo', 'loopback')))
+        raw['net_tx'] = sum(c.bytes_sent for name, c in net.items() if not name.lower().startswith(('lo', 'loopback')))
+        return raw
+
+    def _scan_processes(self, now):
+        """Top processes by CPU since the previous scan: [(name, pid, cpu %, rss)]."""
+        ticks, rows = {}, []
+        if self.source == 'proc':
+            page = os.sysconf('SC_PAGE_SIZE')
+            for entry in os.listdir('/proc'):
+                if not entry.isdigit():
+                    continue
+                try:
+                    with open(f'/proc/{entry}/stat', 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue  # Exited while we were reading
+                name = data[data.find(b'(') + 1:data.rfind(b')')].decode('utf-8', 'replace')
+                fields = data[data.rfind(b')') + 2:].split()
+                ticks[entry] = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+                rows.append((entry, name, int(fields[21]) * page))
+        else:
+            try:
+                import psutil
+            except ImportError:
+                return []
+            for proc in psutil.process_iter(['name', 'cpu_times', 'memory_info']):
+                info = proc.info
+                if info['cpu_times'] is None:
+                    continue
+                ticks[proc.pid] = info['cpu_times'].user + info['cpu_times'].system
+                rows.append((proc.pid, info['name'] or '', info['memory_info'].rss if info['memory_info'] else 0))
+
+        previous, self._previous_ticks = self._previous_ticks, (now, ticks)
+        if not previous:
+            return []
+        then, old = previous
+        elapsed = max(now - then, 1e-6)
+        usage = []
+        for pid, name, rss in rows:
+            if pid in old:
+                usage.append((name, int(pid), (ticks[pid] - old[pid]) / elapsed * 100, rss))
+        usage.sort(key=lambda row: row[2], reverse=True)
+        return usage[:self.top_count]
+
+    def summary(self, window=60.0):
+        """
+        Current values with averages and trends over the last `window` seconds.
+
+        Returns:
+            dict: field -> {'now', 'avg', 'trend'} (trend is 'rising',
+                'falling' or 'steady'), plus 'top' processes; None before
+                the first sample
+        """
+        latest = self.ring.latest()
+        if latest is None:
+            return None
+        result = {'top': list(self.top), 'window': window}
+        for field in FIELDS[1:]:
+            points = self.ring.series(field, window)
+            if not points:
+                continue
+            values = [value for _, value in points]
+            result[field] = {'now': values[-1], 'avg': sum(values) / len(values), 'trend': trend(values)}
+        return result
+
+    def report(self, window=60.0):
+        """The summary as a few short lines for speaking or printing."""
+        summary = self.summary(window)
+        if summary is None:
+            return "Live figures are not available yet."
+        lines = []
+        minutes = f"{window / 60:.0f} min" if window >= 60 else f"{window:.0f} s"
+        if 'cpu' in summary:
+            cpu = summary['cpu']
+            line = f"CPU: {cpu['now']:.0f}% ({minutes} average {cpu['avg']:.0f}%, {cpu['trend']})"
+            if 'load' in summary:
+                line += f", load {summary['load']['now']:.2f} on {os.cpu_count()} cores"
+            lines.append(line)
+        if 'memory' in summary:
+            memory = summary['memory']
+            lines.append(f"Memory: {memory['now']:.0f}% used, {format_bytes(summary['memory_used']['now'])} of "
+                         f"{format_bytes(summary['memory_total']['now'])} ({memory['trend']})")
+        if 'disk' in summary:
+            line = f"Disk: {summary['disk']['now']:.0f}% full"
+            if 'disk_read' in summary:
+                line += (f", {format_bytes(summary['disk_read']['avg'])}/s read, "
+                         f"{format_bytes(summary['disk_write']['avg'])}/s written")
+            lines.append(line)
+        if 'net_rx' in summary:
+            lines.append(f"Network: {format_bytes(summary['net_rx']['avg'])}/s down, "
+                         f"{format_bytes(summary['net_tx']['avg'])}/s up")
+        busy = [f"{name} {cpu:.0f}%" for name, _, cpu, _ in summary['top'][:3] if cpu >= 1]
+        if busy:
+            lines.append("Busiest: " + ', '.join(busy))
+        return '\n'.join(lines)
+
+
+def trend(values):
+    """'rising', 'falling' or 'steady', comparing the first and last third of a series."""
+    if len(values) < 3:
+        return 'steady'
+    third = len(values) // 3
+    early = sum(values[:third]) / third
+    late = sum(values[-third:]) / third
+    scale = max(abs(early), abs(late), 1e-9)
+    change = late - early
+    # Percentages move by points, byte rates by a relative amount
+    if abs(change) < 5 if scale <= 100 else abs(change) / scale < 0.25:
+        return 'steady'
+    return 'rising' if change > 0 else 'falling'
+
+
+def format_bytes(value):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def system_info(executor, params):
+    """The get_system_info action: platform details and live figures from the executor's sampler."""
+    import platform
+    info = f"OS: {platform.system()} {platform.release()}\n"
+    info += f"Machine: {platform.machine()}\n"
+    info += f"Processor: {platform.processor()}"
+    # A sampler started by this call has levels but no rates yet; they follow within 0.2 s
+    return info + "\n" + executor.system_sampler.report()
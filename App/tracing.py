@@ -0,0 +1,330 @@
+"""
+Lightweight tracing and metrics for the agent loop.
+
+Tracing is off by default. Every helper checks one module global and returns
+immediately, so instrumented code pays a function call per span and nothing
+else. `enable()` (main.py --profile) installs a Tracer that:
+
+  - writes one JSON line per finished span to trace-<time>-<pid>.jsonl
+  - keeps counters and per-span latency histograms, written as
+    Prometheus text to metrics.prom every few seconds and on close
+
+Spans nest per thread: a span opened inside another records it as its
+parent and inherits its `command` id, so the component spans (think, llm,
+action, ...) of one command can be grouped under its pipeline stage spans.
+
+    with tracing.span('action', action='open_app') as span:
+        ...
+        span.set(outcome='failed')
+    tracing.count('agent_llm_parse_failures_total')
+"""
+
+import os
+import re
+import json
+import time
+import itertools
+import threading
+from pathlib import Path
+
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent / '.agent_cache' / 'profile'
+
+# Histogram buckets for span durations, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Span attributes that become metric labels; everything else only goes to the trace
+LABEL_KEYS = ('stage', 'action', 'source', 'outcome', 'kind', 'backend')
+
+METRIC_HELP = {
+    'agent_span_seconds': 'Time spent in each traced span',
+    'agent_errors_total': 'Unhandled errors by stage',
+    'agent_action_failures_total': 'Actions that returned a failure result',
+    'agent_commands_total': 'Commands answered, by source (fast_path, cache, llm)',
+    'agent_llm_parse_failures_total': 'LLM responses that were not valid JSON',
+    'agent_llm_invalid_commands_total': 'LLM commands rejected by the action registry (unknown action, missing params)',
+    'agent_llm_errors_total': 'LLM calls that raised',
+    'agent_llm_attempt_errors_total': 'Single LLM attempts that raised (before retries)',
+    'agent_llm_retries_total': 'LLM attempts retried after a failure or timeout',
+    'agent_llm_timeouts_total': 'LLM attempts abandoned at their deadline',
+    'agent_llm_hedges_total': 'Duplicate LLM requests sent because an attempt was slow',
+    'agent_llm_circuit_opens_total': 'Times the LLM circuit breaker opened',
+    'agent_llm_degraded_total': 'Commands answered by the local fallback because the LLM was unavailable',
+    'agent_llm_backend_requests_total': 'LLM requests by backend and outcome (ok, parse_failure, error)',
+    'agent_prompt_bytes_total': 'Bytes of prompt sent to the LLM',
+    'agent_prompt_tokens_total': 'Estimated tokens of prompt sent to the LLM',
+    'agent_response_bytes_total': 'Bytes of LLM response received',
+    'agent_recognition_errors_total': 'Speech recognition results that were errors',
+}
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_tracer = None
+
+
+def estimate_tokens(text):
+    """
+    Rough token count: words and punctuation marks.
+
+    Tracks LLM tokenizers within ~20% on English prompts, which is enough to
+    see prompt growth without shipping a tokenizer.
+    """
+    return len(_TOKEN_RE.findall(text))
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed region; use as a context manager."""
+
+    __slots__ = ('tracer', 'name', 'attrs', 'id', 'parent', 'start', 'wall')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. an outcome known only at the end)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.id = next(self.tracer._ids)
+        self.parent = stack[-1].id if stack else None
+        if stack and 'command' not in self.attrs and 'command' in stack[-1].attrs:
+            self.attrs['command'] = stack[-1].attrs['command']
+        stack.append(self)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, duration)
+        return False
+
+
+class Tracer:
+    """Collects spans and metrics and writes them under one folder."""
+
+    def __init__(self, folder=DEFAULT_PROFILE_DIR, flush_interval=5.0):
+        """
+        Initialize the tracer and open a new trace file.
+
+        Args:
+            folder (str|Path): Where the trace and metrics files go
+            flush_interval (float): Seconds between background flushes
+        """
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.trace_path = self.folder / f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+        self.metrics_path = self.folder / 'metrics.prom'
+        self._trace = open(self.trace_path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # labels -> [bucket counts..., count, sum]
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,),
+                                         name='tracing-flush', daemon=True)
+        self._flusher.start()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def current(self):
+        """Innermost open span on this thread, or None."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _finish(self, span, duration):
+        record = {'ts': round(span.wall, 6), 'span': span.name, 'ms': round(duration * 1000, 3),
+                  'id': span.id, 'parent': span.parent, 'thread': threading.current_thread().name}
+        record.update(span.attrs)
+        line = json.dumps(record, default=str)
+
+        labels = (('span', span.name),) + tuple(
+            (key, str(span.attrs[key])) for key in LABEL_KEYS if key in span.attrs)
+        with self._lock:
+            if self._trace.closed:
+                return  # A background thread finishing after close(); its span is dropped
+            self._trace.write(line + '\n')
+            row = self.histograms.get(labels)
+            if row is None:
+                row = self.histograms[labels] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += duration
+
+    def render_metrics(self):
+        """
+        Current metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {labels: list(row) for labels, row in self.histograms.items()}
+
+        lines = []
+        name = 'agent_span_seconds'
+        lines += [f"# HELP {name} {METRIC_HELP[name]}", f"# TYPE {name} histogram"]
+        for labels, row in sorted(histograms.items()):
+            for bound, value in zip(BUCKETS, row):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {value}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {row[-2]}")
+            lines.append(f"{name}_sum{_labels(labels)} {row[-1]:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {row[-2]}")
+
+        described = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in described:
+                described.add(name)
+                lines += [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Flush the trace file and rewrite the metrics file."""
+        with self._lock:
+            if not self._trace.closed:
+                self._trace.flush()
+        # Replace atomically so a scraper never reads half a file
+        temp = self.metrics_path.with_suffix('.tmp')
+        temp.write_text(self.render_metrics(), encoding='utf-8')
+        os.replace(temp, self.metrics_path)
+
+    def _flush_periodically(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def summary(self):
+        """
+        Per-span totals for a quick look at where the time went.
+
+        Returns:
+            list: (label string, count, mean ms, total ms) sorted by total time
+        """
+        with self._lock:
+            rows = [(' '.join(f"{k}={v}" for k, v in labels), row[-2], row[-1] / row[-2] * 1000,
+                     row[-1] * 1000) for labels, row in self.histograms.items() if row[-2]]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def close(self):
+        """Stop the flush thread and write everything out."""
+        self._stop.set()
+        self._flusher.join(timeout=1)
+        self.flush()
+        with self._lock:
+            self._trace.close()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def enable(folder=DEFAULT_PROFILE_DIR, flush_interval=5.0):
+    """
+    Turn tracing on for the whole process.
+
+    Returns:
+        Tracer: The installed tracer
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(folder, flush_interval)
+    return _tracer
+
+
+def disable():
+    """Turn tracing off, writing out what was collected."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **attrs):
+    """Timed span context manager; a shared no-op object while tracing is off."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **attrs)
+
+
+def annotate(**attrs):
+    """Attach attributes to the innermost open span on this thread."""
+    if _tracer is not None:
+        current = _tracer.current()
+        if current is not None:
+            current.set(**attrs)
+
+
+def current_command():
+    """Command id of the innermost open span on this thread, or None."""
+    if _tracer is not None:
+        current = _tracer.current()
+        if current is not None:
+            return current.attrs.get('command')
+    return None
+
+
+def count(name, value=1, **labels):
+    """Add to a counter (no-op while tracing is off)."""
+    if _tracer is not None:
+        _tracer.count(name, value, **labels)
+
+
+def render_metrics():
+    """Prometheus text for the current metrics, or '' while tracing is off."""
+    tracer = _tracer
+    return tracer.render_metrics() if tracer is not None else ''